@@ -1,10 +1,10 @@
+import io
+import os
+import time
+import uuid
+
 import streamlit as st
-import pandas as pd
 from datetime import datetime, timedelta
-import numpy as np
-from scipy.optimize import newton
-import calendar
-from typing import Dict, Tuple, Optional
 
 # Password protection - ADD THIS AT THE TOP
 def check_password():
@@ -36,360 +36,453 @@ def check_password():
 
 # Only show the app if password is correct
 if check_password():
-
+    # Heavy dependencies are only imported once the user is past the login screen.
+    # The financial and report functions live in the gal_calculator package.
+    import altair as alt
+    import numpy as np
+    import pandas as pd
+    
+    from gal_calculator.appointments import AppointmentIndex, normalize_name, record_appointment
+    from gal_calculator.audit import audit_deal, float_to_cents, to_cents
+    from gal_calculator.breakeven import irr_guess, price_for_discount_rate, price_for_irr, price_for_profit
+    from gal_calculator.curves import TreasuryCurveStore
+    from gal_calculator.documents import DOCX_MIME, render_docx, report_filename
+    from gal_calculator.ingest import ImportedSchedule, ScheduleImportError, read_schedule
+    from gal_calculator.metrics import deal_metrics, duration_metrics
+    from gal_calculator.mortality import DEFAULT_PATHS, ILLUSTRATIVE_TABLE_PATH, read_mortality_tables, value_life_contingent
+    from gal_calculator.profiling import Profiler
+    from gal_calculator.pricing import (
+        calculate_competitor_quote,
+        calculate_excel_discount_rate,
+        calculate_profit,
+        find_treasury_bounds,
+        get_treasury_series_info,
+    )
+    from gal_calculator.scenarios import complete_curve, scenario_grid, scenario_heatmap
+    from gal_calculator.reports import (
+        combine_facts,
+        format_exhibits_list,
+        generate_life_contingent_analysis,
+        generate_paragraph_2_from_financial_data,
+        generate_report,
+        get_report_template,
+        get_report_template_options,
+        prior_appointment_sentence,
+    )
+    from gal_calculator.schedule import PaymentSchedule
+    from gal_calculator.sections import ReportSections
+    from gal_calculator.store import DealStore
+    from gal_calculator.xirr import WarmStarts, solve_rate
+    
     # ==========================================
-    # FINANCIAL CALCULATION FUNCTIONS
-    # (DO NOT TOUCH THIS SECTION - WORKING FINANCIAL CODE)
+    # CACHED DEAL COMPUTATION
+    # (PURE FINANCIAL PIPELINE KEYED ON NORMALIZED INPUTS)
     # ==========================================
-
-    def xirr(cashflows, dates, guess=0.1):
-        sorted_pairs = sorted(zip(dates, cashflows))
-        dates = [pair[0] for pair in sorted_pairs]
-        cashflows = [pair[1] for pair in sorted_pairs]
-        
-        first_date = dates[0]
-        days = [(date - first_date).days for date in dates]
-        
-        def npv(rate):
-            return sum(cf / ((1 + rate) ** (day / 365.0)) for cf, day in zip(cashflows, days))
-        
-        low = -0.99
-        high = 10.0
-        
-        for _ in range(100):
-            mid = (low + high) / 2.0
-            npv_result = npv(mid)
-            
-            if abs(npv_result) < 1e-10:
-                return mid
-            elif npv_result > 0:
-                low = mid
-            else:
-                high = mid
-        
-        return mid
     
-    def find_treasury_bounds(duration_years: float) -> Tuple[float, float]:
+    CACHE_MAX_ENTRIES = 256
+    CACHE_TTL_SECONDS = 60 * 60
+    
+    # Counts cache misses during this rerun; the cached functions only run on a miss
+    pricing_cache_stats = {"calls": 0, "misses": 0}
+    
+    # An imported issuer schedule stands in for the payment groups as
+    # (IMPORTED_SCHEDULE, datetime64[D] date bytes, float64 amount bytes)
+    IMPORTED_SCHEDULE = "imported_schedule"
+    GROUPS_SOURCE = "Payment groups"
+    IMPORT_SOURCE = "Import the issuer's schedule (CSV/Excel)"
+    
+    @st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+    def load_payment_schedule(file_bytes, file_name):
         """
-        Find the appropriate treasury bounds for interpolation.
-        Available maturities: 0.25, 0.5, 1, 2, 3, 5, 7, 10, 20, 30 years
-        For durations > 30 years, cap at 30-year rate (no extrapolation)
+        Payment dates and amounts from an uploaded issuer schedule, sorted by date
         """
-        maturities = [0.25, 0.5, 1, 2, 3, 5, 7, 10, 20, 30]
-        
-        # Cap at 30-year rate for long durations
-        if duration_years >= maturities[-1]:
-            return maturities[-1], maturities[-1]  # 30, 30 (will result in flat 30Y rate)
-        
-        # Handle very short durations
-        if duration_years <= maturities[0]:
-            return maturities[0], maturities[1]  # 0.25, 0.5
-        
-        # Find bounds where duration sits between two maturities
-        for i in range(len(maturities) - 1):
-            if maturities[i] <= duration_years <= maturities[i + 1]:
-                return maturities[i], maturities[i + 1]
-        
-        # Fallback (shouldn't happen)
-        return 5, 7
-    
-    def get_treasury_series_info(maturity: float) -> Dict[str, str]:
-        """
-        Get FRED series information for a given maturity.
-        Returns dict with series_id and display_name.
-        """
-        series_mapping = {
-            0.25: {"series_id": "DGS3MO", "display_name": "3-Month"},
-            0.5: {"series_id": "DGS6MO", "display_name": "6-Month"},
-            1: {"series_id": "DGS1", "display_name": "1-Year"},
-            2: {"series_id": "DGS2", "display_name": "2-Year"},
-            3: {"series_id": "DGS3", "display_name": "3-Year"},
-            5: {"series_id": "DGS5", "display_name": "5-Year"},
-            7: {"series_id": "DGS7", "display_name": "7-Year"},
-            10: {"series_id": "DGS10", "display_name": "10-Year"},
-            20: {"series_id": "DGS20", "display_name": "20-Year"},
-            30: {"series_id": "DGS30", "display_name": "30-Year"}
-        }
-        
-        return series_mapping.get(maturity, {"series_id": "Unknown", "display_name": "Unknown"})
+        return read_schedule(io.BytesIO(file_bytes), filename=file_name)
     
-    def calculate_duration(payment_dates, payment_amounts, purchase_date, discount_rate):
+    # Payment groups are edited as rows of one grid; the rows are saved with a deal as financial_group_rows
+    GROUP_COLUMNS = ["Payments", "Frequency", "Payment Amount", "First Payment", "Last Payment"]
+    GROUP_FREQUENCIES = ["Monthly", "Annual"]
+    GROUP_EDITOR_COLUMNS = {
+        "Payments": st.column_config.NumberColumn("Payments", min_value=1, step=1, format="%d", default=1, required=True),
+        "Frequency": st.column_config.SelectboxColumn("Frequency", options=GROUP_FREQUENCIES, default="Monthly", required=True,
+                                                      help="Ignored for a group of one payment"),
+        "Payment Amount": st.column_config.NumberColumn("Payment Amount", min_value=0.01, step=0.01, format="dollar", default=10000.0, required=True),
+        "First Payment": st.column_config.DateColumn("First Payment", format="MM/DD/YYYY", required=True),
+        "Last Payment": st.column_config.DateColumn("Last Payment", format="MM/DD/YYYY", help="Not needed for a group of one payment"),
+    }
+    
+    def default_group_row():
         """
-        Calculate weighted average duration of payments.
-        Duration = Sum(PV × Years) / Sum(PV)
+        Grid row for a new payment group
         """
-        total_pv = 0
-        total_time_weighted_pv = 0
-        
-        for payment_date, payment_amount in zip(payment_dates, payment_amounts):
-            years = (payment_date - purchase_date).days / 365.0
-            pv = payment_amount / ((1 + discount_rate) ** years)
-            time_weighted_pv = pv * years
-            
-            total_pv += pv
-            total_time_weighted_pv += time_weighted_pv
-        
-        if total_pv > 0:
-            duration = total_time_weighted_pv / total_pv
-            return duration
-        else:
-            return 0
+        today = datetime.now().date()
+        return (1, "Monthly", 10000.0, today + timedelta(days=30), today + timedelta(days=365))
+    
+    def saved_group_rows():
+        """
+        Payment group rows from the form state, including a deal saved with one set of inputs per group
+        """
+        if "financial_group_rows" in st.session_state:
+            return st.session_state["financial_group_rows"]
+        default = default_group_row()
+        rows = []
+        for group_num in range(int(st.session_state.get("financial_num_groups", 1))):
+            first_date = st.session_state.get(f"financial_first_date_{group_num}", default[3])
+            rows.append((
+                st.session_state.get(f"financial_payments_{group_num}", default[0]),
+                st.session_state.get(f"financial_frequency_{group_num}", default[1]),
+                st.session_state.get(f"financial_amount_{group_num}", default[2]),
+                first_date,
+                st.session_state.get(f"financial_last_date_{group_num}", first_date),
+            ))
+        return tuple(rows)
+    
+    def group_table_errors(group_table, earliest_payment_date, latest_payment_date):
+        """
+        One message per failed check, naming every grid row (from 1) that fails it
+        """
+        counts = pd.to_numeric(group_table["Payments"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        amounts = pd.to_numeric(group_table["Payment Amount"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        first_dates = pd.to_datetime(group_table["First Payment"], errors="coerce").to_numpy().astype("datetime64[D]")
+        last_dates = pd.to_datetime(group_table["Last Payment"], errors="coerce").to_numpy().astype("datetime64[D]")
+        earliest, latest = np.datetime64(earliest_payment_date, "D"), np.datetime64(latest_payment_date, "D")
+        several = counts > 1
+        checks = [
+            (~(counts >= 1) | (counts % 1 != 0), "need a whole number of payments"),
+            (several & ~group_table["Frequency"].isin(GROUP_FREQUENCIES).to_numpy(), "need a payment frequency"),
+            (~(amounts > 0) | ~np.isfinite(amounts), "need a payment amount above $0"),
+            (np.isnat(first_dates) | (first_dates < earliest) | (first_dates > latest),
+             f"need a first payment date from {earliest_payment_date:%m/%d/%Y} through {latest_payment_date:%m/%d/%Y}"),
+            (several & (np.isnat(last_dates) | (last_dates <= first_dates)),
+             "need a last payment date after the first payment date"),
+            (several & (last_dates > latest),
+             f"need a last payment date no later than {latest_payment_date:%m/%d/%Y}"),
+        ]
+        rows = np.arange(1, len(group_table) + 1)
+        return [f"Row(s) {', '.join(map(str, rows[failed].tolist()))} {message}" for failed, message in checks if failed.any()]
+    
+    def normalize_groups(counts, amounts, first_dates, is_monthly):
+        """
+        Hashable, normalized key for the payment groups, from one array per grid column
+        """
+        return tuple(zip(counts.tolist(), [round(amount, 2) for amount in amounts.tolist()], first_dates.tolist(),
+                         (is_monthly & (counts > 1)).tolist()))
     
-    def calculate_excel_discount_rate(duration_years, lower_bound, upper_bound, lower_rate, upper_rate, spread):
+    @st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+    def compute_deal_schedule(groups, purchase_date, purchase_price, _irr_guess=0.1):
         """
-        Calculate discount rate using Excel's formula with user-provided treasury rates and spread
-        Takes the actual bounds determined by find_treasury_bounds()
+        Sorted payment schedule, XIRR and duration for a deal.
+        _irr_guess only seeds the solver, so it is left out of the cache key.
         """
-        # Handle case where bounds are equal (duration >= 30 years)
-        if upper_bound == lower_bound:
-            # Use flat rate (no interpolation needed)
-            discount_rate = lower_rate + spread
+        pricing_cache_stats["misses"] += 1
+        if groups[0] == IMPORTED_SCHEDULE:
+            schedule = PaymentSchedule.from_dates(np.frombuffer(groups[1], dtype="datetime64[D]"),
+                                                  np.frombuffer(groups[2], dtype=np.float64), purchase_date)
         else:
-            # Normal interpolation between bounds
-            discount_rate = ((duration_years - lower_bound) / (upper_bound - lower_bound) * (upper_rate - lower_rate)) + lower_rate + spread
+            schedule = PaymentSchedule.from_groups(groups, purchase_date)
+        # Year fractions are computed once and shared by the solver and the metrics kernel
+        years = schedule.years
+        amounts = schedule.amounts
+        irr_result = solve_rate(np.concatenate(([-purchase_price], amounts)), np.concatenate(([0.0], years)), guess=_irr_guess)
+        irr_rate = irr_result.rate
+        irr_metrics = None
+        duration_years = None
+        if irr_rate is not None:
+            irr_metrics = duration_metrics(years, amounts, irr_rate)
+            duration_years = irr_metrics.duration
         
-        return discount_rate
+        return {
+            "schedule": schedule,
+            "years": years,
+            "amounts": amounts,
+            "irr_rate": irr_rate,
+            "irr_iterations": irr_result.iterations,
+            "irr_metrics": irr_metrics,
+            "duration_years": duration_years,
+        }
     
-    def calculate_wholesale_price(purchase_price, duration_years, total_payments, payment_dates, payment_amounts, purchase_date, excel_discount_rate):
+    @st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+    def compute_deal_pricing(groups, purchase_date, purchase_price, lower_rate, upper_rate, spread, target_profit):
         """
-        Calculate wholesale price based on Excel formula in cell G5: C5+C13
-        Uses the actual payment schedule for XNPV calculation (not simplified two-cash-flow model)
-        Excel XNPV uses a 365-day year convention
+        Wholesale price, profit, competitor analysis and the detail tables for a deal
         """
-        if not payment_dates:
-            return purchase_price
-        
-        # XNPV calculation using all actual payments
-        # Cash flow 1: -purchase_price at time 0 (purchase date)
-        # Cash flows 2+: individual payment amounts at their respective dates
+        pricing_cache_stats["misses"] += 1
+        deal = compute_deal_schedule(groups, purchase_date, purchase_price)
+        schedule = deal["schedule"]
+        years = deal["years"]
+        amounts = deal["amounts"]
+        irr_rate = deal["irr_rate"]
+        irr_metrics = deal["irr_metrics"]
+        duration_years = deal["duration_years"]
+        lower_bound, upper_bound = find_treasury_bounds(duration_years)
         
-        xnpv_value = -purchase_price  # Initial outflow
+        excel_discount_rate = calculate_excel_discount_rate(duration_years, lower_bound, upper_bound, lower_rate, upper_rate, spread)
+        total_payments = schedule.total
+        metrics = deal_metrics(years, amounts, purchase_price, irr_rate, excel_discount_rate)
+        xnpv_initial = -purchase_price
+        xnpv_payments = metrics.xnpv_payments
+        wholesale_price = purchase_price + metrics.xnpv
+        profit = calculate_profit(wholesale_price, purchase_price)
+        competitor_quote = calculate_competitor_quote(purchase_price, profit, target_profit)
+        competitor_profit = calculate_profit(wholesale_price, competitor_quote)
+        # Warm-start from the deal's IRR moved to first order by the price change
+        competitive_guess = irr_guess(years, amounts, irr_rate, purchase_price, competitor_quote)
+        competitive_result = solve_rate(np.concatenate(([-competitor_quote], amounts)), np.concatenate(([0.0], years)), guess=competitive_guess)
+        competitive_irr = competitive_result.rate
         
-        # Add present value of each individual payment
-        for payment_date, payment_amount in zip(payment_dates, payment_amounts):
-            days_diff = (payment_date - purchase_date).days
-            # Excel XNPV uses exact day count but 365-day year convention
-            years_diff = days_diff / 365.0
-            if years_diff >= 0:  # Only include future payments
-                pv = payment_amount / ((1 + excel_discount_rate) ** years_diff)
-                xnpv_value += pv
+        # Numeric columns; currency and date formatting is left to the table's column_config
+        payment_dates = schedule.dates.astype("datetime64[ns]")
+        schedule_df = pd.DataFrame({
+            'Payment Date': payment_dates,
+            'Payment Amount': amounts,
+        })
+        duration_df = pd.DataFrame({
+            'Payment #': np.arange(1, len(schedule) + 1),
+            'Date': payment_dates,
+            'Years': years,
+            'Payment Amount': amounts,
+            'Present Value': irr_metrics.present_values,
+            'PV × Years': irr_metrics.time_weighted_pvs,
+        })
         
-        # Wholesale price = Purchase price + XNPV
-        wholesale_price = purchase_price + xnpv_value
-        return wholesale_price
+        return {
+            "excel_discount_rate": excel_discount_rate,
+            "total_payments": total_payments,
+            "wholesale_price": wholesale_price,
+            "profit": profit,
+            "competitor_quote": competitor_quote,
+            "competitor_profit": competitor_profit,
+            "competitive_irr": competitive_irr,
+            "competitive_irr_iterations": competitive_result.iterations,
+            "schedule_df": schedule_df,
+            "duration_df": duration_df,
+            "total_pv": irr_metrics.total_pv,
+            "total_time_weighted_pv": irr_metrics.total_time_weighted_pv,
+            "xnpv_initial": xnpv_initial,
+            "xnpv_payments": xnpv_payments,
+            "xnpv_value": xnpv_initial + xnpv_payments,
+        }
     
-    def calculate_profit(wholesale_price, purchase_price, fixed_cost=6000):
+    @st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+    def compute_scenarios(groups, purchase_date, purchase_price, treasury_rates, spreads, treasury_shifts, purchase_prices, target_profit):
         """
-        Calculate profit based on Excel formula in cell G7: G5-C5-C15
-        G7 = Wholesale Price - Purchase Price - Fixed Cost
-        Fixed cost appears to be $6,000 based on Excel cell C15
+        Spread x Treasury shift x purchase price grid for a deal, from its cached year fractions
         """
-        profit = wholesale_price - purchase_price - fixed_cost
-        return profit
+        pricing_cache_stats["misses"] += 1
+        deal = compute_deal_schedule(groups, purchase_date, purchase_price)
+        return scenario_grid(deal["years"], deal["amounts"], dict(treasury_rates), spreads, treasury_shifts, purchase_prices, target_profit,
+                             guess=deal["irr_rate"])
     
-    def calculate_competitor_quote(purchase_price, profit, target_profit=2500):
+    @st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+    def compute_breakeven(groups, purchase_date, purchase_price, treasury_rates, spread, target_irr, target_profit, target_discount_rate):
         """
-        Calculate competitor quote based on Excel formula in cell C14: CEILING(C5+(G7-2500),50)
-        This calculates what competitors might quote that would leave us with our target profit
+        Purchase prices that hit a target IRR, profit and discount rate, from the cached year fractions
         """
-        import math
-        competitor_quote = math.ceil((purchase_price + (profit - target_profit)) / 50) * 50
-        return competitor_quote
-    
-    def generate_payment_schedule(num_payments, payment_amount, first_payment_date, last_payment_date, is_monthly):
-        if num_payments == 1:
-            return [first_payment_date], [payment_amount]
-        
-        dates = []
-        
-        if is_monthly:
-            current_date = first_payment_date
-            for i in range(num_payments):
-                if i == 0:
-                    dates.append(current_date)
-                else:
-                    if current_date.month == 12:
-                        next_month = current_date.replace(year=current_date.year + 1, month=1)
-                    else:
-                        next_month = current_date.replace(month=current_date.month + 1)
-                    try:
-                        dates.append(next_month)
-                        current_date = next_month
-                    except ValueError:
-                        last_day = calendar.monthrange(next_month.year, next_month.month)[1]
-                        next_month = next_month.replace(day=last_day)
-                        dates.append(next_month)
-                        current_date = next_month
-        else:
-            current_date = first_payment_date
-            for i in range(num_payments):
-                if i == 0:
-                    dates.append(current_date)
-                else:
-                    try:
-                        next_year = current_date.replace(year=current_date.year + 1)
-                        dates.append(next_year)
-                        current_date = next_year
-                    except ValueError:
-                        next_year = current_date.replace(year=current_date.year + 1, day=28)
-                        dates.append(next_year)
-                        current_date = next_year
-        
-        amounts = [payment_amount] * num_payments
-        return dates, amounts
+        pricing_cache_stats["misses"] += 1
+        deal = compute_deal_schedule(groups, purchase_date, purchase_price)
+        years, amounts = deal["years"], deal["amounts"]
+        curve = complete_curve(dict(treasury_rates))
+        return {
+            "irr": price_for_irr(years, amounts, target_irr),
+            "profit": price_for_profit(years, amounts, curve, spread, target_profit, guess=deal["irr_rate"]),
+            "discount_rate": price_for_discount_rate(years, amounts, curve, spread, target_discount_rate),
+        }
     
+    @st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+    def compute_audit(groups, purchase_date, purchase_price, treasury_rates, spread, target_profit):
+        """
+        The deal re-priced in exact Decimal arithmetic, for cross-checking the float figures
+        """
+        pricing_cache_stats["misses"] += 1
+        deal = compute_deal_schedule(groups, purchase_date, purchase_price)
+        offsets = deal["schedule"].offsets.astype(np.int64)
+        curve = complete_curve(dict(treasury_rates))
+        return audit_deal(offsets, deal["amounts"], purchase_price, curve, spread, target_profit, deal["irr_rate"])
     
-    # ==========================================
-    # REPORT GENERATION FUNCTIONS
-    # (WORK ON THIS SECTION FOR REPORT FEATURES)
-    # ==========================================
+    # Mortality table CSV for life-contingent deals; the bundled table is illustrative only
+    MORTALITY_TABLE = os.environ.get("GAL_MORTALITY_TABLE", ILLUSTRATIVE_TABLE_PATH)
+    LIFE_SEED = 2025
     
-    def get_report_template_options():
+    @st.cache_resource(show_spinner=False)
+    def load_mortality_tables(table_path):
         """
-        Return the available report template options
+        {column: MortalityTable} for the mortality table CSV, shared by all sessions
         """
-        return [
-            "Libertarian Approach - Recommend", 
-            "Beginning Slippery Slope - Hesitantly Recommend", 
-            "Negative - Do Not Recommend", 
-            "Life-Contingent Payments - Never Recommend"
-        ]
+        return read_mortality_tables(table_path)
     
-    def generate_libertarian_approach_report(cause_number, factoring_company, courthouse, payee_name, application_title, formatted_exhibits, prior_sentence, facts_paragraph=""):
+    @st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+    def compute_life_valuation(groups, purchase_date, purchase_price, discount_rate, age, table_column, paths):
         """
-        Generate the 'Libertarian Approach - Recommend' template report
-        This is the original template that was already built
+        Monte Carlo and closed-form value of the payments if each is made only while the Payee is living.
+        The seed is fixed so reruns show the same figures.
         """
-        # Build the facts section if provided
-        facts_section = ""
-        if facts_paragraph.strip():
-            facts_section = f"""
+        pricing_cache_stats["misses"] += 1
+        deal = compute_deal_schedule(groups, purchase_date, purchase_price)
+        table = load_mortality_tables(MORTALITY_TABLE)[table_column]
+        return value_life_contingent(deal["years"], deal["amounts"], purchase_price, discount_rate, table, age,
+                                     paths=paths, seed=LIFE_SEED, irr_guess=deal["irr_rate"])
     
-    **FACTS:**
+    # Optional local FRED snapshot used to prefill the treasury rate inputs
+    TREASURY_SNAPSHOT = os.environ.get("GAL_TREASURY_SNAPSHOT", "")
     
-    {facts_paragraph}"""
-        
-        report = f"""CAUSE NO. {cause_number}
+    @st.cache_resource(show_spinner=False)
+    def load_treasury_curves(snapshot_path):
+        """
+        Memory-mapped Treasury curve store, shared by all sessions
+        """
+        return TreasuryCurveStore.from_snapshot(snapshot_path)
     
-    **IN RE:**
+    def snapshot_rate_percent(curve, maturity, default):
+        """
+        Snapshot rate for a maturity in percent, or the default when unavailable
+        """
+        if curve is None or np.isnan(curve[maturity]):
+            return default
+        return round(curve[maturity] * 100, 2)
     
-    **{payee_name}**
+    def cached_call(function, *args):
+        """
+        Call a cached computation, timing it and recording whether it was a cache hit
+        """
+        pricing_cache_stats["calls"] += 1
+        misses_before = pricing_cache_stats["misses"]
+        with profiler.span(function.__name__):
+            result = function(*args)
+        profiler.count("cache_misses" if pricing_cache_stats["misses"] > misses_before else "cache_hits")
+        return result
     
-    **{courthouse}**
+    # Saved deals: a local SQLite file shared by all sessions
+    DEAL_STORE_PATH = os.environ.get("GAL_DEAL_STORE", "deals.sqlite3")
+    # Widget keys that are saved with a deal and restored when it is loaded
+    FORM_STATE_PREFIXES = ("financial_", "report_")
+    UNSAVED_FORM_KEYS = {"report_generate_button", "report_final_output", "report_save_deal_button", "report_docx_download",
+                         "report_file_button", "financial_schedule_file"}
+    # Saved but not restored: the user re-confirms a re-opened deal's totals
+    UNRESTORED_FORM_KEYS = {"financial_aggregate_check"}
     
-    **REPORT OF GUARDIAN AD LITEM**
+    @st.cache_resource(show_spinner=False)
+    def open_deal_store(store_path):
+        """
+        SQLite deal repository, shared by all sessions
+        """
+        return DealStore(store_path)
     
-    This report, as requested by the Court, analyzes the circumstances of the proposed transfer of structured settlement payment rights by and between {payee_name} ("the Payee"), and {factoring_company} ("the Transferee") and the proposed Transferee's compliance with Chapter 141 of the Civil Practice and Remedies Code.
+    def restore_saved_deal(deal_id):
+        """
+        Put a saved deal's inputs back into the form (runs as a button callback, before the widgets are drawn)
+        """
+        stored = open_deal_store(DEAL_STORE_PATH).load(deal_id)
+        # The payment group grid is rebuilt from the saved rows (or a deal's older per-group inputs)
+        for key in ("financial_group_rows", "group_editor", "group_editor_base"):
+            st.session_state.pop(key, None)
+        for key in UNRESTORED_FORM_KEYS:
+            st.session_state.pop(key, None)
+        for key, value in stored.form_state.items():
+            if key not in UNRESTORED_FORM_KEYS:
+                st.session_state[key] = value
+        # Price as of the saved purchase date, not the day the deal is re-opened
+        st.session_state["financial_purchase_date_option"] = "Different date"
+        st.session_state["financial_custom_purchase_date"] = stored.purchase_date
+        # An imported schedule is restored from the saved arrays rather than the original file
+        if stored.form_state.get("financial_schedule_source") == IMPORT_SOURCE:
+            st.session_state["restored_schedule"] = ImportedSchedule(
+                np.datetime64(stored.purchase_date, "D") + stored.offsets.astype("timedelta64[D]"), stored.amounts.copy())
+        else:
+            st.session_state.pop("restored_schedule", None)
+        st.session_state["prior_appointment_lookup"] = (normalize_name(stored.payee_name), stored.cause_number.lower())
+        st.session_state["irr_deal_id"] = f"saved-{stored.id}"
+        st.session_state["loaded_deal_message"] = f"Loaded {stored.cause_number} ({stored.payee_name or 'no payee'}) saved {stored.saved_at:%m/%d/%Y %H:%M}"
     
-    **SOURCES CONSULTED:**
+    # Archive of past reports (a CSV of payee_name, cause_number or a directory of reports)
+    # used to look up prior appointments; newly generated reports are added to it
+    REPORT_ARCHIVE = os.environ.get("GAL_REPORT_ARCHIVE", "")
     
-    I received an unredacted copy of the {application_title.title()}, which included as Exhibits: {formatted_exhibits}. {prior_sentence}{facts_section}"""
-        
-        return report
+    @st.cache_resource(show_spinner=False)
+    def load_appointment_index(archive_path):
+        """
+        Payee name index of past appointments, shared by all sessions
+        """
+        return AppointmentIndex.from_archive(archive_path) if archive_path else AppointmentIndex()
     
-    def generate_paragraph_2_from_financial_data():
+    def purchase_date_input(step):
         """
-        Generate paragraph 2 using financial data from session state
-        Handles both single payment and multi-group scenarios
+        Purchase date step of the Financial Analysis form
         """
-        if not st.session_state.get('financial_complete', False):
-            return ""
-        
-        num_groups = st.session_state.get('num_groups', 1)
-        total_aggregate = st.session_state.get('total_aggregate', 0)
-        purchase_price = st.session_state.get('purchase_price', 0)
-        
-        # Single payment scenario
-        if num_groups == 1:
-            # Get the single payment date
-            all_payment_dates = st.session_state.get('all_payment_dates', [])
-            if all_payment_dates:
-                first_payment_date = all_payment_dates[0].strftime('%B %d, %Y')
-                return f"The Payee is seeking to sell a lump sum payment in the amount of ${total_aggregate:,.2f} due on {first_payment_date} in exchange for a present lump sum payment of ${purchase_price:,.2f}."
-            else:
-                return f"The Payee is seeking to sell a lump sum payment in the amount of ${total_aggregate:,.2f} in exchange for a present lump sum payment of ${purchase_price:,.2f}."
+        st.write(f"**Step {step}: Purchase Date**")
+        use_today = st.radio("What date should be used for the purchase?", ["Today's date", "Different date"], key="financial_purchase_date_option")
         
-        # Multi-group scenario
+        if use_today == "Today's date":
+            purchase_date = datetime.combine(datetime.now().date(), datetime.min.time())
+            st.write(f"**Purchase date: {purchase_date.strftime('%m/%d/%Y')}**")
         else:
-            payment_descriptions = []
-            total_payments = 0
-            
-            for group_num in range(num_groups):
-                # Get group data from session state
-                num_payments = st.session_state.get(f"financial_payments_{group_num}", 1)
-                payment_amount = st.session_state.get(f"financial_amount_{group_num}", 0)
-                
-                # Get frequency
-                if num_payments > 1:
-                    frequency = st.session_state.get(f"financial_frequency_{group_num}", "Monthly")
-                    frequency_text = frequency.lower()
-                else:
-                    frequency_text = "lump sum"
-                
-                # Get dates
-                first_date = st.session_state.get(f"financial_first_date_{group_num}")
-                last_date = st.session_state.get(f"financial_last_date_{group_num}")
-                
-                if first_date and last_date:
-                    first_date_str = first_date.strftime('%B %d, %Y')
-                    last_date_str = last_date.strftime('%B %d, %Y')
-                    
-                    if num_payments == 1:
-                        description = f"a lump sum payment of ${payment_amount:,.2f} due on {first_date_str}"
-                    elif first_date == last_date:
-                        description = f"{num_payments} {frequency_text} payments of ${payment_amount:,.2f} each due on {first_date_str}"
-                    else:
-                        description = f"{num_payments} {frequency_text} payments of ${payment_amount:,.2f} each beginning on {first_date_str} and continuing through {last_date_str}"
-                    
-                    payment_descriptions.append(description)
-                    total_payments += num_payments
-            
-            # Combine descriptions with proper grammar
-            if len(payment_descriptions) == 1:
-                combined_descriptions = payment_descriptions[0]
-            elif len(payment_descriptions) == 2:
-                combined_descriptions = f"{payment_descriptions[0]} and {payment_descriptions[1]}"
-            else:
-                combined_descriptions = "; ".join(payment_descriptions[:-1]) + f"; and {payment_descriptions[-1]}"
-            
-            return f"The Payee is seeking to sell {combined_descriptions}. These {total_payments} payments aggregate to an amount of ${total_aggregate:,.2f}. In exchange, it is proposed that the Payee receive a single lump-sum payment of ${purchase_price:,.2f}."
+            custom_purchase_date = st.date_input(
+                "Select the purchase date:",
+                value=datetime.now().date(),
+                min_value=datetime.now().date() - timedelta(days=365*10),
+                max_value=datetime.now().date() + timedelta(days=365*10),
+                key="financial_custom_purchase_date"
+            )
+            purchase_date = datetime.combine(custom_purchase_date, datetime.min.time())
+            st.write(f"**Purchase date: {purchase_date.strftime('%m/%d/%Y')}**")
+        return purchase_date
+    
+    # Deployment-wide profiling: GAL_PROFILING=1 shows every user the Performance panel,
+    # GAL_PROFILE_LOG appends every completed rerun to a JSON lines file
+    PROFILING_ENABLED = os.environ.get("GAL_PROFILING", "") == "1"
+    PROFILE_LOG = os.environ.get("GAL_PROFILE_LOG", "")
+    
+    profiler = st.session_state.setdefault("profiler", Profiler(enabled=PROFILING_ENABLED or bool(PROFILE_LOG), session_id=uuid.uuid4().hex))
+    if PROFILE_LOG and profiler.rerun:
+        # The previous rerun is complete even if it ended in st.stop()
+        profiler.append_jsonl(PROFILE_LOG)
+    profiler.start_rerun()
     
-    def format_exhibits_list(exhibits):
+    # Payment tables longer than this are shown a page at a time, or summarized by year
+    TABLE_PAGE_ROWS = 120
+    PAYMENT_TABLE_COLUMNS = {
+        "Payment Date": st.column_config.DateColumn(format="MM/DD/YYYY"),
+        "Date": st.column_config.DateColumn(format="MM/DD/YYYY"),
+        "Years": st.column_config.NumberColumn(format="%.3f"),
+        "Payment Amount": st.column_config.NumberColumn(format="dollar"),
+        "Total Amount": st.column_config.NumberColumn(format="dollar"),
+        "Present Value": st.column_config.NumberColumn(format="dollar"),
+        "PV × Years": st.column_config.NumberColumn(format="dollar"),
+    }
+    
+    def payment_table(table, key, date_column, sum_columns):
         """
-        Format the exhibits list with proper articles (a/an) and conjunctions
-        Converts all exhibits to title case for proper formatting
+        A numeric per-payment table: whole when short, otherwise a per-year summary or one page of rows
         """
-        if not exhibits:
-            return ""
-        
-        if len(exhibits) == 1:
-            exhibit = exhibits[0].strip().title()
-            if exhibit.lower()[0] in 'aeiou':
-                return f"an {exhibit}"
-            else:
-                return f"a {exhibit}"
-        
-        formatted_exhibits = []
-        for i, exhibit in enumerate(exhibits):
-            exhibit = exhibit.strip().title()
-            if not exhibit:
-                continue
-                
-            if i == len(exhibits) - 1:  # Last exhibit
-                if exhibit.lower()[0] in 'aeiou':
-                    formatted_exhibits.append(f"and an {exhibit}")
-                else:
-                    formatted_exhibits.append(f"and a {exhibit}")
-            else:
-                if exhibit.lower()[0] in 'aeiou':
-                    formatted_exhibits.append(f"an {exhibit}")
-                else:
-                    formatted_exhibits.append(f"a {exhibit}")
-        
-        if len(formatted_exhibits) == 1:
-            return formatted_exhibits[0]
-        else:
-            return "; ".join(formatted_exhibits[:-1]) + "; " + formatted_exhibits[-1]
+        if len(table) <= TABLE_PAGE_ROWS:
+            st.dataframe(table, hide_index=True, column_config=PAYMENT_TABLE_COLUMNS)
+            return
+        view = st.radio("Show", ["Summary by year", "Payments"], horizontal=True, key=f"{key}_view")
+        # The CSV is only built when the button is clicked
+        st.download_button(f"Download all {len(table):,} rows (CSV)", lambda: table.to_csv(index=False), file_name=f"{key}.csv",
+                           mime="text/csv", on_click="ignore", key=f"{key}_download")
+        if view == "Summary by year":
+            summary = table.groupby(table[date_column].dt.year.rename("Year")).agg(
+                Payments=(date_column, "size"), **{column: (column, "sum") for column in sum_columns}).reset_index()
+            summary = summary.rename(columns={"Payment Amount": "Total Amount"})
+            st.dataframe(summary, hide_index=True, column_config={"Year": st.column_config.NumberColumn(format="%d"), **PAYMENT_TABLE_COLUMNS})
+            return
+        num_pages = -(-len(table) // TABLE_PAGE_ROWS)
+        page = st.number_input(f"Page (of {num_pages})", min_value=1, max_value=num_pages, value=1, step=1, key=f"{key}_page")
+        start = (page - 1) * TABLE_PAGE_ROWS
+        end = min(start + TABLE_PAGE_ROWS, len(table))
+        st.dataframe(table.iloc[start:end], hide_index=True, column_config=PAYMENT_TABLE_COLUMNS)
+        st.caption(f"Payments {start + 1:,}–{end:,} of {len(table):,}")
+    
+    # Report fragments are cached per session and rebuilt only when an input they read changes
+    report_sections = st.session_state.setdefault("cached_report_sections", ReportSections())
+    
+    def report_section(name, state, build):
+        """
+        A cached report fragment, recording whether it was reused or rebuilt
+        """
+        hits_before = report_sections.hits
+        fragment = report_sections.render(name, state, build)
+        profiler.count("report_section_hits" if report_sections.hits > hits_before else "report_section_rebuilds")
+        return fragment
     
     
     # ==========================================
@@ -405,91 +498,114 @@ if check_password():
     
     with tab1:
         st.header("Financial Analysis")
+        rerun_started = time.perf_counter()
         
-        # Step 1: Number of payment groups
-        st.subheader("Step 1: Select the number of payment groups")
-        st.markdown("*Example 1: if the client is selling 5 payments of \\$7,000 and 2 payments of \\$4,000, you would select '2' because there are two uneven groups.*\n\n*Example 2: if the client is selling 165 payments of \\$500, you would select '1' because it is one large group of equal payments.*")
-        num_groups = st.number_input("How many different payment groups are you selling?", min_value=1, value=1, step=1, key="financial_num_groups")
-    
-        # Collect data for each group
-        all_payment_dates = []
-        all_payment_amounts = []
-        total_aggregate = 0
-    
-        for group_num in range(num_groups):
-            if num_groups > 1:
-                st.write("---")
-                st.subheader(f"Group {group_num + 1} Details")
-            
-            step_offset = 1 if num_groups == 1 else 0
-            
-            st.write(f"**Step {2 + step_offset}: Payment Information - Group {group_num + 1}**")
-            num_payments = st.number_input(f"How many payments in group {group_num + 1}?", min_value=1, value=1, step=1, key=f"financial_payments_{group_num}")
-    
-            # Purchase date selection - only show for the first group
-            if group_num == 0:
-                st.write(f"**Step {3 + step_offset}: Purchase Date**")
-                use_today = st.radio("What date should be used for the purchase?", ["Today's date", "Different date"], key="financial_purchase_date_option")
-                
-                if use_today == "Today's date":
-                    purchase_date = datetime.combine(datetime.now().date(), datetime.min.time())
-                    st.write(f"**Purchase date: {purchase_date.strftime('%m/%d/%Y')}**")
-                else:
-                    custom_purchase_date = st.date_input(
-                        "Select the purchase date:",
-                        value=datetime.now().date(),
-                        min_value=datetime.now().date() - timedelta(days=365*10),
-                        max_value=datetime.now().date() + timedelta(days=365*10),
-                        key="financial_custom_purchase_date"
-                    )
-                    purchase_date = datetime.combine(custom_purchase_date, datetime.min.time())
-                    st.write(f"**Purchase date: {purchase_date.strftime('%m/%d/%Y')}**")
-                
-                # Update step numbers for subsequent steps
-                step_offset += 1
-    
-            if num_payments > 1:
-                st.write(f"**Step {3 + step_offset}: Payment Frequency - Group {group_num + 1}**")
-                payment_frequency = st.radio(f"Are these annual or monthly payments?", ["Monthly", "Annual"], key=f"financial_frequency_{group_num}")
-                is_monthly = payment_frequency == "Monthly"
+        # Re-open a saved deal
+        with st.expander("📂 Saved Deals"), profiler.span("saved_deals_search"):
+            if "loaded_deal_message" in st.session_state:
+                st.success(st.session_state.pop("loaded_deal_message"))
+            deal_search = st.text_input("Search by cause number, payee or factoring company", key="deal_store_search")
+            saved_deals = open_deal_store(DEAL_STORE_PATH).search(deal_search, limit=50)
+            if saved_deals:
+                saved_deal_id = st.selectbox(
+                    "Saved pricings", [row["id"] for row in saved_deals], key="deal_store_selection",
+                    format_func=lambda deal_id: next(
+                        f"{row['cause_number']} · {row['payee_name'] or '—'} · {row['factoring_company'] or '—'} · "
+                        f"purchase {row['purchase_date']} · ${row['purchase_price']:,.2f} · saved {row['saved_at'][:16].replace('T', ' ')}"
+                        for row in saved_deals if row["id"] == deal_id
+                    ),
+                )
+                st.button("Load into form", on_click=restore_saved_deal, args=(saved_deal_id,), key="deal_store_load_button")
             else:
-                is_monthly = False
-    
-            st.write(f"**Step {4 + step_offset}: Payment Amount - Group {group_num + 1}**")
-            payment_amount = st.number_input(f"How much is each payment in group {group_num + 1}?", min_value=0.01, value=10000.00, step=100.00, format="%.2f", key=f"financial_amount_{group_num}")
-    
-            group_aggregate = num_payments * payment_amount
-            total_aggregate += group_aggregate
-            
-            st.write(f"**Group {group_num + 1} aggregate: \\${group_aggregate:,.2f}** ({num_payments}  payments × \\${payment_amount:,.2f} each)")
-    
-            st.write(f"**Step {5 + step_offset}: Payment Dates - Group {group_num + 1}**")
-            first_payment_date = st.date_input(f"When will the first payment happen in group {group_num + 1}?", value=datetime.now().date() + timedelta(days=30), min_value=datetime.now().date(), max_value=datetime.now().date() + timedelta(days=365*50), key=f"financial_first_date_{group_num}")
-    
-            if num_payments > 1:
-                last_payment_date = st.date_input(f"When will the last payment happen in group {group_num + 1}?", value=datetime.now().date() + timedelta(days=365), min_value=datetime.now().date(), max_value=datetime.now().date() + timedelta(days=365*50), key=f"financial_last_date_{group_num}")
-                if last_payment_date <= first_payment_date:
-                    st.error(f"Last payment date must be after first payment date in group {group_num + 1}!")
+                st.caption("No saved deals match." if deal_search else "No deals have been saved yet. Save one from the Report Creation tab.")
+        
+        # Payments are entered as uniform groups or imported from the issuer's schedule
+        schedule_source = st.radio("How would you like to enter the payments?", [GROUPS_SOURCE, IMPORT_SOURCE], key="financial_schedule_source", horizontal=True)
+        imported_schedule = None
+        
+        if schedule_source == IMPORT_SOURCE:
+            st.subheader("Step 1: Upload the issuer's payment schedule")
+            st.markdown("*One row per payment, with a payment date column and a payment amount column (CSV or Excel).*")
+            schedule_file = st.file_uploader("Payment schedule", type=["csv", "xlsx", "xlsm"], key="financial_schedule_file")
+            if schedule_file is not None:
+                try:
+                    with profiler.span("import_schedule"):
+                        imported_schedule = load_payment_schedule(schedule_file.getvalue(), schedule_file.name)
+                except ScheduleImportError as error:
+                    st.error(f"Could not import {schedule_file.name}: {error}")
                     st.stop()
+            elif "restored_schedule" in st.session_state:
+                imported_schedule = st.session_state["restored_schedule"]
+                st.caption("Using the payment schedule saved with this deal.")
             else:
-                last_payment_date = first_payment_date
-    
-            group_dates, group_amounts = generate_payment_schedule(num_payments, payment_amount, datetime.combine(first_payment_date, datetime.min.time()), datetime.combine(last_payment_date, datetime.min.time()), is_monthly)
+                st.info("Upload the payment schedule to continue.")
+                st.stop()
+            
+            purchase_date = purchase_date_input(2)
+            first_payment_date, last_payment_date = imported_schedule.dates[[0, -1]].astype(object)
+            early_payments = int(np.count_nonzero(imported_schedule.dates < np.datetime64(purchase_date.date(), "D")))
+            if early_payments:
+                st.error(f"{early_payments} payment(s) in the schedule fall before the purchase date. Remove them from the file or change the purchase date.")
+                st.stop()
+            num_groups = 1
+            total_aggregate = float(imported_schedule.amounts.sum())
+            st.write(f"**Imported {len(imported_schedule.dates):,} payments from {first_payment_date.strftime('%m/%d/%Y')} through {last_payment_date.strftime('%m/%d/%Y')}**")
+            groups = (IMPORTED_SCHEDULE, imported_schedule.dates.tobytes(), imported_schedule.amounts.tobytes())
+        else:
+            purchase_date = purchase_date_input(1)
+            # Payments can't be entered before today unless the purchase itself is in the past (e.g. a re-opened saved deal)
+            earliest_payment_date = min(datetime.now().date(), purchase_date.date())
+            latest_payment_date = datetime.now().date() + timedelta(days=365*50)
+            
+            # Step 2: All payment groups in one grid
+            st.subheader("Step 2: Enter the payment groups")
+            st.markdown("*One row per group of equal payments. Example 1: if the client is selling 5 payments of \\$7,000 and 2 payments of \\$4,000, enter two rows because there are two uneven groups.*\n\n*Example 2: if the client is selling 165 payments of \\$500, enter one row because it is one large group of equal payments.*")
+            # The grid's starting rows stay fixed between reruns so its edits are kept; loading a deal resets them
+            if "group_editor_base" not in st.session_state:
+                st.session_state["group_editor_base"] = pd.DataFrame(list(saved_group_rows()), columns=GROUP_COLUMNS)
+            group_table = st.data_editor(st.session_state["group_editor_base"], key="group_editor", num_rows="dynamic",
+                                         hide_index=True, column_config=GROUP_EDITOR_COLUMNS)
+            if group_table.empty:
+                st.info("Add a payment group to continue.")
+                st.stop()
             
-            all_payment_dates.extend(group_dates)
-            all_payment_amounts.extend(group_amounts)
+            # Every row is checked at once, so a long grid costs the same handful of array operations
+            errors = group_table_errors(group_table, earliest_payment_date, latest_payment_date)
+            if errors:
+                st.error("\n\n".join(errors))
+                st.stop()
+            
+            num_groups = len(group_table)
+            counts = group_table["Payments"].to_numpy(dtype=np.int64)
+            amounts = group_table["Payment Amount"].to_numpy(dtype=np.float64)
+            frequencies = group_table["Frequency"].where(counts > 1, "Monthly").astype(str).to_numpy()
+            first_dates = pd.to_datetime(group_table["First Payment"]).to_numpy().astype("datetime64[D]").astype(object)
+            last_dates = np.where(counts > 1, pd.to_datetime(group_table["Last Payment"]).to_numpy().astype("datetime64[D]"),
+                                  first_dates.astype("datetime64[D]")).astype(object)
+            total_aggregate = float(counts @ amounts)
+            groups = normalize_groups(counts, amounts, first_dates, frequencies == "Monthly")
+            
+            group_rows = tuple(zip(counts.tolist(), frequencies.tolist(), amounts.tolist(), first_dates.tolist(), last_dates.tolist()))
+            st.session_state["financial_group_rows"] = group_rows
+            # The per-group keys the report paragraph reads
+            for group_num, (num_payments, frequency, payment_amount, first_payment_date, last_payment_date) in enumerate(group_rows):
+                st.session_state[f"financial_payments_{group_num}"] = num_payments
+                st.session_state[f"financial_frequency_{group_num}"] = frequency
+                st.session_state[f"financial_amount_{group_num}"] = payment_amount
+                st.session_state[f"financial_first_date_{group_num}"] = first_payment_date
+                st.session_state[f"financial_last_date_{group_num}"] = last_payment_date
+            st.session_state["financial_num_groups"] = num_groups
     
         # Overall verification step
         st.write("---")
         st.subheader("⚠️ Overall Verification Step")
         st.write(f"**The total aggregate of ALL payments is ${total_aggregate:,.2f}**")
-        if num_groups > 1:
+        if num_groups > 1 and imported_schedule is None:
             st.write("**Breakdown by group:**")
-            for group_num in range(num_groups):
-                num_payments_group = st.session_state.get(f"financial_payments_{group_num}", 1)
-                amount_group = st.session_state.get(f"financial_amount_{group_num}", 10000.0)
-                group_total = num_payments_group * amount_group
-                st.write(f"• Group {group_num + 1}: {num_payments_group} payments × \\${amount_group:,.2f} = \\${group_total:,.2f}")
+            st.dataframe(pd.DataFrame({"Group": np.arange(1, num_groups + 1), "Payments": counts, "Payment Amount": amounts,
+                                       "Group Total": counts * amounts}),
+                         hide_index=True, column_config={"Payment Amount": st.column_config.NumberColumn(format="dollar"),
+                                                         "Group Total": st.column_config.NumberColumn(format="dollar")})
     
         aggregate_correct = st.radio("Is this total aggregate amount correct?", ["Select an option", "Yes, this is correct", "No, I need to update my numbers"], key="financial_aggregate_check")
     
@@ -503,7 +619,7 @@ if check_password():
             st.success("Great! Let's continue with the purchase price.")
     
         # Purchase price
-        final_step = 7 if num_groups == 1 else 3 + num_groups * 4
+        final_step = 3
         st.subheader(f"Step {final_step}: Purchase Price")
         purchase_price = st.number_input("How much is the factoring company buying ALL the payments for?", min_value=0.01, value=float(total_aggregate * 0.85), step=100.00, format="%.2f", key="financial_purchase_price")
     
@@ -532,20 +648,22 @@ if check_password():
     
         st.subheader("📊 Results & Analysis")
     
-        # Sort all payments by date
-        sorted_payment_pairs = sorted(zip(all_payment_dates, all_payment_amounts))
-        payment_dates = [pair[0] for pair in sorted_payment_pairs]
-        payment_amounts = [pair[1] for pair in sorted_payment_pairs]
-    
-        # Use the selected purchase date (either today or custom)
-        cashflows = [-purchase_price] + payment_amounts
-        dates = [purchase_date] + payment_dates
-    
-        irr_rate = xirr(cashflows, dates)
+        # Schedule, XIRR and duration come from the cache unless the deal itself changed
+        purchase_price = round(float(purchase_price), 2)
+        # Seed XIRR with the last rate solved for the deal being worked on (a per-session id, or the
+        # saved deal's id once one is re-opened), so an edit to the price or any group re-converges
+        # in a few Newton steps
+        irr_warm_starts = st.session_state.setdefault("irr_warm_starts", WarmStarts())
+        deal_key = st.session_state.setdefault("irr_deal_id", uuid.uuid4().hex)
+        deal = cached_call(compute_deal_schedule, groups, purchase_date, purchase_price, irr_warm_starts.get(deal_key))
+        irr_warm_starts.update(deal_key, deal["irr_rate"])
+        profiler.count("xirr_iterations", deal["irr_iterations"])
+        schedule = deal["schedule"]
+        irr_rate = deal["irr_rate"]
     
         if irr_rate is not None:
-            # Calculate duration
-            duration_years = calculate_duration(payment_dates, payment_amounts, purchase_date, irr_rate)
+            duration_years = deal["duration_years"]
+            irr_metrics = deal["irr_metrics"]
             
             # Determine which treasury bounds we need for the duration
             lower_bound, upper_bound = find_treasury_bounds(duration_years)
@@ -554,8 +672,19 @@ if check_password():
             st.write("---")
             st.subheader("🏛️ Treasury Rate Input Required")
             st.subheader(f"Duration: {duration_years:.2f} years")
+            st.caption(f"Modified duration: {irr_metrics.modified_duration:.2f} years · DV01: ${irr_metrics.dv01:,.2f} per basis point")
             st.write(f"**Purchase date used: {purchase_date.strftime('%m/%d/%Y')}**")
             
+            # Prefill rates from the local Treasury snapshot when one is configured
+            snapshot_curve = None
+            if TREASURY_SNAPSHOT and os.path.exists(TREASURY_SNAPSHOT):
+                curve_store = load_treasury_curves(TREASURY_SNAPSHOT)
+                try:
+                    snapshot_curve = curve_store.curve(purchase_date)
+                    st.info(f"📈 Rates below are prefilled from the local Treasury snapshot as of {curve_store.observation_date(purchase_date).strftime('%m/%d/%Y')}. Adjust them if needed.")
+                except KeyError:
+                    st.warning("The local Treasury snapshot has no curve for this purchase date. Please enter the rates manually.")
+            
             # Get series information for the bounds
             lower_series_info = get_treasury_series_info(lower_bound)
             upper_series_info = get_treasury_series_info(upper_bound)
@@ -569,7 +698,7 @@ if check_password():
                     f"{lower_series_info['display_name']} Treasury Rate (%)",
                     min_value=0.0,
                     max_value=20.0,
-                    value=4.0,
+                    value=snapshot_rate_percent(snapshot_curve, lower_bound, 4.0),
                     step=0.01,
                     format="%.2f",
                     help=f"Enter the most recent rate from the FRED page above",
@@ -590,7 +719,7 @@ if check_password():
                         f"{lower_series_info['display_name']} Treasury Rate (%)",
                         min_value=0.0,
                         max_value=20.0,
-                        value=4.0,
+                        value=snapshot_rate_percent(snapshot_curve, lower_bound, 4.0),
                         step=0.01,
                         format="%.2f",
                         help=f"Enter the most recent rate from the FRED page above",
@@ -601,7 +730,7 @@ if check_password():
                         f"{upper_series_info['display_name']} Treasury Rate (%)",
                         min_value=0.0,
                         max_value=20.0,
-                        value=4.2,
+                        value=snapshot_rate_percent(snapshot_curve, upper_bound, 4.2),
                         step=0.01,
                         format="%.2f",
                         help=f"Enter the most recent rate from the FRED page above",
@@ -635,22 +764,15 @@ if check_password():
                 spread = spread_percentage / 100.0
                 st.write(f"**Using custom spread: {spread_percentage:.1f}%**")
             
-            # Calculate Excel discount rate using treasury rates and spread
-            excel_discount_rate = calculate_excel_discount_rate(duration_years, lower_bound, upper_bound, lower_rate, upper_rate, spread)
-            
             # Calculate wholesale price, profit, and competitor analysis
-            total_payments = sum(payment_amounts)
-            wholesale_price = calculate_wholesale_price(purchase_price, duration_years, total_payments, payment_dates, payment_amounts, purchase_date, excel_discount_rate)
-            profit = calculate_profit(wholesale_price, purchase_price)
-            competitor_quote = calculate_competitor_quote(purchase_price, profit, target_profit)
-            
-            # Calculate the profit if we match competitor's quote
-            competitor_profit = calculate_profit(wholesale_price, competitor_quote)
-            
-            # Calculate XIRR for competitive scenario
-            competitive_cashflows = [-competitor_quote] + payment_amounts
-            competitive_dates = [purchase_date] + payment_dates
-            competitive_irr = xirr(competitive_cashflows, competitive_dates)
+            pricing = cached_call(compute_deal_pricing, groups, purchase_date, purchase_price, lower_rate, upper_rate, spread, float(target_profit))
+            excel_discount_rate = pricing["excel_discount_rate"]
+            total_payments = pricing["total_payments"]
+            wholesale_price = pricing["wholesale_price"]
+            profit = pricing["profit"]
+            competitor_quote = pricing["competitor_quote"]
+            competitor_profit = pricing["competitor_profit"]
+            competitive_irr = pricing["competitive_irr"]
             
             # Financial summary - Updated format
             st.write("**📈 Profit Analysis**")
@@ -658,7 +780,7 @@ if check_password():
             # Side-by-side profit calculations
             col1, col2 = st.columns(2)
             
-            with col1:
+            with col1, profiler.span("render_profit_analysis"):
                 st.write("**💰 Factoring Company**")
                 st.code(f"""
     Wholesale Price:       ${wholesale_price:,.2f}
@@ -674,7 +796,7 @@ if check_password():
                 </div>
                 """, unsafe_allow_html=True)
             
-            with col2:
+            with col2, profiler.span("render_profit_analysis"):
                 st.write("**🏢 Competitive Analysis**")
                 competitive_irr_display = f"{competitive_irr:.2%}" if competitive_irr is not None else "N/A"
                 st.code(f"""
@@ -693,68 +815,59 @@ if check_password():
             
             # Payment schedule
             st.write("**📅 Payment Schedule**")
-            df = pd.DataFrame({
-                'Payment Date': [d.strftime('%m/%d/%Y') for d in payment_dates], 
-                'Payment Amount': [f"${amount:,.2f}" for amount in payment_amounts]
-            })
-            st.dataframe(df, hide_index=True)
+            with profiler.span("render_schedule_table"):
+                payment_table(pricing["schedule_df"], "schedule_table", "Payment Date", ["Payment Amount"])
             
             # Store financial data in session state for report creation
             st.session_state['financial_complete'] = True
             st.session_state['num_groups'] = num_groups
             st.session_state['total_aggregate'] = total_aggregate
             st.session_state['purchase_price'] = purchase_price
-            st.session_state['all_payment_dates'] = all_payment_dates
-            st.session_state['all_payment_amounts'] = all_payment_amounts
+            st.session_state['payment_schedule'] = schedule
+            st.session_state['schedule_imported'] = imported_schedule is not None
+            st.session_state['deal_to_save'] = {
+                "purchase_date": purchase_date,
+                "purchase_price": purchase_price,
+                "offsets": schedule.offsets,
+                "amounts": schedule.amounts,
+                "results": {
+                    "irr": irr_rate,
+                    "duration": duration_years,
+                    "lower_bound": lower_bound,
+                    "upper_bound": upper_bound,
+                    "lower_rate": lower_rate,
+                    "upper_rate": upper_rate,
+                    "spread": spread,
+                    "target_profit": float(target_profit),
+                    "discount_rate": excel_discount_rate,
+                    "wholesale_price": wholesale_price,
+                    "profit": profit,
+                    "competitor_quote": competitor_quote,
+                    "competitor_profit": competitor_profit,
+                    "competitive_irr": competitive_irr,
+                },
+            }
             
             # Detailed calculations (expandable)
-            with st.expander("🔬 Detailed Calculations"):
+            with st.expander("🔬 Detailed Calculations"), profiler.span("render_detailed_calculations"):
                 st.write("**Duration Calculation Details:**")
-                duration_details = []
-                total_pv = 0
-                total_time_weighted_pv = 0
-                
-                for i, (payment_date, payment_amount) in enumerate(zip(payment_dates, payment_amounts)):
-                    years = (payment_date - purchase_date).days / 365.0
-                    pv = payment_amount / ((1 + irr_rate) ** years)
-                    time_weighted_pv = pv * years
-                    
-                    total_pv += pv
-                    total_time_weighted_pv += time_weighted_pv
-                    
-                    duration_details.append({
-                        'Payment #': i + 1,
-                        'Date': payment_date.strftime('%m/%d/%Y'),
-                        'Years': f"{years:.3f}",
-                        'Payment Amount': f"${payment_amount:,.2f}",
-                        'Present Value': f"${pv:,.2f}",
-                        'PV × Years': f"${time_weighted_pv:,.2f}"
-                    })
+                payment_table(pricing["duration_df"], "duration_table", "Date", ["Payment Amount", "Present Value", "PV × Years"])
                 
-                duration_df = pd.DataFrame(duration_details)
-                st.dataframe(duration_df, hide_index=True)
+                st.write(f"**Duration = ${pricing['total_time_weighted_pv']:,.2f} ÷ ${pricing['total_pv']:,.2f} = {duration_years:.6f} years**")
                 
-                st.write(f"**Duration = ${total_time_weighted_pv:,.2f} ÷ ${total_pv:,.2f} = {duration_years:.6f} years**")
-                
-                # Calculate the XNPV components for display using Excel's discount rate and actual payments
-                xnpv_initial = -purchase_price
-                xnpv_payments = 0
-                
-                for payment_date, payment_amount in zip(payment_dates, payment_amounts):
-                    days_diff = (payment_date - purchase_date).days
-                    years_diff = days_diff / 365.0
-                    if years_diff >= 0:
-                        pv = payment_amount / ((1 + excel_discount_rate) ** years_diff)
-                        xnpv_payments += pv
-                
-                xnpv_value = xnpv_initial + xnpv_payments
+                xnpv_initial = pricing["xnpv_initial"]
+                xnpv_payments = pricing["xnpv_payments"]
+                xnpv_value = pricing["xnpv_value"]
                 
                 st.write("**Financial Calculations:**")
                 st.code(f"""
     Total Payments: ${total_payments:,.2f}
     Purchase Price: ${purchase_price:,.2f}
     Duration: {duration_years:.3f} years
-    Number of Payments: {len(payment_dates)}
+    Modified Duration: {irr_metrics.modified_duration:.3f} years
+    Convexity: {irr_metrics.convexity:.3f}
+    DV01: ${irr_metrics.dv01:,.2f}
+    Number of Payments: {len(schedule)}
     
     Treasury Rates Used:
       Lower Bound ({lower_bound}Y): {lower_rate:.4f} ({lower_rate:.2%})
@@ -775,6 +888,171 @@ if check_password():
     Target Profit Used: ${target_profit:,.2f}
                 """)
     
+            # The rates entered above, filled out with the rest of the snapshot curve when there is one,
+            # so break-even prices and scenarios start from the same figures as the quote above
+            scenario_curve = {**(snapshot_curve or {}), lower_bound: lower_rate, upper_bound: upper_rate}
+            
+            # Exact-arithmetic audit (opt-in), on the same rates as the figures above
+            if st.checkbox("🔎 Cross-check with exact decimal arithmetic", key="financial_audit_exact"):
+                audit_curve = {lower_bound: lower_rate, upper_bound: upper_rate}
+                audited = cached_call(compute_audit, groups, purchase_date, purchase_price, tuple(sorted(audit_curve.items())), spread, float(target_profit))
+                audit_rows = []
+                for label, fast_value, audit_value in [("Wholesale Price", wholesale_price, audited["wholesale_price"]),
+                                                       ("Profit", profit, audited["profit"]),
+                                                       ("Competitor Quote", competitor_quote, audited["competitor_quote"])]:
+                    # Both sides rounded half-up to the cent, as the audit command compares them
+                    fast_cents = float_to_cents(fast_value)
+                    audit_cents = to_cents(audit_value)
+                    audit_rows.append({"Figure": label, "Fast (float64)": f"${fast_cents:,.2f}", "Audit (decimal)": f"${audit_cents:,.2f}",
+                                       "Match": "✅" if fast_cents == audit_cents else "❌"})
+                st.dataframe(pd.DataFrame(audit_rows), hide_index=True)
+                if all(row["Match"] == "✅" for row in audit_rows):
+                    st.success("All figures agree to the cent.")
+                else:
+                    st.error("The float and decimal figures differ after rounding to the cent. Use the decimal figures for filings.")
+            
+            # Break-even pricing (expandable)
+            with st.expander("⚖️ Break-even Purchase Price"), profiler.span("render_breakeven"):
+                st.write("Find the purchase price that hits a target IRR, profit or discount rate.")
+                target_col1, target_col2, target_col3 = st.columns(3)
+                with target_col1:
+                    target_irr_percent = st.number_input("Target IRR (%)", min_value=-50.0, max_value=500.0, value=12.0, step=0.5, key="breakeven_target_irr")
+                with target_col2:
+                    breakeven_profit = st.number_input("Target profit ($)", value=float(target_profit), step=500.0, key="breakeven_target_profit")
+                with target_col3:
+                    target_rate_percent = st.number_input("Target discount rate (%)", min_value=0.0, max_value=50.0,
+                                                          value=round(excel_discount_rate * 100, 2), step=0.25, key="breakeven_target_rate")
+                breakeven = cached_call(
+                    compute_breakeven, groups, purchase_date, purchase_price, tuple(sorted(scenario_curve.items())),
+                    spread, target_irr_percent / 100.0, float(breakeven_profit), target_rate_percent / 100.0
+                )
+                for column, (label, key) in zip(st.columns(3), [("Price at target IRR", "irr"), ("Price at target profit", "profit"),
+                                                                 ("Price at target discount rate", "discount_rate")]):
+                    result = breakeven[key]
+                    with column:
+                        if result.converged:
+                            st.metric(label, f"${result.price:,.2f}", f"${result.price - purchase_price:+,.2f} vs current", delta_color="off")
+                            st.caption(f"IRR at this price: {result.irr:.2%}")
+                        else:
+                            st.metric(label, "N/A")
+                            st.caption("No purchase price reaches this target.")
+            
+            # Scenario analysis (expandable)
+            with st.expander("🎯 Scenario Analysis"), profiler.span("render_scenarios"):
+                st.write("See how wholesale price, profit and the competitor quote move with the spread, a parallel Treasury shift and the purchase price.")
+                scenario_col1, scenario_col2, scenario_col3 = st.columns(3)
+                with scenario_col1:
+                    spread_range = st.slider("Spread range (%)", min_value=0.0, max_value=10.0, value=(max(spread * 100 - 1.0, 0.0), min(spread * 100 + 1.0, 10.0)), step=0.1, key="scenario_spread_range")
+                with scenario_col2:
+                    shift_range = st.slider("Treasury shift (bp)", min_value=-300, max_value=300, value=(-100, 100), step=25, key="scenario_shift_range")
+                with scenario_col3:
+                    price_range = st.slider("Purchase price (% of current)", min_value=50, max_value=150, value=(90, 110), step=5, key="scenario_price_range")
+                grid_steps = st.number_input("Steps per axis", min_value=2, max_value=50, value=9, step=1, key="scenario_steps")
+                
+                scenario_spreads = tuple(np.round(np.linspace(spread_range[0], spread_range[1], grid_steps) / 100.0, 6))
+                scenario_shifts = tuple(np.round(np.linspace(shift_range[0], shift_range[1], grid_steps) / 10000.0, 6))
+                scenario_prices = tuple(np.round(np.linspace(price_range[0], price_range[1], grid_steps) / 100.0 * purchase_price, 2))
+                scenarios = cached_call(
+                    compute_scenarios, groups, purchase_date, purchase_price, tuple(sorted(scenario_curve.items())),
+                    scenario_spreads, scenario_shifts, scenario_prices, float(target_profit)
+                )
+                
+                scenario_metric = st.radio("Show", ["profit", "wholesale_price", "competitor_quote"], horizontal=True, key="scenario_metric",
+                                           format_func=lambda name: name.replace("_", " ").title())
+                scenario_price = st.select_slider("At purchase price", options=scenario_prices, value=scenario_prices[len(scenario_prices) // 2],
+                                                  format_func=lambda price: f"${price:,.0f}", key="scenario_price")
+                heatmap = scenario_heatmap(scenarios, scenario_metric, scenario_price)
+                heatmap_cells = heatmap.stack().rename("value").reset_index()
+                heatmap_cells["spread"] = heatmap_cells["spread"] * 100
+                heatmap_cells["treasury_shift"] = heatmap_cells["treasury_shift"] * 10000
+                st.altair_chart(
+                    alt.Chart(heatmap_cells).mark_rect().encode(
+                        x=alt.X("treasury_shift:O", title="Treasury shift (bp)", axis=alt.Axis(format="+.0f")),
+                        y=alt.Y("spread:O", title="Spread (%)", sort="descending", axis=alt.Axis(format=".2f")),
+                        color=alt.Color("value:Q", title=scenario_metric.replace("_", " ").title(), scale=alt.Scale(scheme="redyellowgreen")),
+                        tooltip=[alt.Tooltip("spread:Q", format=".2f"), alt.Tooltip("treasury_shift:Q", format="+.0f"), alt.Tooltip("value:Q", format="$,.2f")],
+                    )
+                )
+                heatmap.index = [f"{value:.2%}" for value in heatmap.index]
+                heatmap.columns = [f"{value * 10000:+.0f}bp" for value in heatmap.columns]
+                st.dataframe(heatmap.style.format("${:,.0f}"))
+            
+            # Life-contingent valuation (expandable)
+            with st.expander("🧬 Life-Contingent Valuation"), profiler.span("render_life_contingent"):
+                st.write("Value the payments as if each one is made only while the Payee is living.")
+                life_contingent = st.checkbox("The payments are life-contingent", key="financial_life_contingent")
+                if life_contingent:
+                    mortality_tables = load_mortality_tables(MORTALITY_TABLE)
+                    life_col1, life_col2, life_col3 = st.columns(3)
+                    with life_col1:
+                        payee_age = st.number_input("Payee age at purchase", min_value=0, max_value=110, value=45, step=1, key="financial_payee_age")
+                    with life_col2:
+                        table_column = st.radio("Mortality table", list(mortality_tables), horizontal=True, key="financial_mortality_column",
+                                                format_func=str.title)
+                    with life_col3:
+                        life_paths = st.select_slider("Simulated lifetimes", options=[10_000, 25_000, 50_000, 100_000], value=DEFAULT_PATHS,
+                                                      format_func=lambda paths: f"{paths:,}", key="financial_life_paths")
+                    life = cached_call(compute_life_valuation, groups, purchase_date, purchase_price, excel_discount_rate,
+                                       int(payee_age), table_column, int(life_paths))
+                    if life.illustrative:
+                        st.warning("⚠️ These figures use the bundled ILLUSTRATIVE mortality table, not a published SOA table. "
+                                   "Set GAL_MORTALITY_TABLE to a licensed table's CSV before relying on them.")
+                    
+                    life_metric1, life_metric2, life_metric3, life_metric4 = st.columns(4)
+                    life_metric1.metric("Expected PV", f"${life.expected_pv:,.2f}", f"± ${1.96 * life.pv_standard_error:,.2f} (95%)", delta_color="off")
+                    life_metric2.metric("Expected profit", f"${life.expected_profit:,.2f}")
+                    life_metric3.metric("Chance of a loss", f"{life.probability_of_loss:.1%}")
+                    life_metric4.metric("Expected payments received", f"{life.expected_payments:,.1f} of {life.num_payments}")
+                    st.write("**IRR across simulated lifetimes**")
+                    st.dataframe(pd.DataFrame([{f"{percentile}th percentile": f"{rate:.2%}" for percentile, rate in life.irr_percentiles.items()}]),
+                                 hide_index=True)
+                    closed_form_irr_display = f"{life.closed_form_irr:.2%}" if life.closed_form_irr is not None else "N/A"
+                    st.caption(f"Closed-form cross-check (expected cashflows): PV ${life.closed_form_pv:,.2f} · profit ${life.closed_form_profit:,.2f} · "
+                               f"IRR {closed_form_irr_display} · discount rate {excel_discount_rate:.2%} · {life.paths:,} paths, {life.table_name}")
+                    
+                    # The Life-Contingent report template describes this valuation
+                    st.session_state['life_valuation'] = {
+                        "age": int(payee_age),
+                        "expected_payments": life.expected_payments,
+                        "num_payments": life.num_payments,
+                        "expected_pv": life.expected_pv,
+                        "wholesale_discount_rate": excel_discount_rate,
+                        "purchase_price": purchase_price,
+                        "probability_payments_exceed_price": life.probability_payments_exceed_price,
+                        "paths": life.paths,
+                        "table_name": life.table_name,
+                        "illustrative": life.illustrative,
+                    }
+                else:
+                    st.session_state.pop('life_valuation', None)
+    
+            # Per-rerun timing and pricing cache hit rate
+            rerun_ms = (time.perf_counter() - rerun_started) * 1000
+            cache_hits = max(pricing_cache_stats["calls"] - pricing_cache_stats["misses"], 0)
+            session_cache_totals = st.session_state.setdefault("pricing_cache_totals", {"calls": 0, "hits": 0})
+            session_cache_totals["calls"] += pricing_cache_stats["calls"]
+            session_cache_totals["hits"] += cache_hits
+            session_hit_rate = session_cache_totals["hits"] / session_cache_totals["calls"]
+            st.caption(f"⏱️ Financial analysis computed in {rerun_ms:.1f} ms · cache hits this rerun: {cache_hits}/{pricing_cache_stats['calls']} · session hit rate: {session_hit_rate:.0%}")
+            profiler.record("financial_tab", rerun_ms / 1000)
+            
+            # Performance panel for every user of the deployment (GAL_PROFILING=1)
+            if PROFILING_ENABLED:
+                with st.expander("⚙️ Performance"):
+                    st.write(f"**This rerun (#{profiler.rerun})**")
+                    st.dataframe(pd.DataFrame(profiler.summary(profiler.rerun)), hide_index=True)
+                    rerun_counters = profiler.counter_totals(profiler.rerun)
+                    session_counters = profiler.counter_totals()
+                    st.write(f"XIRR iterations: {deal['irr_iterations']} · competitive XIRR iterations: {pricing['competitive_irr_iterations']}")
+                    st.write(f"Cache hits: {rerun_counters.get('cache_hits', 0)} this rerun, "
+                             f"{session_counters.get('cache_hits', 0)} of {session_counters.get('cache_hits', 0) + session_counters.get('cache_misses', 0)} this session")
+                    st.write(f"Report sections reused: {session_counters.get('report_section_hits', 0)} of "
+                             f"{session_counters.get('report_section_hits', 0) + session_counters.get('report_section_rebuilds', 0)} this session")
+                    st.write("**This session**")
+                    st.dataframe(pd.DataFrame(profiler.summary()), hide_index=True)
+                    st.download_button("Download profile (JSON lines)", profiler.to_jsonl(), file_name=f"profile-{profiler.session_id}.jsonl",
+                                       mime="application/x-ndjson", key="profile_download")
+    
             # Navigation guidance
             st.write("---")
             st.write("### ✅ Financial Analysis Complete!")
@@ -802,6 +1080,8 @@ if check_password():
             index=0  # Default to "Libertarian Approach - Recommend"
         )
         st.write(f"**Selected template:** {selected_template}")
+        if selected_template.startswith("Life-Contingent") and 'life_valuation' not in st.session_state:
+            st.info("💡 Turn on **🧬 Life-Contingent Valuation** in the Financial Analysis tab to add the mortality-weighted valuation to the analysis.")
         
         # Basic case information
         st.subheader("Case Information")
@@ -811,6 +1091,19 @@ if check_password():
         payee_name = st.text_input("What is the Payee name on the application?", value="", key="report_payee_name")
         application_title = st.text_input("What is the title of the application?", value="", key="report_application_title")
         
+        # Look up the payee in the report archive; prefill the prior appointments whenever the payee or cause number changes
+        prior_matches = []
+        if payee_name.strip():
+            with profiler.span("prior_appointment_lookup"):
+                prior_matches = load_appointment_index(REPORT_ARCHIVE).lookup(payee_name, exclude_cause_number=cause_number)
+        prior_lookup = (normalize_name(payee_name), cause_number.strip().lower())
+        # Only exact name matches are counted; near matches are listed below for staff to confirm
+        exact_matches = [match for match in prior_matches if match.similarity == 1.0]
+        if exact_matches and st.session_state.get("prior_appointment_lookup") != prior_lookup:
+            st.session_state["report_prior_appointment"] = "Yes"
+            st.session_state["report_prior_times"] = len({number for match in exact_matches for number in match.cause_numbers})
+        st.session_state["prior_appointment_lookup"] = prior_lookup
+        
         # Exhibits section
         st.subheader("Exhibits")
         num_exhibits = st.number_input("How many exhibits were in the application?", min_value=1, value=1, step=1, key="report_num_exhibits")
@@ -820,6 +1113,8 @@ if check_password():
             exhibit = st.text_input(f"Exhibit {i+1} - Copy/paste the exact name:", key=f"report_exhibit_{i}", value="")
             if exhibit.strip():
                 exhibits.append(exhibit.strip())
+        formatted_exhibits = report_section("exhibits", {"exhibits": tuple(exhibits)},
+                                            lambda inputs: format_exhibits_list(list(inputs["exhibits"])))
         
         # Prior appointments section
         st.subheader("Prior Appointments")
@@ -827,81 +1122,92 @@ if check_password():
         
         prior_times = 0
         if prior_appointment == "Yes":
-            prior_times = st.number_input("How many times before?", min_value=1, value=1, step=1, key="report_prior_times")
+            prior_times = st.number_input("How many times before?", min_value=1, step=1, key="report_prior_times")
+        for match in prior_matches:
+            similarity = "exact name match" if match.similarity == 1.0 else f"{match.similarity:.0%} name match"
+            st.caption(f"📁 Archive: **{match.payee_name}** ({similarity}) — prior cause number(s) {', '.join(match.cause_numbers)}")
         
-        # Facts section - NEW for Libertarian template
-        if selected_template == "Libertarian Approach - Recommend":
-            st.subheader("Facts Section")
-            
-            # Paragraph 1 - Simple copy/paste from Nick's call
-            st.write("**Paragraph 1 - Client Phone Call Notes:**")
-            st.write("Copy and paste what Nick found in his call with the client:")
-            
-            paragraph_1 = st.text_area(
-                "Paragraph 1 content:",
+        # Facts section
+        st.subheader("Facts Section")
+        
+        # Paragraph 1 - Simple copy/paste from Nick's call
+        st.write("**Paragraph 1 - Client Phone Call Notes:**")
+        st.write("Copy and paste what Nick found in his call with the client:")
+        
+        paragraph_1 = st.text_area(
+            "Paragraph 1 content:",
+            height=120,
+            placeholder="Paste Nick's notes about the phone call with the client here...",
+            key="report_paragraph_1"
+        )
+        
+        # Paragraph 2 - Auto-generated from financial data
+        st.write("**Paragraph 2 - Payment Details (Auto-Generated):**")
+        
+        # Generate paragraph 2 from financial data
+        with profiler.span("generate_paragraph_2"):
+            paragraph_2 = report_section("paragraph_2", st.session_state, generate_paragraph_2_from_financial_data)
+        
+        if paragraph_2:
+            st.success("Generated from your Financial Analysis data:")
+            st.write(paragraph_2)
+        else:
+            st.warning("No financial data found. Please complete Financial Analysis first.")
+            paragraph_2 = ""
+        
+        # Combine paragraphs for final facts section
+        final_facts_paragraph = report_section("facts", {"paragraph_1": paragraph_1, "paragraph_2": paragraph_2},
+                                               lambda inputs: combine_facts(inputs["paragraph_1"], inputs["paragraph_2"]))
+        
+        # Findings for the Analysis section; the templates themselves state no case facts
+        analysis = ""
+        if "analysis" in get_report_template(selected_template).slot_names:
+            st.subheader("Analysis")
+            analysis = st.text_area(
+                "Your findings for this case (added to the Analysis section after the best-interest standard):",
                 height=120,
-                placeholder="Paste Nick's notes about the phone call with the client here...",
-                key="report_paragraph_1"
+                placeholder="e.g. whether the Payee understands the terms, the purpose of the funds, and how the lump sum compares to the payments given up...",
+                key="report_analysis"
+            ).strip()
+            if not analysis:
+                st.info("The Analysis section will state only the best-interest standard and the template's recommendation until findings are entered.")
+        
+        # Save the deal (inputs, schedule and results) for later
+        if st.button("💾 Save Deal", key="report_save_deal_button", disabled=not cause_number.strip() or "deal_to_save" not in st.session_state):
+            deal_to_save = st.session_state["deal_to_save"]
+            form_state = {key: value for key, value in st.session_state.items()
+                          if key.startswith(FORM_STATE_PREFIXES) and key not in UNSAVED_FORM_KEYS}
+            saved_id = open_deal_store(DEAL_STORE_PATH).save(
+                cause_number, deal_to_save["purchase_date"], deal_to_save["purchase_price"], deal_to_save["offsets"], deal_to_save["amounts"],
+                results=deal_to_save["results"], form_state=form_state, payee_name=payee_name, factoring_company=factoring_company,
             )
-            
-            # Paragraph 2 - Auto-generated from financial data
-            st.write("**Paragraph 2 - Payment Details (Auto-Generated):**")
-            
-            # Generate paragraph 2 from financial data
-            paragraph_2 = generate_paragraph_2_from_financial_data()
-            
-            if paragraph_2:
-                st.success("Generated from your Financial Analysis data:")
-                st.write(paragraph_2)
-            else:
-                st.warning("No financial data found. Please complete Financial Analysis first.")
-                paragraph_2 = ""
-            
-            # Combine paragraphs for final facts section
-            final_facts_paragraph = ""
-            if paragraph_1.strip():
-                final_facts_paragraph += paragraph_1.strip()
-            if paragraph_2.strip():
-                if final_facts_paragraph:
-                    final_facts_paragraph += "\n\n" + paragraph_2.strip()
-                else:
-                    final_facts_paragraph = paragraph_2.strip()
-                    
-        else:
-            final_facts_paragraph = ""  # Other templates don't have this feature yet
+            st.success(f"Saved deal #{saved_id} for cause number {cause_number}.")
+        if cause_number.strip():
+            pricing_history = open_deal_store(DEAL_STORE_PATH).history(cause_number)
+            if pricing_history:
+                st.caption(f"{len(pricing_history)} saved pricing(s) for this cause number; most recent {pricing_history[0]['saved_at'][:16].replace('T', ' ')} "
+                           f"at ${pricing_history[0]['purchase_price']:,.2f}")
         
         # Generate report button
         if st.button("Generate Report", key="report_generate_button"):
             if all([cause_number, factoring_company, courthouse, payee_name, application_title]) and len(exhibits) == num_exhibits and all(exhibits):
-                # Format exhibits
-                formatted_exhibits = format_exhibits_list(exhibits)
-                
-                # Create prior appointment sentence
-                prior_sentence = ""
-                if prior_appointment == "Yes":
-                    if prior_times == 1:
-                        prior_sentence = f"A review of my files indicated that I had previously been appointed as Guardian Ad Litem for Payee in one prior case. "
-                    else:
-                        prior_sentence = f"A review of my files indicated that I previously had been appointed as Guardian Ad Litem for Payee in {prior_times} prior cases. "
-                
-                # Generate the appropriate report based on selected template
-                if selected_template == "Libertarian Approach - Recommend":
-                    report = generate_libertarian_approach_report(
-                        cause_number, factoring_company, courthouse, payee_name, 
-                        application_title, formatted_exhibits, prior_sentence, 
-                        final_facts_paragraph  # Pass the facts paragraph
+                with profiler.span("generate_report"):
+                    # Create prior appointment sentence
+                    prior_sentence = report_section("prior_sentence", {"prior_times": prior_times if prior_appointment == "Yes" else 0},
+                                                    lambda inputs: prior_appointment_sentence(inputs["prior_times"]))
+                    life_analysis = report_section("life_analysis", st.session_state, generate_life_contingent_analysis)
+                    
+                    # Generate the report from the selected template
+                    report = generate_report(
+                        selected_template, cause_number, factoring_company, courthouse, payee_name,
+                        application_title, formatted_exhibits, prior_sentence,
+                        final_facts_paragraph,  # Pass the facts paragraph
+                        life_analysis,
+                        analysis
                     )
-                elif selected_template == "Beginning Slippery Slope - Hesitantly Recommend":
-                    # TODO: Add function for this template
-                    report = "Template not yet implemented - Beginning Slippery Slope"
-                elif selected_template == "Negative - Do Not Recommend":
-                    # TODO: Add function for this template
-                    report = "Template not yet implemented - Negative"
-                elif selected_template == "Life-Contingent Payments - Never Recommend":
-                    # TODO: Add function for this template
-                    report = "Template not yet implemented - Life-Contingent Payments"
-                else:
-                    report = "Unknown template selected"
+                
+                # Kept for "Record as filed"; a generated report is only a draft until then
+                st.session_state["generated_report"] = (payee_name, cause_number, report)
                 
                 st.success("Report generated successfully!")
                 st.subheader("📋 Copy and paste the text below into Microsoft Word:")
@@ -909,5 +1215,21 @@ if check_password():
                 # Display the report in a text area for easy copying
                 st.text_area("Generated Report", report, height=400, key="report_final_output")
                 
+                with profiler.span("render_docx"):
+                    report_docx = render_docx(report)
+                st.download_button("📄 Download as Word (.docx)", report_docx, file_name=report_filename({"cause_number": cause_number}, 0),
+                                   mime=DOCX_MIME, on_click="ignore", key="report_docx_download")
+                
             else:
-                st.error("Please fill in all required fields and exhibit names before generating the report.")
\ No newline at end of file
+                st.error("Please fill in all required fields and exhibit names before generating the report.")
+        
+        # Only a report marked as filed counts as an appointment in later prior-appointment lookups
+        if REPORT_ARCHIVE and "generated_report" in st.session_state:
+            filed_payee, filed_cause, filed_report = st.session_state["generated_report"]
+            if st.button(f"📁 Record as filed ({filed_cause})", key="report_file_button",
+                         help="Add this report to the archive so later lookups for the Payee count this appointment"):
+                if record_appointment(load_appointment_index(REPORT_ARCHIVE), REPORT_ARCHIVE, filed_payee, filed_cause,
+                                      datetime.now().date().isoformat(), filed_report):
+                    st.success(f"Recorded the appointment in {filed_cause} for {filed_payee}.")
+                else:
+                    st.info(f"The appointment in {filed_cause} for {filed_payee} is already in the archive.")
\ No newline at end of file
@@ -0,0 +1,309 @@
+"""
+Benchmark suite for the pricing core, with regression and parity gates.
+
+Times xirr, calculate_duration, calculate_wholesale_price,
+generate_payment_schedule, the full single-deal pipeline and its closed-form
+counterpart price_groups over synthetic deals, records ops/sec and peak
+traced memory to JSON, and compares against a stored baseline. The run fails
+when any timing is more than --threshold times slower than the baseline, when
+any deal's wholesale price moves by more than a tenth of a cent from the
+baseline's reference value, or when price_groups deviates from the
+per-payment pipeline by more than that (or its IRR by more than 1e-9).
+
+Run from the repository root:
+    python -m benchmarks.bench_pricing
+    python -m benchmarks.bench_pricing --output results.json --threshold 2.0
+    python -m benchmarks.bench_pricing --save-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime
+
+import numpy as np
+
+from gal_calculator.annuity import price_groups
+from gal_calculator.batch import price_deals
+from gal_calculator.pricing import (
+    calculate_competitor_quote,
+    calculate_duration,
+    calculate_excel_discount_rate,
+    calculate_profit,
+    calculate_wholesale_price,
+    find_treasury_bounds,
+)
+from gal_calculator.schedule import _cached_schedule, generate_payment_schedule
+from gal_calculator.xirr import xirr
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 2.0
+PARITY_TOLERANCE = 0.001
+CLOSED_FORM_RATE_TOLERANCE = 1e-9
+MIN_SECONDS = 0.35
+
+PURCHASE_DATE = datetime(2025, 1, 15)
+TARGET_IRR = 0.12
+SPREAD = 0.03
+TARGET_PROFIT = 2500.0
+TREASURY_RATES = {
+    0.25: 0.0430, 0.5: 0.0425, 1: 0.0415, 2: 0.0405, 3: 0.0400,
+    5: 0.0405, 7: 0.0415, 10: 0.0425, 20: 0.0455, 30: 0.0450,
+}
+
+# (num_payments, payment_amount, first_payment_date, is_monthly) groups per synthetic deal
+DEALS = {
+    "lump_sum": [(1, 100000.0, date(2030, 6, 1), False)],
+    "monthly_12": [(12, 1000.0, date(2025, 3, 1), True)],
+    "monthly_60": [(60, 1000.0, date(2025, 3, 1), True)],
+    "monthly_360": [(360, 1000.0, date(2025, 3, 1), True)],
+    "monthly_600": [(600, 1000.0, date(2025, 3, 1), True)],
+    "mixed_groups": [
+        (120, 1500.0, date(2025, 3, 1), True),
+        (5, 25000.0, date(2030, 1, 1), False),
+        (1, 75000.0, date(2040, 7, 15), False),
+    ],
+    "annual_35y": [(35, 12000.0, date(2026, 1, 15), False)],
+}
+
+
+def deal_schedule(groups):
+    """Sorted payment dates and amounts for a synthetic deal."""
+    dates = []
+    amounts = []
+    for num_payments, payment_amount, first_payment_date, is_monthly in groups:
+        first = datetime.combine(first_payment_date, datetime.min.time())
+        group_dates, group_amounts = generate_payment_schedule(num_payments, payment_amount, first, first, is_monthly)
+        dates.extend(group_dates)
+        amounts.extend(group_amounts)
+    pairs = sorted(zip(dates, amounts))
+    return [pair[0] for pair in pairs], [pair[1] for pair in pairs]
+
+
+def purchase_price(dates, amounts, rate=TARGET_IRR):
+    """Price that makes the deal yield roughly `rate`, rounded to the cent."""
+    return round(sum(amount / (1 + rate) ** ((d - PURCHASE_DATE).days / 365.0) for d, amount in zip(dates, amounts)), 2)
+
+
+def price_deal(groups, price):
+    """
+    The Financial Analysis pipeline for one deal, step by step as the app runs it:
+    schedule -> XIRR -> duration -> discount rate -> wholesale price -> profit ->
+    competitor quote -> competitive XIRR.
+    """
+    dates, amounts = deal_schedule(groups)
+    irr_rate = xirr([-price] + amounts, [PURCHASE_DATE] + dates)
+    duration_years = calculate_duration(dates, amounts, PURCHASE_DATE, irr_rate)
+    lower_bound, upper_bound = find_treasury_bounds(duration_years)
+    discount_rate = calculate_excel_discount_rate(duration_years, lower_bound, upper_bound,
+                                                  TREASURY_RATES[lower_bound], TREASURY_RATES[upper_bound], SPREAD)
+    wholesale_price = calculate_wholesale_price(price, duration_years, sum(amounts), dates, amounts, PURCHASE_DATE, discount_rate)
+    profit = calculate_profit(wholesale_price, price)
+    competitor_quote = calculate_competitor_quote(price, profit, TARGET_PROFIT)
+    competitive_irr = xirr([-competitor_quote] + amounts, [PURCHASE_DATE] + dates, guess=irr_rate)
+    return {
+        "irr": irr_rate,
+        "duration": duration_years,
+        "discount_rate": discount_rate,
+        "wholesale_price": wholesale_price,
+        "profit": profit,
+        "competitor_quote": competitor_quote,
+        "competitive_irr": competitive_irr,
+    }
+
+
+def measure(function):
+    """
+    Best-of-seven ops/sec (each sample runs for at least MIN_SECONDS / 7) and peak traced memory of one call.
+    """
+    function()
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_SECONDS / 7:
+            break
+        number *= 2
+    best = elapsed
+    for _ in range(6):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ops_per_sec": number / best, "peak_bytes": peak}
+
+
+def run_benchmarks():
+    """Time every function on every synthetic deal and collect parity values."""
+    results = {}
+    parity = {}
+    for name, groups in DEALS.items():
+        dates, amounts = deal_schedule(groups)
+        price = purchase_price(dates, amounts)
+        pipeline = price_deal(groups, price)
+        irr_rate = pipeline["irr"]
+        duration_years = pipeline["duration"]
+        discount_rate = pipeline["discount_rate"]
+        cashflows = [-price] + amounts
+        cashflow_dates = [PURCHASE_DATE] + dates
+
+        def cold_schedules():
+            # generate_payment_schedule is cached; clear it so the generation itself is timed
+            _cached_schedule.cache_clear()
+            deal_schedule(groups)
+
+        timings = {
+            "xirr": measure(lambda: xirr(cashflows, cashflow_dates)),
+            "calculate_duration": measure(lambda: calculate_duration(dates, amounts, PURCHASE_DATE, irr_rate)),
+            "calculate_wholesale_price": measure(lambda: calculate_wholesale_price(
+                price, duration_years, sum(amounts), dates, amounts, PURCHASE_DATE, discount_rate)),
+            "generate_payment_schedule": measure(cold_schedules),
+            "pipeline": measure(lambda: price_deal(groups, price)),
+            "price_groups": measure(lambda: price_groups(groups, PURCHASE_DATE, price, TREASURY_RATES, SPREAD, TARGET_PROFIT)),
+        }
+        results[name] = {"num_payments": len(dates), "timings": timings}
+        parity[name] = {"purchase_price": price, **pipeline}
+    return results, parity
+
+
+def batch_parity(parity):
+    """
+    Largest wholesale price difference between price_deals and the step-by-step pipeline.
+    """
+    deals = [{
+        "groups": [{"num_payments": n, "payment_amount": amount, "first_payment_date": first,
+                    "frequency": "Monthly" if monthly else "Annual"} for n, amount, first, monthly in groups],
+        "purchase_date": PURCHASE_DATE.date(),
+        "purchase_price": parity[name]["purchase_price"],
+        "treasury_rates": TREASURY_RATES,
+        "spread": SPREAD,
+        "target_profit": TARGET_PROFIT,
+    } for name, groups in DEALS.items()]
+    batch = price_deals(deals)
+    expected = np.array([parity[name]["wholesale_price"] for name in DEALS])
+    return float(np.max(np.abs(batch["wholesale_price"].to_numpy() - expected)))
+
+
+def closed_form_deviation(parity):
+    """
+    Largest wholesale price and IRR differences between price_groups and the per-payment pipeline.
+    """
+    wholesale_difference = 0.0
+    rate_difference = 0.0
+    for name, groups in DEALS.items():
+        values = parity[name]
+        closed_form = price_groups(groups, PURCHASE_DATE, values["purchase_price"], TREASURY_RATES, SPREAD, TARGET_PROFIT)
+        wholesale_difference = max(wholesale_difference, abs(closed_form["wholesale_price"] - values["wholesale_price"]))
+        rate_difference = max(rate_difference, abs(closed_form["irr"] - values["irr"]))
+    return wholesale_difference, rate_difference
+
+
+def compare(results, parity, baseline, threshold):
+    """Regression and parity failures against a baseline, as readable lines."""
+    failures = []
+    for name, result in results.items():
+        baseline_result = baseline.get("results", {}).get(name)
+        if baseline_result is None:
+            continue
+        for function, timing in result["timings"].items():
+            reference = baseline_result["timings"].get(function)
+            if reference is None:
+                continue
+            slowdown = reference["ops_per_sec"] / timing["ops_per_sec"]
+            timing["slowdown"] = slowdown
+            if slowdown > threshold:
+                failures.append(f"{name}/{function}: {slowdown:.2f}x slower than baseline "
+                                f"({timing['ops_per_sec']:,.0f} vs {reference['ops_per_sec']:,.0f} ops/sec)")
+
+    for name, values in parity.items():
+        reference = baseline.get("parity", {}).get(name)
+        if reference is None:
+            continue
+        difference = abs(values["wholesale_price"] - reference["wholesale_price"])
+        if difference > PARITY_TOLERANCE:
+            failures.append(f"{name}: wholesale price {values['wholesale_price']:,.4f} differs from "
+                            f"baseline {reference['wholesale_price']:,.4f} by {difference:.4f}")
+    return failures
+
+
+def print_table(results, out=sys.stdout):
+    print(f"{'deal':<14} {'payments':>8} {'function':<26} {'ops/sec':>12} {'peak KiB':>9} {'vs base':>8}", file=out)
+    for name, result in results.items():
+        for function, timing in result["timings"].items():
+            slowdown = f"{timing['slowdown']:.2f}x" if "slowdown" in timing else "-"
+            print(f"{name:<14} {result['num_payments']:>8} {function:<26} {timing['ops_per_sec']:>12,.1f} "
+                  f"{timing['peak_bytes'] / 1024:>9.1f} {slowdown:>8}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Fail when a timing is this many times slower than the baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results, parity = run_benchmarks()
+    batch_difference = batch_parity(parity)
+    closed_form_wholesale, closed_form_rate = closed_form_deviation(parity)
+
+    failures = []
+    if batch_difference > PARITY_TOLERANCE:
+        failures.append(f"price_deals wholesale price differs from the pipeline by {batch_difference:.4f}")
+    if closed_form_wholesale > PARITY_TOLERANCE or closed_form_rate > CLOSED_FORM_RATE_TOLERANCE:
+        failures.append(f"price_groups differs from the pipeline by {closed_form_wholesale:.4f} in wholesale price "
+                        f"and {closed_form_rate:.2e} in IRR")
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures.extend(compare(results, parity, baseline, args.threshold))
+
+    print_table(results)
+    print(f"\nprice_deals vs pipeline max wholesale difference: ${batch_difference:.2e}")
+    print(f"price_groups vs pipeline max wholesale difference: ${closed_form_wholesale:.2e}, "
+          f"max IRR difference: {closed_form_rate:.2e}")
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "threshold": args.threshold,
+        "results": results,
+        "parity": parity,
+        "failures": failures,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        report.pop("failures")
+        report.pop("threshold")
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+
+    if failures:
+        print("\nFAILED:", file=sys.stderr)
+        for failure in failures:
+            print(f"  {failure}", file=sys.stderr)
+        return 1
+    if baseline:
+        print(f"\nOK: no timing more than {args.threshold:.2f}x slower than baseline, wholesale prices unchanged")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Compare the vectorized XIRR solver against the original 100-step bisection,
+and count how many NPV evaluations a warm-started re-solve needs after a
+typical interactive edit (purchase price moved by 1% and 5%).
+
+Run from the repository root:
+    python -m benchmarks.bench_xirr
+"""
+import timeit
+from datetime import datetime
+
+from gal_calculator.xirr import xirr, xirr_detailed
+
+
+def legacy_xirr(cashflows, dates, guess=0.1):
+    """The bisection solver that used to live in app.py, kept for comparison."""
+    sorted_pairs = sorted(zip(dates, cashflows))
+    dates = [pair[0] for pair in sorted_pairs]
+    cashflows = [pair[1] for pair in sorted_pairs]
+
+    first_date = dates[0]
+    days = [(date - first_date).days for date in dates]
+
+    def npv(rate):
+        return sum(cf / ((1 + rate) ** (day / 365.0)) for cf, day in zip(cashflows, days))
+
+    low = -0.99
+    high = 10.0
+
+    for _ in range(100):
+        mid = (low + high) / 2.0
+        npv_result = npv(mid)
+
+        if abs(npv_result) < 1e-10:
+            return mid
+        elif npv_result > 0:
+            low = mid
+        else:
+            high = mid
+
+    return mid
+
+
+def monthly_deal(num_payments, amount=1000.0, rate=0.12):
+    """A monthly structure priced to yield roughly `rate`."""
+    purchase_date = datetime(2025, 1, 15)
+    dates = [purchase_date]
+    for i in range(1, num_payments + 1):
+        dates.append(datetime(2025 + i // 12, i % 12 + 1, 15))
+    price = sum(amount / (1 + rate) ** ((d - purchase_date).days / 365.0) for d in dates[1:])
+    cashflows = [-round(price, 2)] + [amount] * num_payments
+    return cashflows, dates
+
+
+def main():
+    print(f"{'payments':>8} {'legacy ms':>10} {'vector ms':>10} {'speedup':>8} {'iters':>6} {'|diff|':>10}")
+    for num_payments in (1, 12, 60, 360, 600):
+        cashflows, dates = monthly_deal(num_payments)
+        repeats = 5 if num_payments >= 360 else 20
+        legacy_seconds = min(timeit.repeat(lambda: legacy_xirr(cashflows, dates), number=1, repeat=repeats))
+        vector_seconds = min(timeit.repeat(lambda: xirr(cashflows, dates), number=1, repeat=repeats))
+        result = xirr_detailed(cashflows, dates)
+        diff = abs(result.rate - legacy_xirr(cashflows, dates))
+        print(f"{num_payments:>8} {legacy_seconds * 1e3:>10.3f} {vector_seconds * 1e3:>10.3f} "
+              f"{legacy_seconds / vector_seconds:>7.1f}x {result.iterations:>6} {diff:>10.2e}")
+    warm_start_table()
+
+
+def warm_start_table():
+    print(f"\n{'payments':>8} {'yield':>6} {'edit':>6} {'cold iters':>10} {'warm iters':>10} {'legacy':>7}")
+    for num_payments in (60, 360, 600):
+        for rate in (0.12, 0.45):
+            cashflows, dates = monthly_deal(num_payments, rate=rate)
+            previous_rate = xirr(cashflows, dates)
+            for change in (0.01, 0.05):
+                edited = [cashflows[0] * (1 + change)] + cashflows[1:]
+                cold = xirr_detailed(edited, dates)
+                warm = xirr_detailed(edited, dates, guess=previous_rate)
+                print(f"{num_payments:>8} {rate:>6.0%} {change:>+6.0%} {cold.iterations:>10} {warm.iterations:>10} {100:>7}")
+
+
+if __name__ == "__main__":
+    main()
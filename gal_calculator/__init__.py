@@ -0,0 +1,53 @@
+"""
+Financial core for the Guardian Ad Litem Calculator.
+Kept free of Streamlit so it can be imported, benchmarked and batch-run headless.
+
+Public names are resolved lazily, so `import gal_calculator` does not pull in
+NumPy, pandas or SciPy until a function that needs them is first used.
+"""
+import importlib
+
+_EXPORTS = {
+    "xirr": "gal_calculator.xirr",
+    "xirr_detailed": "gal_calculator.xirr",
+    "generate_payment_schedule": "gal_calculator.schedule",
+    "schedule_offsets": "gal_calculator.schedule",
+    "PaymentSchedule": "gal_calculator.schedule",
+    "price_deals": "gal_calculator.batch",
+    "price_groups": "gal_calculator.annuity",
+    "value_life_contingent": "gal_calculator.mortality",
+    "read_schedule": "gal_calculator.ingest",
+    "price_for_irr": "gal_calculator.breakeven",
+    "price_for_profit": "gal_calculator.breakeven",
+    "price_for_discount_rate": "gal_calculator.breakeven",
+    "find_treasury_bounds": "gal_calculator.pricing",
+    "get_treasury_series_info": "gal_calculator.pricing",
+    "calculate_duration": "gal_calculator.pricing",
+    "calculate_excel_discount_rate": "gal_calculator.pricing",
+    "calculate_wholesale_price": "gal_calculator.pricing",
+    "calculate_profit": "gal_calculator.pricing",
+    "calculate_competitor_quote": "gal_calculator.pricing",
+    "get_report_template_options": "gal_calculator.reports",
+    "generate_report": "gal_calculator.reports",
+    "generate_libertarian_approach_report": "gal_calculator.reports",
+    "generate_paragraph_2_from_financial_data": "gal_calculator.reports",
+    "generate_life_contingent_analysis": "gal_calculator.reports",
+    "format_exhibits_list": "gal_calculator.reports",
+    "prior_appointment_sentence": "gal_calculator.reports",
+    "render_docx": "gal_calculator.documents",
+    "render_reports": "gal_calculator.documents",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
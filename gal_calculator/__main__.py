@@ -0,0 +1,5 @@
+import sys
+
+from gal_calculator.cli import main
+
+sys.exit(main())
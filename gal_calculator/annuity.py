@@ -0,0 +1,194 @@
+"""
+Closed-form pricing of uniform payment groups.
+
+Calendar months are irregular (28 to 31 days), but the dates of a monthly
+group repeat exactly every 48 months: any four consecutive years hold 1461
+days unless a century year without a leap day (2100, 2200, 2300) falls
+among them, and day-of-month clamping repeats with them. So a group of n
+payments splits into at most 48 phases (4 for an annual group). Phase j pays
+at t_j, t_j + T, t_j + 2T, ... with T = 1461 / 365 years, and its PV is a
+finite geometric series in q = (1 + r) ** -T:
+
+    sum_{m<M} a (1 + r) ** -(t_j + m T) = a (1 + r) ** -t_j * (1 - q^M) / (1 - q)
+
+PV x t and the NPV derivative add sum_{m<M} m q^m, which is closed form too.
+The phase offsets t_j come from the per-payment schedule code for the first
+cycle only, so the irregular month gaps are exact and pricing costs the same
+for a 50-year monthly group as for a 4-year one. Results equal the
+per-payment sums up to floating-point rounding (benchmarks.bench_pricing
+measures the deviation and fails above a tenth of a cent).
+
+A group keeps one term per payment when it is no longer than one cycle,
+starts before the purchase date, or spans a skipped century leap day.
+"""
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+from gal_calculator.pricing import (
+    calculate_competitor_quote,
+    calculate_excel_discount_rate,
+    calculate_profit,
+    find_treasury_bounds,
+)
+from gal_calculator.schedule import _as_date, schedule_offsets
+from gal_calculator.xirr import (
+    DAYS_PER_YEAR,
+    HIGH_RATE,
+    LOW_RATE,
+    MAX_NEWTON_ITERATIONS,
+    NPV_TOLERANCE,
+    RATE_TOLERANCE,
+    XirrResult,
+    _bracketed_fallback,
+)
+
+CYCLE_MONTHS = 48
+CYCLE_DAYS = 1461
+CYCLE_YEARS = CYCLE_DAYS / DAYS_PER_YEAR
+# Below this |log q| the series are summed term by term; the closed form for
+# sum m q^m cancels badly as q approaches 1 (a rate near zero)
+SERIES_CUTOFF = 1e-4
+
+
+class GroupCashflows(NamedTuple):
+    """Payment phases: amounts[j] is paid counts[j] times, at years[j] + m * CYCLE_YEARS."""
+    years: np.ndarray
+    amounts: np.ndarray
+    counts: np.ndarray
+
+    @property
+    def num_payments(self) -> int:
+        return int(self.counts.sum())
+
+    def expand(self):
+        """Per-payment year fractions and amounts, in phase order."""
+        counts = self.counts.astype(np.int64)
+        cycles = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.repeat(self.years, counts) + cycles * CYCLE_YEARS, np.repeat(self.amounts, counts)
+
+
+def _skips_leap_day(first_year, last_year):
+    """True when a century year without a leap day (e.g. 2100) falls in [first_year, last_year]."""
+    century = -(-first_year // 100) * 100
+    return any(year % 400 for year in range(century, last_year + 1, 100))
+
+
+def _group_phases(num_payments, payment_amount, first_payment_date, is_monthly, purchase_date):
+    """(offsets, amounts, counts) for one uniform group."""
+    first_payment_date = _as_date(first_payment_date)
+    months_per_payment = 1 if is_monthly else 12
+    per_cycle = CYCLE_MONTHS // months_per_payment
+    last_month = first_payment_date.month - 1 + months_per_payment * (num_payments - 1)
+    if num_payments > per_cycle and not _skips_leap_day(first_payment_date.year,
+                                                        first_payment_date.year + last_month // 12):
+        offsets, amounts = schedule_offsets(per_cycle, payment_amount, first_payment_date, is_monthly, purchase_date)
+        if offsets[0] >= 0:
+            counts = (num_payments - np.arange(per_cycle) + per_cycle - 1) // per_cycle
+            return offsets, amounts, counts
+    offsets, amounts = schedule_offsets(num_payments, payment_amount, first_payment_date, is_monthly, purchase_date)
+    return offsets, amounts, np.ones(num_payments, dtype=np.int64)
+
+
+def group_cashflows(groups, purchase_date) -> GroupCashflows:
+    """
+    Phases for (num_payments, payment_amount, first_payment_date, is_monthly) groups,
+    with year fractions measured from purchase_date.
+    """
+    phases = [_group_phases(int(n), float(amount), first, bool(monthly) and int(n) > 1, purchase_date)
+              for n, amount, first, monthly in groups]
+    return GroupCashflows(np.concatenate([offsets for offsets, _, _ in phases]) / DAYS_PER_YEAR,
+                          np.concatenate([amounts for _, amounts, _ in phases]),
+                          np.concatenate([counts for _, _, counts in phases]).astype(np.float64))
+
+
+def _series(log_q, counts):
+    """sum_{m<M} q^m and sum_{m<M} m q^m for each phase, where q = exp(log_q)."""
+    if abs(log_q) < SERIES_CUTOFF:
+        cycles = np.arange(counts.max())[:, None]
+        terms = np.where(cycles < counts, np.exp(cycles * log_q), 0.0)
+        return terms.sum(axis=0), (cycles * terms).sum(axis=0)
+    q = math.exp(log_q)
+    q_to_m = np.exp(counts * log_q)
+    one_minus_q = -math.expm1(log_q)
+    sums = -np.expm1(counts * log_q) / one_minus_q
+    weighted_sums = (q - counts * q_to_m + (counts - 1) * q_to_m * q) / (one_minus_q * one_minus_q)
+    return sums, weighted_sums
+
+
+def present_value(cashflows, rate, future_only=False):
+    """
+    (PV, PV x t) of the payments at rate; future_only drops payments before the purchase date.
+    """
+    log_v = -math.log1p(rate)
+    years, amounts, counts = cashflows
+    if future_only and (years < 0).any():
+        keep = years >= 0
+        years, amounts, counts = years[keep], amounts[keep], counts[keep]
+    if not years.size:
+        return 0.0, 0.0
+    sums, weighted_sums = _series(CYCLE_YEARS * log_v, counts)
+    first_pvs = amounts * np.exp(years * log_v)
+    total_pv = float(first_pvs @ sums)
+    total_time_weighted_pv = float(first_pvs @ (years * sums + CYCLE_YEARS * weighted_sums))
+    return total_pv, total_time_weighted_pv
+
+
+def solve_group_rate(cashflows, purchase_price, guess=0.1) -> XirrResult:
+    """
+    The rate at which the payments' PV equals purchase_price, as xirr() would find it.
+    Newton steps use the closed-form derivative; a failed Newton run falls back to
+    Brent's method on the expanded per-payment cashflows.
+    """
+    with np.errstate(over="ignore", invalid="ignore"):
+        rate = float(guess)
+        iterations = 0
+        for iterations in range(1, MAX_NEWTON_ITERATIONS + 1):
+            total_pv, total_time_weighted_pv = present_value(cashflows, rate)
+            npv = total_pv - purchase_price
+            if abs(npv) < NPV_TOLERANCE:
+                return XirrResult(rate, True, iterations, "newton")
+            derivative = -total_time_weighted_pv / (1.0 + rate)
+            if derivative == 0 or not np.isfinite(derivative):
+                break
+            step = npv / derivative
+            rate -= step
+            if not (LOW_RATE < rate < HIGH_RATE) or not np.isfinite(rate):
+                break
+            if abs(step) < RATE_TOLERANCE * max(1.0, abs(rate)):
+                return XirrResult(rate, True, iterations, "newton")
+
+        years, amounts = cashflows.expand()
+        return _bracketed_fallback(np.concatenate(([-float(purchase_price)], amounts)),
+                                   np.concatenate(([0.0], years)), iterations, guess)
+
+
+def price_groups(groups, purchase_date, purchase_price, treasury_rates, spread=0.03, target_profit=2500):
+    """
+    The Financial Analysis pipeline (XIRR, duration, discount rate, wholesale price, profit,
+    competitor quote, competitive XIRR) for one deal, in O(groups) per rate evaluation.
+    treasury_rates maps each Treasury maturity in years to its rate.
+    """
+    cashflows = group_cashflows(groups, purchase_date)
+    irr = solve_group_rate(cashflows, purchase_price).rate
+    if irr is None:
+        raise ValueError("XIRR did not converge for this deal")
+    total_pv, total_time_weighted_pv = present_value(cashflows, irr)
+    duration = total_time_weighted_pv / total_pv if total_pv > 0 else 0
+    lower_bound, upper_bound = find_treasury_bounds(duration)
+    discount_rate = calculate_excel_discount_rate(duration, lower_bound, upper_bound,
+                                                  treasury_rates[lower_bound], treasury_rates[upper_bound], spread)
+    # Wholesale price = purchase price + XNPV, and XNPV = PV of the future payments - purchase price
+    wholesale_price = present_value(cashflows, discount_rate, future_only=True)[0]
+    profit = calculate_profit(wholesale_price, purchase_price)
+    competitor_quote = calculate_competitor_quote(purchase_price, profit, target_profit)
+    return {
+        "irr": irr,
+        "duration": duration,
+        "discount_rate": discount_rate,
+        "wholesale_price": wholesale_price,
+        "profit": profit,
+        "competitor_quote": competitor_quote,
+        "competitive_irr": solve_group_rate(cashflows, competitor_quote, guess=irr).rate,
+    }
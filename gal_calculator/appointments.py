@@ -0,0 +1,230 @@
+"""
+Prior-appointment lookup over the archive of past Guardian Ad Litem reports.
+
+Payee names are reduced to a normalized key (case, accents, punctuation,
+generational suffixes and word order of "Last, First" removed) for exact
+hits, and every distinct key is posted under its character trigrams so that
+near matches ("Jon Smith" / "John Smith") are found by counting shared
+trigrams instead of comparing against every name in the archive.
+
+The archive is either a CSV with payee_name and cause_number columns (and
+optionally report_date), or a directory of past reports (.txt, .md or
+.docx) laid out as the gal_calculator.reports templates produce them. The
+index is updated in place with add() as reports are filed. One index is
+shared by every session, so its reads and writes hold the index's lock;
+record_appointment() writes the archive from inside add(), under the same
+lock.
+"""
+import csv
+import math
+import os
+import re
+import threading
+import unicodedata
+from typing import NamedTuple
+
+DEFAULT_THRESHOLD = 0.6
+DEFAULT_LIMIT = 10
+REPORT_EXTENSIONS = (".txt", ".md", ".docx")
+ARCHIVE_COLUMNS = ["payee_name", "cause_number", "report_date"]
+
+_SUFFIXES = {"jr", "sr", "ii", "iii", "iv"}
+_NON_ALPHANUMERIC = re.compile(r"[^a-z0-9 ]+")
+_CAUSE_NUMBER = re.compile(r"CAUSE\s+NO\.?\s*(.+)", re.IGNORECASE)
+_IN_RE_PAYEE = re.compile(r"IN RE:\**\s*\n\s*\**([^*\n]+?)\**\s*\n", re.IGNORECASE)
+_BETWEEN_PAYEE = re.compile(r"by and between (.+?) \(\"the Payee\"\)")
+
+
+class Appointment(NamedTuple):
+    payee_name: str
+    cause_number: str
+    report_date: str
+    source: str
+
+
+class Match(NamedTuple):
+    """One archived payee name that matches a lookup, with its appointments."""
+    payee_name: str
+    similarity: float
+    appointments: list
+
+    @property
+    def cause_numbers(self):
+        return sorted({appointment.cause_number for appointment in self.appointments})
+
+
+def normalize_name(name):
+    """
+    Comparison key for a payee name: "SMITH, John A. Jr." -> "john a smith".
+    """
+    name = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode("ascii").lower()
+    if name.count(",") == 1:
+        last, first = name.split(",")
+        if first.strip() and first.strip().rstrip(".") not in _SUFFIXES:
+            name = f"{first} {last}"
+    words = _NON_ALPHANUMERIC.sub(" ", name.replace(".", "")).split()
+    return " ".join(word for word in words if word not in _SUFFIXES)
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def parse_report(text):
+    """
+    (payee_name, cause_number) from the text of a past report; either may be None.
+    """
+    cause = _CAUSE_NUMBER.search(text)
+    payee = _IN_RE_PAYEE.search(text) or _BETWEEN_PAYEE.search(text)
+    return (payee.group(1).strip() if payee else None,
+            cause.group(1).strip().strip("*").strip() if cause else None)
+
+
+def _read_report(path):
+    if path.lower().endswith(".docx"):
+        import docx
+
+        return "\n".join(paragraph.text for paragraph in docx.Document(path).paragraphs)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+class AppointmentIndex:
+    """
+    Exact and trigram index of archived appointments by payee name.
+    """
+
+    def __init__(self):
+        self._appointments = {}  # normalized key -> [Appointment]
+        self._names = {}  # normalized key -> most recently seen spelling
+        self._postings = {}  # trigram -> set of normalized keys
+        self._grams = {}  # normalized key -> frozenset of its trigrams
+        self._seen = set()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(appointments) for appointments in self._appointments.values())
+
+    def add(self, payee_name, cause_number, report_date="", source="", on_added=None):
+        """
+        Index one appointment. Re-adding the same payee and cause number is a no-op,
+        so an archive can be re-scanned or a report regenerated safely.
+        on_added, if given, is called under the index's lock just before a new appointment
+        is indexed (to write it to the archive); if it raises, nothing is indexed.
+        """
+        key = normalize_name(payee_name)
+        cause_number = (cause_number or "").strip()
+        with self._lock:
+            if not key or not cause_number or (key, cause_number.lower()) in self._seen:
+                return False
+            if on_added is not None:
+                on_added()
+            self._seen.add((key, cause_number.lower()))
+            if key not in self._appointments:
+                self._appointments[key] = []
+                grams = self._grams[key] = frozenset(trigrams(key))
+                for gram in grams:
+                    self._postings.setdefault(gram, set()).add(key)
+            self._appointments[key].append(Appointment(payee_name.strip(), cause_number, report_date or "", source or ""))
+            self._names[key] = payee_name.strip()
+            return True
+
+    def lookup(self, payee_name, threshold=DEFAULT_THRESHOLD, limit=DEFAULT_LIMIT, exclude_cause_number=None):
+        """
+        Archived payees whose names match, best first. An exact normalized match has
+        similarity 1.0; others are ranked by trigram Jaccard similarity >= threshold.
+        """
+        key = normalize_name(payee_name)
+        if not key:
+            return []
+        grams = trigrams(key)
+        # Jaccard >= threshold needs at least threshold * len(grams) shared trigrams, so every
+        # match shares one of the len(grams) - minimum_shared + 1 rarest: only their postings are read
+        minimum_shared = max(math.ceil(threshold * len(grams)), 1)
+        excluded = (exclude_cause_number or "").strip().lower()
+        matches = []
+        with self._lock:
+            rarest = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))
+            candidates = set()
+            for gram in rarest[:len(grams) - minimum_shared + 1]:
+                candidates.update(self._postings.get(gram, ()))
+
+            for candidate in candidates:
+                candidate_grams = self._grams[candidate]
+                count = len(grams & candidate_grams)
+                similarity = 1.0 if candidate == key else count / (len(grams) + len(candidate_grams) - count)
+                if similarity < threshold:
+                    continue
+                appointments = [a for a in self._appointments[candidate] if a.cause_number.lower() != excluded]
+                if appointments:
+                    matches.append(Match(self._names[candidate], similarity, appointments))
+        matches.sort(key=lambda match: (-match.similarity, match.payee_name))
+        return matches[:limit]
+
+    def add_csv(self, path):
+        """Index every row of an archive CSV; returns the number of new appointments."""
+        added = 0
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                added += self.add(row.get("payee_name", ""), row.get("cause_number", ""), row.get("report_date", ""), path)
+        return added
+
+    def add_directory(self, path):
+        """Index every past report in a directory tree; returns the number of new appointments."""
+        added = 0
+        for root, _, files in os.walk(path):
+            for filename in sorted(files):
+                if filename.lower().endswith(REPORT_EXTENSIONS) and not filename.startswith("~$"):
+                    report_path = os.path.join(root, filename)
+                    payee_name, cause_number = parse_report(_read_report(report_path))
+                    if payee_name and cause_number:
+                        added += self.add(payee_name, cause_number, source=report_path)
+        return added
+
+    @classmethod
+    def from_archive(cls, path):
+        """Index built from an archive CSV or a directory of reports."""
+        index = cls()
+        if os.path.isdir(path):
+            index.add_directory(path)
+        elif os.path.exists(path):
+            index.add_csv(path)
+        return index
+
+
+def _new_report_file(directory, cause_number):
+    """
+    Create and open a new report file for cause_number in directory, adding " (2)", " (3)", ...
+    to the name when it is taken, so no archived report is ever overwritten.
+    """
+    safe_name = re.sub(r"[^A-Za-z0-9._-]+", "_", cause_number.strip())
+    for attempt in range(1, 1000):
+        path = os.path.join(directory, f"{safe_name}.txt" if attempt == 1 else f"{safe_name} ({attempt}).txt")
+        try:
+            return open(path, "x", encoding="utf-8")
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"No free report file name for {cause_number!r} in {directory}")
+
+
+def record_appointment(index, archive_path, payee_name, cause_number, report_date, report_text):
+    """
+    Add a filed report to the index and to the archive it was built from: a row appended
+    to an archive CSV, or the report text saved as a new file in an archive directory.
+    Returns False, and writes nothing, when the appointment is already recorded.
+    """
+    def write_to_archive():
+        if os.path.isdir(archive_path):
+            with _new_report_file(archive_path, cause_number) as f:
+                f.write(report_text)
+        elif archive_path:
+            write_header = not os.path.exists(archive_path) or os.path.getsize(archive_path) == 0
+            with open(archive_path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if write_header:
+                    writer.writerow(ARCHIVE_COLUMNS)
+                writer.writerow([payee_name.strip(), cause_number.strip(), report_date])
+
+    return index.add(payee_name, cause_number, report_date, archive_path, on_added=write_to_archive)
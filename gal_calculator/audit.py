@@ -0,0 +1,233 @@
+"""
+Exact-arithmetic audit of the float64 pricing path.
+
+The audit path reprices each deal with decimal.Decimal at a configurable
+precision: XIRR (Newton, seeded with the fast path's rate), duration, the
+Excel discount rate, the XNPV wholesale price, profit and the competitor
+quote. Each figure is rounded to the cent and compared with the fast path's
+rounded figure; any deal where wholesale price, profit or competitor quote
+differ is flagged.
+
+audit_deals() runs a whole portfolio, fanned out over worker processes,
+and stops handing out work once its time budget is spent; deals it did not
+reach are reported as not_audited rather than silently passed. A deal that
+cannot be priced at all (malformed groups, say) is reported as error with
+its exception, and the rest of the portfolio is still audited.
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from decimal import ROUND_CEILING, ROUND_HALF_UP, Decimal, localcontext
+
+import numpy as np
+import pandas as pd
+
+from gal_calculator.batch import (
+    DEFAULT_SPREAD,
+    DEFAULT_TARGET_PROFIT,
+    LEGAL_COSTS,
+    QUOTE_INCREMENT,
+    _value_or,
+    deal_cashflow_schedule,
+    deal_curves,
+    price_deals_isolated,
+)
+from gal_calculator.pricing import TREASURY_MATURITIES, find_treasury_bounds
+from gal_calculator.xirr import DAYS_PER_YEAR
+
+DEFAULT_PRECISION = 34
+MAX_DECIMAL_ITERATIONS = 50
+DEFAULT_AUDIT_CHUNK = 25
+AUDITED_FIELDS = ("wholesale_price", "profit", "competitor_quote")
+CENT = Decimal("0.01")
+
+AUDIT_COLUMNS = ["deal_id", "status", "mismatched_fields"] + [
+    f"{field}_{path}" for field in AUDITED_FIELDS for path in ("fast", "audit")
+] + ["irr_fast", "irr_audit", "error"]
+
+
+def _decimal(value):
+    """Decimal of the shortest repr of a float, i.e. the value as it was entered."""
+    return Decimal(repr(float(value)))
+
+
+def to_cents(value):
+    """Round a Decimal half-up to the cent, as figures are filed."""
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def float_to_cents(value):
+    """A fast-path float figure rounded half-up to the cent, for comparison with an audited one."""
+    return to_cents(_decimal(value))
+
+
+def _discount_factors(rate, years):
+    log_base = (1 + rate).ln()
+    return [(-t * log_base).exp() for t in years]
+
+
+def audit_deal(offsets, amounts, purchase_price, curve, spread, target_profit, irr_guess, precision=DEFAULT_PRECISION):
+    """
+    Price one deal in Decimal arithmetic.
+
+    offsets are payment day offsets from the purchase date and curve is a rate per
+    TREASURY_MATURITIES, as produced by gal_calculator.batch. Returns a dict of
+    Decimals (irr, duration, discount_rate, wholesale_price, profit, competitor_quote),
+    or None when there is no IRR to start from.
+    """
+    if irr_guess is None or not np.isfinite(irr_guess):
+        return None
+
+    with localcontext() as context:
+        context.prec = precision
+        tolerance = Decimal(10) ** -(precision - 4)
+        price = _decimal(purchase_price)
+        years = [Decimal(int(offset)) / Decimal(int(DAYS_PER_YEAR)) for offset in offsets]
+        payments = [_decimal(amount) for amount in amounts]
+
+        rate = _decimal(irr_guess)
+        for _ in range(MAX_DECIMAL_ITERATIONS):
+            factors = _discount_factors(rate, years)
+            present_values = [amount * factor for amount, factor in zip(payments, factors)]
+            npv = sum(present_values) - price
+            derivative = -sum(pv * t for pv, t in zip(present_values, years)) / (1 + rate)
+            if derivative == 0:
+                return None
+            step = npv / derivative
+            rate -= step
+            if abs(step) < tolerance:
+                break
+
+        present_values = [amount * factor for amount, factor in zip(payments, _discount_factors(rate, years))]
+        total_pv = sum(present_values)
+        duration = sum(pv * t for pv, t in zip(present_values, years)) / total_pv if total_pv > 0 else Decimal(0)
+
+        lower_bound, upper_bound = find_treasury_bounds(float(duration))
+        lower_rate = _decimal(curve[TREASURY_MATURITIES.index(lower_bound)])
+        upper_rate = _decimal(curve[TREASURY_MATURITIES.index(upper_bound)])
+        spread = _decimal(spread)
+        if upper_bound == lower_bound:
+            discount_rate = lower_rate + spread
+        else:
+            lower, upper = _decimal(lower_bound), _decimal(upper_bound)
+            discount_rate = (duration - lower) / (upper - lower) * (upper_rate - lower_rate) + lower_rate + spread
+
+        if payments:
+            factors = _discount_factors(discount_rate, years)
+            xnpv = -price + sum(amount * factor for amount, factor, t in zip(payments, factors, years) if t >= 0)
+            wholesale_price = price + xnpv
+        else:
+            wholesale_price = price
+        profit = wholesale_price - price - _decimal(LEGAL_COSTS)
+        increment = Decimal(QUOTE_INCREMENT)
+        competitor_quote = ((price + (profit - _decimal(target_profit))) / increment).to_integral_value(ROUND_CEILING) * increment
+
+    return {
+        "irr": rate,
+        "duration": duration,
+        "discount_rate": discount_rate,
+        "wholesale_price": wholesale_price,
+        "profit": profit,
+        "competitor_quote": competitor_quote,
+    }
+
+
+def _audit_chunk(tasks, precision, deadline=None):
+    """Worker: audit a list of (position, deal args) tasks, stopping at the wall-clock deadline."""
+    results = []
+    for position, args in tasks:
+        if deadline is not None and time.time() > deadline:
+            break
+        results.append((position, audit_deal(*args, precision=precision)))
+    return results
+
+
+def _compare(deal_id, fast_row, audited):
+    row = {"deal_id": deal_id, "irr_fast": fast_row["irr"], "error": ""}
+    for field in AUDITED_FIELDS:
+        row[f"{field}_fast"] = str(float_to_cents(fast_row[field])) if np.isfinite(fast_row[field]) else None
+    if audited is None:
+        return {**row, "status": "no_irr", "mismatched_fields": ""}
+    mismatched = []
+    for field in AUDITED_FIELDS:
+        row[f"{field}_audit"] = str(to_cents(audited[field]))
+        if row[f"{field}_audit"] != row[f"{field}_fast"]:
+            mismatched.append(field)
+    row["irr_audit"] = float(audited["irr"])
+    row["mismatched_fields"] = ",".join(mismatched)
+    row["status"] = "mismatch" if mismatched else "match"
+    return row
+
+
+def audit_deals(deals, precision=DEFAULT_PRECISION, workers=1, time_budget=None,
+                chunk_size=DEFAULT_AUDIT_CHUNK, curve_store=None) -> pd.DataFrame:
+    """
+    Price deals on the fast path, re-price them in Decimal and compare to the cent.
+
+    Returns one row per deal with status match, mismatch, no_irr (the fast path found
+    no IRR), not_audited (the time_budget in seconds ran out first) or error (the deal
+    could not be priced; the exception is in the error column). With workers > 1
+    chunks of chunk_size deals are audited in parallel processes.
+    """
+    if isinstance(deals, pd.DataFrame):
+        deals = deals.to_dict("records")
+    deals = list(deals)
+    # Wall-clock time, so worker processes can check the same deadline
+    deadline = None if time_budget is None else time.time() + time_budget
+
+    fast = price_deals_isolated(deals, curve_store=curve_store)
+    # Deals that could not be priced are not audited, so one bad deal cannot break the curve lookup
+    priced = np.flatnonzero((fast["status"] != "error").to_numpy())
+    curves = np.empty((len(deals), len(TREASURY_MATURITIES)))
+    if priced.size:
+        curves[priced] = deal_curves([deals[position] for position in priced], curve_store)
+    tasks = []
+    for position in priced.tolist():
+        deal = deals[position]
+        offsets, amounts = deal_cashflow_schedule(deal)
+        tasks.append((position, (
+            offsets.tolist(), amounts.tolist(), float(deal["purchase_price"]), curves[position].tolist(),
+            _value_or(deal.get("spread"), DEFAULT_SPREAD), _value_or(deal.get("target_profit"), DEFAULT_TARGET_PROFIT),
+            float(fast["irr"].iloc[position]),
+        )))
+    chunks = [tasks[start:start + chunk_size] for start in range(0, len(tasks), chunk_size)]
+
+    audited = {}
+    if workers <= 1:
+        for chunk in chunks:
+            audited.update(_audit_chunk(chunk, precision, deadline))
+    else:
+        # At most two chunks per worker are queued, so nothing is handed out once the budget is spent
+        max_in_flight = 2 * workers
+        remaining = iter(chunks)
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            pending = set()
+            while True:
+                while len(pending) < max_in_flight and (deadline is None or time.time() < deadline):
+                    chunk = next(remaining, None)
+                    if chunk is None:
+                        break
+                    pending.add(executor.submit(_audit_chunk, chunk, precision, deadline))
+                if not pending:
+                    break
+                timeout = None if deadline is None else max(deadline - time.time(), 0.0)
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    audited.update(future.result())
+                if not done:
+                    break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    rows = []
+    for position, deal_id in enumerate(fast["deal_id"]):
+        fast_row = fast.iloc[position]
+        if fast_row["status"] == "error":
+            row = _compare(deal_id, fast_row, None)
+            rows.append({**row, "status": "error", "error": fast_row["error"]})
+        elif position in audited:
+            rows.append(_compare(deal_id, fast_row, audited[position]))
+        else:
+            row = _compare(deal_id, fast_row, None)
+            rows.append({**row, "status": "not_audited"})
+    return pd.DataFrame(rows, columns=AUDIT_COLUMNS)
@@ -0,0 +1,338 @@
+"""
+Batch deal pricing.
+
+price_deals() runs the same pipeline as the Financial Analysis tab
+(XIRR -> duration -> treasury interpolation -> wholesale price -> profit ->
+competitor quote -> competitive XIRR) for many deals at once. Each block of
+deals is laid out as padded 2-D arrays, one row per deal, so every step is a
+handful of NumPy operations regardless of how many deals are in the block.
+
+A deal is a mapping with:
+    groups          list of {"num_payments", "payment_amount",
+                    "first_payment_date", "frequency"} ("Monthly"/"Annual"),
+                    or a JSON string of that list
+    purchase_date   date, datetime or ISO string
+    purchase_price  float
+    treasury_rates  {maturity_years: rate} as decimals, e.g. {10: 0.042},
+                    or a JSON string of that mapping
+    spread          optional, defaults to 0.03
+    target_profit   optional, defaults to 2500
+    deal_id         optional, defaults to the deal's position
+    as_of           optional curve date when rates come from a curve store,
+                    defaults to purchase_date
+
+Flat records (one CSV row per deal) may instead carry a single group as
+num_payments / payment_amount / first_payment_date / frequency columns, and
+treasury rates as FRED series columns (DGS3MO ... DGS30) in percent.
+Deals with no rates at all are priced off a TreasuryCurveStore when one is given.
+"""
+import json
+import math
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from gal_calculator.breakeven import irr_guess
+from gal_calculator.curves import MATURITIES, SERIES_IDS, interpolate_discount_rate, treasury_bound_indices
+from gal_calculator.schedule import schedule_offsets
+from gal_calculator.xirr import (
+    DAYS_PER_YEAR,
+    HIGH_RATE,
+    LOW_RATE,
+    MAX_NEWTON_ITERATIONS,
+    NPV_TOLERANCE,
+    RATE_TOLERANCE,
+    solve_rate,
+)
+
+LEGAL_COSTS = 6000.0
+DEFAULT_SPREAD = 0.03
+DEFAULT_TARGET_PROFIT = 2500.0
+QUOTE_INCREMENT = 50
+MAX_BLOCK_CELLS = 2_000_000
+
+RESULT_COLUMNS = [
+    "deal_id", "num_payments", "total_payments", "irr", "irr_converged", "duration",
+    "lower_bound", "upper_bound", "lower_rate", "upper_rate", "discount_rate",
+    "wholesale_price", "profit", "competitor_quote", "competitor_profit", "competitive_irr",
+]
+
+
+def _to_date(value):
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.strip()[:10]).date()
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    # pandas.Timestamp and numpy.datetime64
+    return pd.Timestamp(value).date()
+
+
+def _deal_groups(deal):
+    groups = deal.get("groups")
+    if _is_missing(groups):
+        return [{
+            "num_payments": deal["num_payments"],
+            "payment_amount": deal["payment_amount"],
+            "first_payment_date": deal["first_payment_date"],
+            "frequency": deal.get("frequency") or "Monthly",
+        }]
+    if isinstance(groups, str):
+        groups = json.loads(groups)
+    return groups
+
+
+def deal_cashflow_schedule(deal):
+    """
+    Day offsets from the purchase date and payment amounts for one deal, sorted by date.
+    """
+    purchase_date = _to_date(deal["purchase_date"])
+    group_offsets = []
+    group_amounts = []
+    for group in _deal_groups(deal):
+        num_payments = int(group["num_payments"])
+        is_monthly = group.get("frequency", "Monthly") == "Monthly"
+        offsets, amounts = schedule_offsets(
+            num_payments, group["payment_amount"], _to_date(group["first_payment_date"]), is_monthly, purchase_date
+        )
+        group_offsets.append(offsets)
+        group_amounts.append(amounts)
+
+    offsets = np.concatenate(group_offsets)
+    amounts = np.concatenate(group_amounts)
+    order = np.argsort(offsets, kind="stable")
+    return offsets[order], amounts[order]
+
+
+def _treasury_row(deal):
+    treasury_rates = deal.get("treasury_rates")
+    if _is_missing(treasury_rates):
+        return np.array([_value_or(deal.get(series), np.nan) for series in SERIES_IDS], dtype=np.float64) / 100.0
+    if isinstance(treasury_rates, str):
+        treasury_rates = json.loads(treasury_rates)
+    by_maturity = {float(maturity): rate for maturity, rate in (treasury_rates or {}).items()}
+    return np.array([by_maturity.get(m, np.nan) for m in MATURITIES], dtype=np.float64)
+
+
+def deal_curves(deals, curve_store=None) -> np.ndarray:
+    """
+    (deals x maturities) Treasury curve matrix, taking deals without rates from
+    curve_store as of their as_of (or purchase) date.
+    """
+    curves = np.vstack([_treasury_row(deal) for deal in deals])
+    if curve_store is not None:
+        missing = np.flatnonzero(np.isnan(curves).all(axis=1))
+        if missing.size:
+            as_of_dates = [_to_date(_first_present(deals[i].get("as_of"), deals[i]["purchase_date"])) for i in missing]
+            curves[missing] = curve_store.curves(as_of_dates)
+    return curves
+
+
+def solve_rates(years, amounts, prices, guess=0.1):
+    """
+    Row-wise XIRR for padded (deals x payments) arrays with an outflow of `prices` at t=0.
+    Padding cells must have zero amounts. Returns (rates, converged); rows Newton cannot
+    settle are re-solved one at a time with the scalar Brent fallback.
+    """
+    num_rows = years.shape[0]
+    rates = np.broadcast_to(np.asarray(guess, dtype=np.float64), (num_rows,)).copy()
+    converged = np.zeros(num_rows, dtype=bool)
+    failed = np.zeros(num_rows, dtype=bool)
+    active = np.arange(num_rows)
+
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        for _ in range(MAX_NEWTON_ITERATIONS):
+            if active.size == 0:
+                break
+            rate = rates[active]
+            row_years = years[active]
+            weighted = amounts[active] * np.exp(-row_years * np.log1p(rate)[:, None])
+            npv = weighted.sum(axis=1) - prices[active]
+            derivative = -np.einsum("ij,ij->i", weighted, row_years) / (1.0 + rate)
+            step = npv / derivative
+            new_rate = rate - step
+
+            done = np.abs(npv) < NPV_TOLERANCE
+            settled = ~done & (np.abs(step) < RATE_TOLERANCE * np.maximum(1.0, np.abs(new_rate)))
+            diverged = ~done & ~settled & (
+                ~np.isfinite(new_rate) | (new_rate <= LOW_RATE) | (new_rate >= HIGH_RATE)
+            )
+            rates[active] = np.where(done, rate, new_rate)
+            converged[active[done | settled]] = True
+            failed[active[diverged]] = True
+            active = active[~(done | settled | diverged)]
+
+    failed[active] = True
+    for row in np.flatnonzero(failed):
+        mask = amounts[row] != 0
+        cashflows = np.concatenate(([-prices[row]], amounts[row, mask]))
+        row_years = np.concatenate(([0.0], years[row, mask]))
+        result = solve_rate(cashflows, row_years)
+        rates[row] = np.nan if result.rate is None else result.rate
+        converged[row] = result.converged
+    return rates, converged
+
+
+def _price_block(offsets_list, amounts_list, prices, curves, spreads, target_profits, guesses):
+    lengths = np.array([len(o) for o in offsets_list])
+    width = max(int(lengths.max()), 1)
+    mask = np.arange(width) < lengths[:, None]
+
+    years = np.zeros(mask.shape)
+    amounts = np.zeros(mask.shape)
+    years[mask] = np.concatenate(offsets_list) / DAYS_PER_YEAR
+    amounts[mask] = np.concatenate(amounts_list)
+
+    irr, irr_converged = solve_rates(years, amounts, prices, guess=guesses)
+
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        pv = amounts * np.exp(-years * np.log1p(irr)[:, None])
+        total_pv = pv.sum(axis=1)
+        duration = np.where(total_pv > 0, np.einsum("ij,ij->i", pv, years) / total_pv, 0.0)
+        duration[~np.isfinite(irr)] = np.nan
+
+        lower_idx, upper_idx = treasury_bound_indices(duration)
+        rows = np.arange(len(prices))
+        lower_bound = MATURITIES[lower_idx]
+        upper_bound = MATURITIES[upper_idx]
+        lower_rate = curves[rows, lower_idx]
+        upper_rate = curves[rows, upper_idx]
+        discount_rate = interpolate_discount_rate(duration, lower_bound, upper_bound, lower_rate, upper_rate, spreads)
+
+        future = (years >= 0) & mask
+        discounted = np.where(future, amounts * np.exp(-years * np.log1p(discount_rate)[:, None]), 0.0)
+        xnpv = -prices + discounted.sum(axis=1)
+        wholesale_price = np.where(lengths > 0, prices + xnpv, prices)
+
+    profit = wholesale_price - prices - LEGAL_COSTS
+    competitor_quote = np.ceil((prices + (profit - target_profits)) / QUOTE_INCREMENT) * QUOTE_INCREMENT
+    competitor_profit = wholesale_price - competitor_quote - LEGAL_COSTS
+    # A deal with no IRR has no quote; its competitive IRR is NaN rather than a solve on NaN cashflows
+    quoted = np.isfinite(competitor_quote)
+    competitive_irr = np.full(len(prices), np.nan)
+    if quoted.any():
+        competitive_irr[quoted], _ = solve_rates(years[quoted], amounts[quoted], competitor_quote[quoted],
+                                                 guess=irr_guess(years[quoted], amounts[quoted], irr[quoted], prices[quoted],
+                                                                 competitor_quote[quoted]))
+
+    return {
+        "num_payments": lengths,
+        "total_payments": amounts.sum(axis=1),
+        "irr": irr,
+        "irr_converged": irr_converged,
+        "duration": duration,
+        "lower_bound": lower_bound,
+        "upper_bound": upper_bound,
+        "lower_rate": lower_rate,
+        "upper_rate": upper_rate,
+        "discount_rate": discount_rate,
+        "wholesale_price": wholesale_price,
+        "profit": profit,
+        "competitor_quote": competitor_quote,
+        "competitor_profit": competitor_profit,
+        "competitive_irr": competitive_irr,
+    }
+
+
+def price_deals(deals, max_block_cells=MAX_BLOCK_CELLS, curve_store=None, warm_starts=None) -> pd.DataFrame:
+    """
+    Price a list (or DataFrame) of deals and return one result row per deal, in input order.
+
+    Deals without treasury rates take the curve_store's curve as of their as_of date
+    (or purchase date), so a portfolio can be priced for any historical date offline.
+
+    warm_starts (a gal_calculator.xirr.WarmStarts keyed by deal_id, sized for the book)
+    seeds each deal's XIRR with its last solved rate and is updated with the new rates,
+    so re-pricing a book after a small change converges in a few Newton steps.
+
+    Deals are grouped into blocks of similar schedule length so that padding stays
+    small and each block's arrays fit in roughly max_block_cells cells.
+    """
+    if isinstance(deals, pd.DataFrame):
+        deals = deals.to_dict("records")
+    deals = list(deals)
+    if not deals:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    schedules = [deal_cashflow_schedule(deal) for deal in deals]
+    prices = np.array([float(deal["purchase_price"]) for deal in deals])
+    curves = deal_curves(deals, curve_store)
+    spreads = np.array([_value_or(deal.get("spread"), DEFAULT_SPREAD) for deal in deals])
+    target_profits = np.array([_value_or(deal.get("target_profit"), DEFAULT_TARGET_PROFIT) for deal in deals])
+    deal_ids = [deal.get("deal_id", i) for i, deal in enumerate(deals)]
+    guesses = np.full(len(deals), 0.1)
+    if warm_starts is not None:
+        guesses = np.array([warm_starts.get(deal_id, 0.1) for deal_id in deal_ids])
+
+    lengths = np.array([len(offsets) for offsets, _ in schedules])
+    order = np.argsort(lengths, kind="stable")
+    sorted_lengths = np.maximum(lengths[order], 1)
+    columns = {}
+    start = 0
+    while start < len(order):
+        end = min(len(order), start + max(1, max_block_cells // sorted_lengths[start]))
+        while end - start > 1 and (end - start) * sorted_lengths[end - 1] > max_block_cells:
+            end = start + max(1, max_block_cells // sorted_lengths[end - 1])
+        block = order[start:end]
+        block_result = _price_block(
+            [schedules[i][0] for i in block],
+            [schedules[i][1] for i in block],
+            prices[block], curves[block], spreads[block], target_profits[block], guesses[block],
+        )
+        for name, values in block_result.items():
+            if name not in columns:
+                columns[name] = np.empty(len(deals), dtype=np.asarray(values).dtype)
+            columns[name][block] = values
+        start = end
+
+    result = pd.DataFrame(columns)
+    result.insert(0, "deal_id", deal_ids)
+    if warm_starts is not None:
+        for deal_id, rate in zip(deal_ids, columns["irr"]):
+            warm_starts.update(deal_id, rate)
+    return result[RESULT_COLUMNS]
+
+
+def price_deals_isolated(deals, curve_store=None) -> pd.DataFrame:
+    """
+    price_deals with a status column (ok, no_irr or error) after deal_id and an error
+    column at the end. If the deals fail as a whole they are priced one at a time, and a
+    deal that still fails gets status "error", the exception in the error column and NaN
+    results, so one malformed deal does not stop the rest.
+    """
+    if isinstance(deals, pd.DataFrame):
+        deals = deals.to_dict("records")
+    deals = list(deals)
+    try:
+        result = price_deals(deals, curve_store=curve_store)
+        result["error"] = ""
+    except Exception:
+        rows = []
+        for position, deal in enumerate(deals):
+            deal = {"deal_id": position, **deal}
+            try:
+                row = price_deals([deal], curve_store=curve_store)
+                row["error"] = ""
+            except Exception as error:
+                row = pd.DataFrame({"deal_id": [deal["deal_id"]], "error": [f"{type(error).__name__}: {error}"]})
+            rows.append(row)
+        result = pd.concat(rows, ignore_index=True).reindex(columns=RESULT_COLUMNS + ["error"])
+    status = pd.Series("ok", index=result.index)
+    status[pd.to_numeric(result["irr"]).isna()] = "no_irr"
+    status[result["error"] != ""] = "error"
+    result.insert(1, "status", status)
+    return result
+
+
+def _first_present(value, default):
+    return default if _is_missing(value) else value
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _value_or(value, default):
+    return default if _is_missing(value) else float(value)
@@ -0,0 +1,198 @@
+"""
+Inverse pricing: the purchase price that hits a target IRR, profit or discount rate.
+
+Every quantity in the pricing pipeline is a function of the deal's IRR r:
+the purchase price is the PV of the payments at r, the duration comes from the
+same discount vector, the Excel discount rate interpolates the curve at that
+duration and the wholesale price discounts the payments at that rate. So the
+solvers work in rate space on the precomputed year-fraction vector:
+
+    target IRR            closed form, price = PV at the target rate
+    target discount rate  Newton on r, starting at the target rate
+    target profit         Newton on r, warm-started at a known IRR
+
+with analytic derivatives, and never re-run XIRR. Functions take one deal
+(1-D years/amounts) or a block of deals as padded (deals x payments) arrays
+with zero-amount padding, as in gal_calculator.batch.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from gal_calculator.curves import MATURITIES, interpolate_discount_rate, treasury_bound_indices
+from gal_calculator.xirr import HIGH_RATE, LOW_RATE, MAX_NEWTON_ITERATIONS, RATE_TOLERANCE
+
+
+class BreakEven(NamedTuple):
+    """Purchase price meeting a target, with the IRR it implies."""
+    price: np.ndarray
+    irr: np.ndarray
+    converged: np.ndarray
+
+
+def _as_rows(years, amounts):
+    years = np.asarray(years, dtype=np.float64)
+    amounts = np.asarray(amounts, dtype=np.float64)
+    return np.atleast_2d(years), np.atleast_2d(amounts), years.ndim == 1
+
+
+def _as_column(values, num_rows):
+    return np.broadcast_to(np.asarray(values, dtype=np.float64), (num_rows,)).copy()
+
+
+def _as_curves(curves, num_rows):
+    """
+    (deals x maturities) curve matrix from a matrix, a single curve row or a {maturity: rate} mapping.
+    """
+    if isinstance(curves, dict):
+        by_maturity = {float(maturity): rate for maturity, rate in curves.items()}
+        curves = [by_maturity.get(m, np.nan) for m in MATURITIES]
+    return np.broadcast_to(np.asarray(curves, dtype=np.float64), (num_rows, len(MATURITIES)))
+
+
+def _result(price, irr, converged, single):
+    if single:
+        return BreakEven(float(price[0]), float(irr[0]), bool(converged[0]))
+    return BreakEven(price, irr, converged)
+
+
+def _irr_state(years, amounts, rate):
+    """
+    Row-wise PV and duration at rate, with their derivatives with respect to rate.
+    """
+    pv = amounts * np.exp(-years * np.log1p(rate)[:, None])
+    total_pv = pv.sum(axis=1)
+    time_weighted = np.einsum("ij,ij->i", pv, years)
+    time_squared_weighted = np.einsum("ij,ij->i", pv, years * years)
+    positive = total_pv > 0
+    safe_pv = np.where(positive, total_pv, 1.0)
+    duration = np.where(positive, time_weighted / safe_pv, 0.0)
+    d_total_pv = -time_weighted / (1.0 + rate)
+    d_duration = np.where(positive, -(time_squared_weighted / safe_pv - duration ** 2) / (1.0 + rate), 0.0)
+    return total_pv, d_total_pv, duration, d_duration
+
+
+def _discount_rate(duration, curves, spreads):
+    """
+    Excel discount rate at each duration and its slope with respect to duration.
+    """
+    lower_idx, upper_idx = treasury_bound_indices(duration)
+    rows = np.arange(len(duration))
+    lower_bound = MATURITIES[lower_idx]
+    upper_bound = MATURITIES[upper_idx]
+    lower_rate = curves[rows, lower_idx]
+    upper_rate = curves[rows, upper_idx]
+    rate = interpolate_discount_rate(duration, lower_bound, upper_bound, lower_rate, upper_rate, spreads)
+    flat = upper_bound == lower_bound
+    slope = np.where(flat, 0.0, (upper_rate - lower_rate) / np.where(flat, 1.0, upper_bound - lower_bound))
+    return rate, slope
+
+
+def _wholesale(years, amounts, discount_rate):
+    """
+    Wholesale price (PV of payments on or after the purchase date) and its derivative
+    with respect to the discount rate.
+    """
+    future = np.where(years >= 0, amounts, 0.0)
+    discounted = future * np.exp(-years * np.log1p(discount_rate)[:, None])
+    return discounted.sum(axis=1), -np.einsum("ij,ij->i", discounted, years) / (1.0 + discount_rate)
+
+
+def _newton(objective, rates):
+    """
+    Row-wise Newton on rate; objective(rows, rate) returns (value, derivative) for those rows.
+    Rows that leave (LOW_RATE, HIGH_RATE) or hit a zero derivative are left unconverged.
+    """
+    converged = np.zeros(len(rates), dtype=bool)
+    active = np.flatnonzero(np.isfinite(rates))
+    for _ in range(MAX_NEWTON_ITERATIONS):
+        if active.size == 0:
+            break
+        rate = rates[active]
+        value, derivative = objective(active, rate)
+        step = value / derivative
+        new_rate = rate - step
+        settled = np.abs(step) < RATE_TOLERANCE * np.maximum(1.0, np.abs(new_rate))
+        diverged = ~settled & (~np.isfinite(new_rate) | (new_rate <= LOW_RATE) | (new_rate >= HIGH_RATE))
+        rates[active] = np.where(diverged, np.nan, new_rate)
+        converged[active[settled]] = True
+        active = active[~(settled | diverged)]
+    rates[~converged] = np.nan
+    return rates, converged
+
+
+def price_for_irr(years, amounts, target_irr) -> BreakEven:
+    """
+    Purchase price at which the deal's XIRR equals target_irr (closed form).
+    """
+    years, amounts, single = _as_rows(years, amounts)
+    rate = _as_column(target_irr, len(years))
+    with np.errstate(over="ignore", invalid="ignore"):
+        price = (amounts * np.exp(-years * np.log1p(rate)[:, None])).sum(axis=1)
+    return _result(price, rate, np.isfinite(price), single)
+
+
+def price_for_discount_rate(years, amounts, curves, spread, target_rate, guess=None) -> BreakEven:
+    """
+    Purchase price at which the Excel discount rate (curve interpolated at the
+    duration, plus spread) equals target_rate. The discount rate only depends on
+    the price through the duration, so a flat stretch of curve has no solution
+    (or infinitely many) and yields NaN.
+    """
+    years, amounts, single = _as_rows(years, amounts)
+    num_rows = len(years)
+    curves = _as_curves(curves, num_rows)
+    spreads = _as_column(spread, num_rows)
+    targets = _as_column(target_rate, num_rows)
+
+    def objective(rows, rate):
+        _, _, duration, d_duration = _irr_state(years[rows], amounts[rows], rate)
+        discount_rate, slope = _discount_rate(duration, curves[rows], spreads[rows])
+        return discount_rate - targets[rows], slope * d_duration
+
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        irr, converged = _newton(objective, _as_column(targets if guess is None else guess, num_rows))
+        price = np.where(converged, _irr_state(years, amounts, np.nan_to_num(irr))[0], np.nan)
+    return _result(price, irr, converged, single)
+
+
+def price_for_profit(years, amounts, curves, spread, target_profit, guess=0.1, fixed_cost=6000) -> BreakEven:
+    """
+    Purchase price at which wholesale price - purchase price - fixed_cost equals target_profit.
+
+    calculate_competitor_quote adjusts the price linearly and holds the wholesale
+    price fixed; this accounts for the wholesale price moving with the duration.
+    Pass the deal's current IRR as guess and it converges in a few iterations.
+    """
+    years, amounts, single = _as_rows(years, amounts)
+    num_rows = len(years)
+    curves = _as_curves(curves, num_rows)
+    spreads = _as_column(spread, num_rows)
+    targets = _as_column(target_profit, num_rows) + fixed_cost
+
+    def objective(rows, rate):
+        row_years = years[rows]
+        row_amounts = amounts[rows]
+        price, d_price, duration, d_duration = _irr_state(row_years, row_amounts, rate)
+        discount_rate, slope = _discount_rate(duration, curves[rows], spreads[rows])
+        wholesale, d_wholesale = _wholesale(row_years, row_amounts, discount_rate)
+        return wholesale - price - targets[rows], d_wholesale * slope * d_duration - d_price
+
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        irr, converged = _newton(objective, _as_column(guess, num_rows))
+        price = np.where(converged, _irr_state(years, amounts, np.nan_to_num(irr))[0], np.nan)
+    return _result(price, irr, converged, single)
+
+
+def irr_guess(years, amounts, irr, price, new_price):
+    """
+    First-order estimate of the IRR at new_price from the IRR at price, for warm-starting
+    solve_rate / solve_rates when re-pricing at a nearby price (e.g. the competitor quote).
+    """
+    years, amounts, single = _as_rows(years, amounts)
+    rate = _as_column(irr, len(years))
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        _, d_price, _, _ = _irr_state(years, amounts, np.nan_to_num(rate))
+        guess = rate + (np.asarray(new_price, dtype=np.float64) - np.asarray(price, dtype=np.float64)) / d_price
+    guess = np.where(np.isfinite(guess) & (guess > LOW_RATE) & (guess < HIGH_RATE), guess, np.nan_to_num(rate, nan=0.1))
+    return float(guess[0]) if single else guess
@@ -0,0 +1,274 @@
+"""
+Command-line entry points for headless work.
+
+    python -m gal_calculator reprice deals.csv priced.csv --workers 16 --chunk-size 20000
+    python -m gal_calculator audit filings.csv audit.csv --workers 8 --time-budget 600
+    python -m gal_calculator reports docket.csv reports/ --workers 8
+
+Input and output may be CSV or Parquet (chosen by file extension; Parquet needs pyarrow).
+See gal_calculator.batch for the deal columns.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_CHUNK_SIZE = 10_000
+MAX_REPORTED_FAILURES = 10
+
+
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+def read_deal_chunks(path, chunk_size):
+    """
+    Yield DataFrames of at most chunk_size deals without loading the whole file.
+    """
+    import pandas as pd
+
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype={"groups": str, "treasury_rates": str, "cause_number": str})
+
+
+class ChunkWriter:
+    """
+    Appends result chunks to a CSV or Parquet file as they arrive.
+    Chunks go to a hidden temporary file beside path, which is renamed to path by close()
+    once the run is complete; abort() deletes it, so a failed run never leaves a partial
+    file under the final name.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory, name = os.path.split(os.path.abspath(path))
+        self.temp_path = os.path.join(directory, f".{name}.partial")
+        self._parquet_writer = None
+        self._wrote_csv_header = False
+
+    def write(self, frame):
+        if _is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.temp_path, table.schema)
+            elif not table.schema.equals(self._parquet_writer.schema):
+                # A chunk with failed deals has NaN where other chunks have integers
+                table = table.cast(self._parquet_writer.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            frame.to_csv(self.temp_path, mode="a" if self._wrote_csv_header else "w",
+                         header=not self._wrote_csv_header, index=False)
+            self._wrote_csv_header = True
+
+    def _close_parquet(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def close(self):
+        self._close_parquet()
+        if os.path.exists(self.temp_path):
+            os.replace(self.temp_path, self.path)
+
+    def abort(self):
+        self._close_parquet()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+_curve_stores = {}
+
+
+def _load_curve_store(path):
+    """
+    One memory-mapped curve store per process and snapshot.
+    """
+    if path not in _curve_stores:
+        from gal_calculator.curves import TreasuryCurveStore
+
+        _curve_stores[path] = TreasuryCurveStore.from_snapshot(path)
+    return _curve_stores[path]
+
+
+def _price_chunk(chunk, curves_path=None):
+    """
+    Worker: price one chunk and report how long it took and on which process.
+    """
+    from gal_calculator.batch import price_deals_isolated
+
+    start = time.perf_counter()
+    curve_store = _load_curve_store(curves_path) if curves_path else None
+    result = price_deals_isolated(chunk, curve_store)
+    return result, time.perf_counter() - start, os.getpid()
+
+
+def reprice(input_path, output_path, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, curves_path=None, out=sys.stdout):
+    """
+    Re-price every deal in input_path across a process pool, streaming results to output_path.
+    At most two chunks per worker are in flight, so memory stays flat for any file size.
+    Deals without treasury rates are priced off the curves_path snapshot as of their purchase date.
+    A deal that cannot be priced gets status "error" and its exception in the error column; the
+    rest of the run carries on. Returns (deals written, deals with errors).
+    """
+    if curves_path:
+        # Build the memory-map cache once up front instead of racing in every worker
+        _load_curve_store(curves_path)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * workers
+    worker_deals = {}
+    worker_seconds = {}
+    total_deals = 0
+    next_deal_id = 0
+    started = time.perf_counter()
+
+    failed_deals = []
+    writer = ChunkWriter(output_path)
+    pending = deque()
+
+    def drain_one():
+        nonlocal total_deals
+        result, seconds, pid = pending.popleft().result()
+        writer.write(result)
+        total_deals += len(result)
+        for row in result[result["status"] == "error"].itertuples():
+            failed_deals.append((row.deal_id, row.error))
+        worker_deals[pid] = worker_deals.get(pid, 0) + len(result)
+        worker_seconds[pid] = worker_seconds.get(pid, 0.0) + seconds
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk in read_deal_chunks(input_path, chunk_size):
+                if "deal_id" not in chunk.columns:
+                    chunk.insert(0, "deal_id", range(next_deal_id, next_deal_id + len(chunk)))
+                next_deal_id += len(chunk)
+                pending.append(executor.submit(_price_chunk, chunk, curves_path))
+                if len(pending) >= max_in_flight:
+                    drain_one()
+            while pending:
+                drain_one()
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Priced {total_deals:,} deals in {elapsed:.2f}s "
+          f"({total_deals / elapsed if elapsed else 0:,.0f} deals/sec, {workers} workers)", file=out)
+    for pid in sorted(worker_deals):
+        rate = worker_deals[pid] / worker_seconds[pid] if worker_seconds[pid] else 0.0
+        print(f"  worker {pid}: {worker_deals[pid]:,} deals, {rate:,.0f} deals/sec", file=out)
+    if failed_deals:
+        print(f"{len(failed_deals):,} deals could not be priced (status \"error\" in {output_path}):", file=out)
+        for deal_id, error in failed_deals[:MAX_REPORTED_FAILURES]:
+            print(f"  {deal_id}: {error}", file=out)
+    return total_deals, len(failed_deals)
+
+
+def audit(input_path, output_path, precision, workers=None, time_budget=None, curves_path=None, out=sys.stdout):
+    """
+    Cross-check every deal in input_path against the Decimal audit path and write the
+    comparison to output_path. A deal that cannot be priced gets status "error" and its
+    exception in the error column; the rest are still audited. Returns the number of deals
+    that did not match, were not audited or could not be priced.
+    """
+    import pandas as pd
+
+    from gal_calculator.audit import audit_deals
+
+    if _is_parquet(input_path):
+        deals = pd.read_parquet(input_path)
+    else:
+        deals = pd.read_csv(input_path, dtype={"groups": str, "treasury_rates": str, "cause_number": str})
+    curve_store = _load_curve_store(curves_path) if curves_path else None
+    workers = workers or os.cpu_count() or 1
+
+    started = time.perf_counter()
+    result = audit_deals(deals, precision=precision, workers=workers, time_budget=time_budget, curve_store=curve_store)
+    elapsed = time.perf_counter() - started
+    writer = ChunkWriter(output_path)
+    try:
+        writer.write(result)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+
+    counts = result["status"].value_counts()
+    print(f"Audited {len(result):,} deals at {precision} digits in {elapsed:.2f}s: "
+          + ", ".join(f"{counts.get(status, 0):,} {status}"
+                       for status in ("match", "mismatch", "no_irr", "not_audited", "error")), file=out)
+    for row in result[result["status"] == "mismatch"].itertuples():
+        print(f"  {row.deal_id}: {row.mismatched_fields}", file=out)
+    failed = result[result["status"] == "error"]
+    if len(failed):
+        print(f"{len(failed):,} deals could not be priced (status \"error\" in {output_path}):", file=out)
+        for row in failed.head(MAX_REPORTED_FAILURES).itertuples():
+            print(f"  {row.deal_id}: {row.error}", file=out)
+    return int(counts.get("mismatch", 0) + counts.get("not_audited", 0) + len(failed))
+
+
+def reports(input_path, output_dir, workers=None, out=sys.stdout):
+    """
+    Render a .docx report for every case record in input_path into output_dir.
+    See gal_calculator.documents for the record columns.
+    """
+    from gal_calculator.documents import render_reports
+
+    def records():
+        for chunk in read_deal_chunks(input_path, DEFAULT_CHUNK_SIZE):
+            yield from chunk.to_dict("records")
+
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    paths = render_reports(records(), output_dir, workers=workers)
+    elapsed = time.perf_counter() - started
+    print(f"Rendered {len(paths):,} reports to {output_dir} in {elapsed:.2f}s "
+          f"({len(paths) / elapsed if elapsed else 0:,.0f} reports/sec, {workers} workers)", file=out)
+    return len(paths)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gal_calculator", description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reprice_parser = commands.add_parser("reprice", help="Re-price a CSV/Parquet file of deals")
+    reprice_parser.add_argument("input", help="CSV or Parquet file of deal definitions")
+    reprice_parser.add_argument("output", help="CSV or Parquet file to write results to")
+    reprice_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    reprice_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Deals per chunk")
+    reprice_parser.add_argument("--curves", default=None, help="FRED Treasury snapshot (CSV/Parquet) for deals without rates")
+
+    audit_parser = commands.add_parser("audit", help="Cross-check deals against exact Decimal arithmetic")
+    audit_parser.add_argument("input", help="CSV or Parquet file of deal definitions")
+    audit_parser.add_argument("output", help="CSV or Parquet file to write the comparison to")
+    audit_parser.add_argument("--precision", type=int, default=34, help="Decimal digits of precision")
+    audit_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    audit_parser.add_argument("--time-budget", type=float, default=None, help="Stop auditing after this many seconds")
+    audit_parser.add_argument("--curves", default=None, help="FRED Treasury snapshot (CSV/Parquet) for deals without rates")
+
+    reports_parser = commands.add_parser("reports", help="Render .docx reports for a docket of cases")
+    reports_parser.add_argument("input", help="CSV or Parquet file of case records")
+    reports_parser.add_argument("output_dir", help="Directory to write the .docx files to")
+    reports_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+
+    args = parser.parse_args(argv)
+    if args.command == "reprice":
+        _, failures = reprice(args.input, args.output, workers=args.workers, chunk_size=args.chunk_size, curves_path=args.curves)
+        return 1 if failures else 0
+    elif args.command == "audit":
+        failures = audit(args.input, args.output, args.precision, workers=args.workers,
+                         time_budget=args.time_budget, curves_path=args.curves)
+        return 1 if failures else 0
+    elif args.command == "reports":
+        reports(args.input, args.output_dir, workers=args.workers)
+    return 0
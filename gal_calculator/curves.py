@@ -0,0 +1,173 @@
+"""
+Treasury curve store.
+
+Loads dated constant-maturity Treasury curves (FRED DGS3MO ... DGS30) from a
+local CSV or Parquet snapshot, e.g. one downloaded from
+https://fred.stlouisfed.org. The first column holds the observation date;
+rates are in percent as FRED publishes them ("." marks a missing value).
+
+The parsed snapshot is written next to the source as two .npy files and
+memory-mapped on later loads, so opening a decades-long history is instant
+and shared between processes. Lookups are as-of: the curve for date D is the
+latest observation on or before D, found with a binary search.
+"""
+import os
+from datetime import date, datetime
+
+import numpy as np
+
+from gal_calculator.pricing import TREASURY_MATURITIES, TREASURY_SERIES
+
+MATURITIES = np.array(TREASURY_MATURITIES, dtype=np.float64)
+SERIES_IDS = [TREASURY_SERIES[maturity]["series_id"] for maturity in TREASURY_MATURITIES]
+_EPOCH_ORDINAL = 719163  # date(1970, 1, 1).toordinal()
+
+
+def treasury_bound_indices(durations):
+    """
+    Vectorized find_treasury_bounds: indices into MATURITIES for each duration.
+    Durations at or beyond 30 years map to (30, 30); at or below 3 months to (0.25, 0.5).
+    """
+    durations = np.asarray(durations, dtype=np.float64)
+    last = len(MATURITIES) - 1
+    upper = np.searchsorted(MATURITIES, durations, side="left")
+    upper = np.clip(upper, 1, last)
+    lower = upper - 1
+    capped = durations >= MATURITIES[-1]
+    lower[capped] = last
+    upper[capped] = last
+    return lower, upper
+
+
+def interpolate_discount_rate(durations, lower_bound, upper_bound, lower_rate, upper_rate, spread):
+    """
+    Vectorized calculate_excel_discount_rate.
+    """
+    flat = upper_bound == lower_bound
+    width = np.where(flat, 1.0, upper_bound - lower_bound)
+    interpolated = (durations - lower_bound) / width * (upper_rate - lower_rate) + lower_rate + spread
+    return np.where(flat, lower_rate + spread, interpolated)
+
+
+def _day_number(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip()[:10])
+    if isinstance(value, (date, datetime)):
+        return value.toordinal() - _EPOCH_ORDINAL
+    return int(np.datetime64(value, "D").astype(np.int64))
+
+
+def _read_snapshot(path):
+    """
+    Parse a FRED-style snapshot into sorted day numbers and a (dates x maturities) rate matrix.
+    """
+    import pandas as pd
+
+    if os.path.splitext(path)[1].lower() in (".parquet", ".pq"):
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.read_csv(path, na_values=["."])
+
+    dates = pd.to_datetime(frame.iloc[:, 0]).to_numpy(dtype="datetime64[D]").astype(np.int64)
+    columns = {str(column).upper(): column for column in frame.columns}
+    rates = np.full((len(frame), len(SERIES_IDS)), np.nan)
+    for i, series_id in enumerate(SERIES_IDS):
+        if series_id in columns:
+            rates[:, i] = pd.to_numeric(frame[columns[series_id]], errors="coerce").to_numpy() / 100.0
+
+    order = np.argsort(dates, kind="stable")
+    dates = dates[order]
+    # Carry the last observation forward over holidays and series gaps
+    rates = pd.DataFrame(rates[order]).ffill().to_numpy()
+    return dates, rates
+
+
+class TreasuryCurveStore:
+    """
+    Dated Treasury curves indexed by observation date.
+    """
+
+    def __init__(self, dates, rates):
+        self.dates = dates
+        self.rates = rates
+
+    @classmethod
+    def from_snapshot(cls, path, use_cache=True):
+        """
+        Load a snapshot, memory-mapping the cached arrays when they are newer than the source.
+        """
+        dates_path = path + ".dates.npy"
+        rates_path = path + ".rates.npy"
+        source_mtime = os.path.getmtime(path)
+        if use_cache and all(os.path.exists(p) and os.path.getmtime(p) >= source_mtime for p in (dates_path, rates_path)):
+            return cls(np.load(dates_path, mmap_mode="r"), np.load(rates_path, mmap_mode="r"))
+
+        dates, rates = _read_snapshot(path)
+        if use_cache:
+            try:
+                np.save(dates_path, dates)
+                np.save(rates_path, rates)
+            except OSError:
+                return cls(dates, rates)
+            return cls(np.load(dates_path, mmap_mode="r"), np.load(rates_path, mmap_mode="r"))
+        return cls(dates, rates)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def first_date(self):
+        return date.fromordinal(int(self.dates[0]) + _EPOCH_ORDINAL)
+
+    @property
+    def last_date(self):
+        return date.fromordinal(int(self.dates[-1]) + _EPOCH_ORDINAL)
+
+    def _rows(self, as_of_days):
+        rows = np.searchsorted(self.dates, as_of_days, side="right") - 1
+        if np.any(rows < 0):
+            raise KeyError(f"No Treasury curve on or before the requested date (snapshot starts {self.first_date})")
+        return rows
+
+    def observation_date(self, as_of):
+        """
+        Date of the observation used for an as-of lookup on as_of.
+        """
+        row = self._rows(np.array([_day_number(as_of)]))[0]
+        return date.fromordinal(int(self.dates[row]) + _EPOCH_ORDINAL)
+
+    def curve(self, as_of):
+        """
+        {maturity_years: rate} as decimals, in the format price_deals accepts for treasury_rates.
+        """
+        row = self._rows(np.array([_day_number(as_of)]))[0]
+        return dict(zip(TREASURY_MATURITIES, (float(rate) for rate in self.rates[row])))
+
+    def curves(self, as_of_dates) -> np.ndarray:
+        """
+        (n x maturities) rate matrix for many as-of dates at once.
+        """
+        days = np.array([_day_number(d) for d in as_of_dates], dtype=np.int64)
+        return np.asarray(self.rates[self._rows(days)])
+
+    def rate(self, maturity, as_of):
+        """
+        Rate for a single maturity (one of the FRED constant maturities) on as_of.
+        """
+        return self.curve(as_of)[maturity]
+
+    def interpolated_rates(self, durations, as_of_dates):
+        """
+        Treasury rate for each (duration, date) pair using the same bounds and linear
+        interpolation as the Excel discount-rate formula, without the spread.
+        Returns (rates, lower_bounds, upper_bounds).
+        """
+        durations = np.asarray(durations, dtype=np.float64)
+        curves = self.curves(as_of_dates)
+        lower_idx, upper_idx = treasury_bound_indices(durations)
+        rows = np.arange(len(durations))
+        lower_bound = MATURITIES[lower_idx]
+        upper_bound = MATURITIES[upper_idx]
+        rates = interpolate_discount_rate(durations, lower_bound, upper_bound,
+                                          curves[rows, lower_idx], curves[rows, upper_idx], 0.0)
+        return rates, lower_bound, upper_bound
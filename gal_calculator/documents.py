@@ -0,0 +1,268 @@
+"""
+Word (.docx) rendering of Guardian Ad Litem reports, singly or in bulk.
+
+render_docx() turns the report text the Report Creation tab produces
+(blank-line separated paragraphs, **bold** spans, a centred caption down to
+the report title) into a formatted Word document. The page setup and styles
+are built once per process as a ReportTemplate and reused for every report.
+
+render_reports() renders a docket of case records across a process pool.
+Workers write each finished document straight to the output directory, and
+at most two chunks per worker are in flight, so memory stays flat however
+many reports there are.
+
+A case record is a batch deal (see gal_calculator.batch; it supplies the
+payment details for the Facts section) plus:
+    cause_number, factoring_company, courthouse, payee_name, application_title
+    exhibits        list of exhibit names, or a JSON list / ";"-separated string
+    prior_times     optional number of prior appointments for the Payee
+    facts           optional notes from the client call (Facts paragraph 1)
+    analysis        optional findings for the Analysis section of the templates that have one
+    template        optional report template option, defaults to the first
+"""
+import io
+import json
+import os
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from gal_calculator.batch import _deal_groups, _is_missing, _to_date
+from gal_calculator.reports import (
+    combine_facts,
+    format_exhibits_list,
+    generate_paragraph_2_from_financial_data,
+    generate_report,
+    get_report_template_options,
+    prior_appointment_sentence,
+)
+from gal_calculator.schedule import PaymentSchedule, schedule_arrays
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+DEFAULT_RENDER_CHUNK = 25
+FONT_NAME = "Times New Roman"
+FONT_SIZE_PT = 12
+MARGIN_INCHES = 1.0
+CAPTION_END = "REPORT OF GUARDIAN AD LITEM"
+DOCUMENT_PART = "word/document.xml"
+
+_BOLD_SPAN = re.compile(r"\*\*(.+?)\*\*")
+_UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9._-]+")
+
+_report_template = None
+
+
+class ReportTemplate:
+    """
+    The report page setup and styles, built once and reused for every report.
+
+    Everything in a .docx except word/document.xml is the same for every report,
+    so the package is kept pre-compressed without that part; rendering replaces
+    the paragraphs of one loaded document, serializes just its body and appends it.
+    """
+
+    def __init__(self):
+        import docx
+        from docx.shared import Inches, Pt
+
+        self.document = docx.Document()
+        for section in self.document.sections:
+            section.top_margin = section.bottom_margin = Inches(MARGIN_INCHES)
+            section.left_margin = section.right_margin = Inches(MARGIN_INCHES)
+        normal = self.document.styles["Normal"]
+        normal.font.name = FONT_NAME
+        normal.font.size = Pt(FONT_SIZE_PT)
+        normal.paragraph_format.space_after = Pt(FONT_SIZE_PT)
+
+        saved = io.BytesIO()
+        self.document.save(saved)
+        package = io.BytesIO()
+        with zipfile.ZipFile(saved) as source, zipfile.ZipFile(package, "w", zipfile.ZIP_DEFLATED) as target:
+            for info in source.infolist():
+                if info.filename != DOCUMENT_PART:
+                    target.writestr(info, source.read(info))
+        self.package = package.getvalue()
+
+    def render(self, report_text) -> bytes:
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+        from docx.opc.oxml import serialize_part_xml
+        from docx.oxml.ns import qn
+
+        body = self.document.element.body
+        for paragraph in body.findall(qn("w:p")):
+            body.remove(paragraph)
+        for lines, centred in report_blocks(report_text):
+            paragraph = self.document.add_paragraph()
+            if centred:
+                paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            for line_number, line in enumerate(lines):
+                if line_number:
+                    paragraph.add_run().add_break()
+                # split() alternates plain text and the contents of **bold** spans
+                for position, text in enumerate(_BOLD_SPAN.split(line)):
+                    if text:
+                        paragraph.add_run(text).bold = position % 2 == 1
+
+        buffer = io.BytesIO(self.package)
+        with zipfile.ZipFile(buffer, "a", zipfile.ZIP_DEFLATED) as package:
+            package.writestr(DOCUMENT_PART, serialize_part_xml(self.document.element))
+        return buffer.getvalue()
+
+
+def _template():
+    """The report template, built once per process."""
+    global _report_template
+    if _report_template is None:
+        _report_template = ReportTemplate()
+    return _report_template
+
+
+def report_blocks(report_text):
+    """
+    [(lines, centred)] for each paragraph of a report, with the f-string indentation removed.
+    The caption (cause number down to the report title) is centred.
+    """
+    blocks = []
+    lines = []
+    in_caption = True
+    for line in report_text.splitlines() + [""]:
+        line = line.strip()
+        if line:
+            lines.append(line)
+            continue
+        if lines:
+            blocks.append((lines, in_caption))
+            if any(CAPTION_END in block_line for block_line in lines):
+                in_caption = False
+            lines = []
+    return blocks
+
+
+def render_docx(report_text) -> bytes:
+    """A report as .docx bytes, ready to download or write to disk."""
+    return _template().render(report_text)
+
+
+def financial_state(deal):
+    """
+    The Financial Analysis keys generate_paragraph_2_from_financial_data reads, for a batch deal.
+    """
+    state = {"financial_complete": True, "purchase_price": float(deal["purchase_price"])}
+    schedule_groups = []
+    groups = _deal_groups(deal)
+    for group_num, group in enumerate(groups):
+        num_payments = int(group["num_payments"])
+        frequency = group.get("frequency") or "Monthly"
+        first_payment_date = _to_date(group["first_payment_date"])
+        dates, _ = schedule_arrays(num_payments, float(group["payment_amount"]), first_payment_date, frequency == "Monthly")
+        state[f"financial_payments_{group_num}"] = num_payments
+        state[f"financial_amount_{group_num}"] = float(group["payment_amount"])
+        state[f"financial_frequency_{group_num}"] = frequency
+        state[f"financial_first_date_{group_num}"] = dates[0].item()
+        state[f"financial_last_date_{group_num}"] = dates[-1].item()
+        schedule_groups.append((num_payments, float(group["payment_amount"]), first_payment_date, frequency == "Monthly"))
+    schedule = PaymentSchedule.from_groups(schedule_groups, _to_date(deal["purchase_date"]))
+    state["num_groups"] = len(groups)
+    state["total_aggregate"] = schedule.total
+    state["payment_schedule"] = schedule
+    return state
+
+
+def _text(record, field):
+    value = record.get(field)
+    return "" if _is_missing(value) else str(value).strip()
+
+
+def _exhibits(value):
+    if _is_missing(value) or value == "":
+        return []
+    if isinstance(value, str):
+        value = json.loads(value) if value.lstrip().startswith("[") else value.split(";")
+    return [exhibit.strip() for exhibit in value if exhibit and exhibit.strip()]
+
+
+def report_text(record):
+    """The report text for one case record, as the Report Creation tab would generate it."""
+    prior_times = record.get("prior_times")
+    paragraph_2 = ""
+    if not _is_missing(record.get("purchase_price")):
+        paragraph_2 = generate_paragraph_2_from_financial_data(financial_state(record))
+    return generate_report(
+        _text(record, "template") or get_report_template_options()[0], _text(record, "cause_number"), _text(record, "factoring_company"), _text(record, "courthouse"),
+        _text(record, "payee_name"), _text(record, "application_title"),
+        format_exhibits_list(_exhibits(record.get("exhibits"))),
+        prior_appointment_sentence(0 if _is_missing(prior_times) else int(prior_times)),
+        combine_facts(_text(record, "facts"), paragraph_2),
+        analysis=_text(record, "analysis"),
+    )
+
+
+def report_filename(record, position):
+    """GAL Report <cause number>.docx, falling back to the record's position."""
+    cause_number = _UNSAFE_FILENAME.sub("_", _text(record, "cause_number")).strip("_")
+    return f"GAL Report {cause_number or position}.docx"
+
+
+def _render_chunk(chunk, output_dir):
+    """Worker: render and write one chunk of (position, filename, record); returns (position, path)."""
+    written = []
+    for position, filename, record in chunk:
+        path = os.path.join(output_dir, filename)
+        with open(path, "wb") as f:
+            f.write(render_docx(report_text(record)))
+        written.append((position, path))
+    return written
+
+
+def _unique_filename(record, position, taken):
+    """
+    report_filename(), with " (2)", " (3)", ... added when an earlier record of the run
+    already has the name. Names are compared case-insensitively, as Windows and macOS do.
+    """
+    filename = report_filename(record, position)
+    stem, extension = os.path.splitext(filename)
+    copy = 1
+    while filename.lower() in taken:
+        copy += 1
+        filename = f"{stem} ({copy}){extension}"
+    taken.add(filename.lower())
+    return filename
+
+
+def _chunks(records, chunk_size):
+    chunk = []
+    taken = set()
+    for position, record in enumerate(records):
+        chunk.append((position, _unique_filename(record, position, taken), record))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def render_reports(records, output_dir, workers=1, chunk_size=DEFAULT_RENDER_CHUNK) -> list:
+    """
+    Render every case record to a .docx in output_dir and return the paths in record order.
+    Records whose cause numbers give the same file name get " (2)", " (3)", ... added.
+    records may be any iterable (e.g. rows streamed from a file); with workers > 1 chunks of
+    chunk_size records are rendered in parallel processes.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    # Build the template before the pool starts so forked workers inherit it
+    _template()
+    written = {}
+    if workers <= 1:
+        for chunk in _chunks(records, chunk_size):
+            written.update(_render_chunk(chunk, output_dir))
+    else:
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk in _chunks(records, chunk_size):
+                pending.append(executor.submit(_render_chunk, chunk, output_dir))
+                if len(pending) >= 2 * workers:
+                    written.update(pending.popleft().result())
+            while pending:
+                written.update(pending.popleft().result())
+    return [written[position] for position in sorted(written)]
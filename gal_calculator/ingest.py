@@ -0,0 +1,170 @@
+"""
+Streaming import of annuity-issuer payment schedules (CSV or Excel).
+
+Issuer statements list one payment per row, with irregular dates, step-ups
+and COLA increases that do not fit uniform payment groups. read_schedule()
+reads the file in chunks of rows, converts each chunk straight into a
+datetime64[D] date array and a float64 amount array, validates them, and
+sorts the concatenated arrays once. The result is the same pair of arrays
+the pricing kernels take. No Python object is kept per payment. openpyxl
+hands back Excel cells a row at a time, so an Excel chunk passes through
+one tuple per row, holding only the cells from the date column to the
+amount column, before it becomes arrays.
+
+The date and amount columns are found by header name, e.g. "Payment Date"
+and "Payment Amount", or they can be named explicitly. Dates may be
+ISO 8601 (2026-01-15), m/d/Y (1/15/2026 or 01/15/26) or written out
+(January 15, 2026), mixed freely within a file; every chunk tries the same
+DATE_FORMATS in the same order, so the result does not depend on the chunk
+size. Amounts may be written as currency ("$1,250.00"). Blank rows are
+skipped. A row with an
+unreadable date, or an amount that is missing, zero or negative, is
+rejected with its spreadsheet row number.
+"""
+import os
+from itertools import islice
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_ROWS = 5_000
+DATE_COLUMNS = ("payment date", "payment_date", "due date", "due_date", "date")
+AMOUNT_COLUMNS = ("payment amount", "payment_amount", "amount", "payment", "gross payment")
+# Tried in order; Excel date cells arrive as datetimes and parse as ISO 8601
+DATE_FORMATS = ("ISO8601", "%m/%d/%Y", "%m/%d/%y", "%B %d, %Y")
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+MAX_REPORTED_ROWS = 5
+
+
+class ScheduleImportError(ValueError):
+    """The file is not a usable payment schedule; the message says why."""
+
+
+class ImportedSchedule(NamedTuple):
+    """A payment schedule sorted by date."""
+    dates: np.ndarray  # datetime64[D]
+    amounts: np.ndarray  # float64
+
+    def offsets(self, purchase_date) -> np.ndarray:
+        """int32 day offsets from purchase_date, as gal_calculator.schedule.schedule_offsets returns them."""
+        return (self.dates - np.datetime64(purchase_date, "D")).astype(np.int32)
+
+
+def _find_column(columns, requested, candidates, kind):
+    by_name = {str(column).strip().lower(): column for column in columns if column is not None}
+    if requested is not None:
+        if requested.strip().lower() not in by_name:
+            raise ScheduleImportError(f"No {kind} column named {requested!r}; the columns are {list(by_name.values())}")
+        return by_name[requested.strip().lower()]
+    for candidate in candidates:
+        if candidate in by_name:
+            return by_name[candidate]
+    raise ScheduleImportError(f"Could not find a {kind} column (looked for {', '.join(candidates)}); "
+                              f"the columns are {list(by_name.values())}")
+
+
+def _parse_dates(dates):
+    """
+    datetime64[D] array of a chunk's dates, trying each of DATE_FORMATS on the entries no earlier
+    format could read; NaT where none fits.
+    """
+    parsed = np.full(len(dates), np.datetime64("NaT"), dtype="datetime64[D]")
+    remaining = dates.notna().to_numpy(copy=True)
+    for date_format in DATE_FORMATS:
+        if not remaining.any():
+            break
+        attempt = pd.to_datetime(dates[remaining], format=date_format, errors="coerce").to_numpy().astype("datetime64[D]")
+        parsed[remaining] = attempt
+        remaining[remaining] = np.isnat(attempt)
+    return parsed
+
+
+def _chunk_arrays(dates, amounts, first_row):
+    """
+    Validated datetime64[D] and float64 arrays for one chunk; first_row is the spreadsheet row of its first entry.
+    """
+    dates = pd.Series(dates)
+    amounts = pd.Series(amounts)
+    if not pd.api.types.is_numeric_dtype(amounts):
+        amounts = amounts.astype("string").str.replace(r"[$,\s]", "", regex=True).replace("", None)
+    amounts = pd.to_numeric(amounts, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    blank_dates = dates.isna().to_numpy() | (dates.astype("string").str.strip() == "").fillna(True).to_numpy()
+    parsed = _parse_dates(dates.where(~blank_dates))
+
+    # Rows with neither a date nor an amount are blank lines and are skipped
+    keep = ~(blank_dates & np.isnan(amounts))
+    bad = keep & (np.isnat(parsed) | ~(amounts > 0) | ~np.isfinite(amounts))
+    if bad.any():
+        rows = (np.flatnonzero(bad)[:MAX_REPORTED_ROWS] + first_row).tolist()
+        raise ScheduleImportError(f"Row(s) {', '.join(map(str, rows))} need a valid date and a positive amount")
+    return parsed[keep], amounts[keep]
+
+
+def _csv_chunks(source, date_column, amount_column, chunk_rows):
+    header = pd.read_csv(source, nrows=0).columns
+    if hasattr(source, "seek"):
+        source.seek(0)
+    date_column = _find_column(header, date_column, DATE_COLUMNS, "date")
+    amount_column = _find_column(header, amount_column, AMOUNT_COLUMNS, "amount")
+    # Row 1 is the header, so the first payment is on spreadsheet row 2
+    first_row = 2
+    for chunk in pd.read_csv(source, usecols=[date_column, amount_column], chunksize=chunk_rows,
+                             dtype={date_column: str}, skip_blank_lines=False):
+        yield _chunk_arrays(chunk[date_column], chunk[amount_column], first_row)
+        first_row += len(chunk)
+
+
+def _excel_chunks(source, date_column, amount_column, chunk_rows):
+    """
+    Rows of the first worksheet, read in openpyxl's streaming mode. Only the cells between the
+    date and amount columns are read, and each chunk of rows becomes one 2-D object array.
+    """
+    try:
+        import openpyxl
+    except ImportError:
+        raise ScheduleImportError("Reading Excel files needs the openpyxl package; upload the schedule as a CSV instead") from None
+
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        header_row = 0
+        for header_row, header in enumerate(sheet.iter_rows(values_only=True), start=1):
+            if any(cell is not None for cell in header):
+                break
+        else:
+            raise ScheduleImportError("The worksheet is empty")
+        date_index = list(header).index(_find_column(header, date_column, DATE_COLUMNS, "date"))
+        amount_index = list(header).index(_find_column(header, amount_column, AMOUNT_COLUMNS, "amount"))
+
+        first_index = min(date_index, amount_index)
+        width = max(date_index, amount_index) - first_index + 1
+        rows = sheet.iter_rows(min_row=header_row + 1, min_col=first_index + 1, max_col=first_index + width, values_only=True)
+        first_row = header_row + 1
+        while True:
+            chunk = list(islice(rows, chunk_rows))
+            if not chunk:
+                break
+            cells = np.empty((len(chunk), width), dtype=object)
+            cells[:] = chunk
+            yield _chunk_arrays(cells[:, date_index - first_index], cells[:, amount_index - first_index], first_row)
+            first_row += len(chunk)
+    finally:
+        workbook.close()
+
+
+def read_schedule(source, filename=None, date_column=None, amount_column=None,
+                  chunk_rows=DEFAULT_CHUNK_ROWS) -> ImportedSchedule:
+    """
+    Read a CSV or Excel payment schedule from a path or file object, chunk_rows rows at a time.
+    filename (default: the path) decides the format by extension. Raises ScheduleImportError.
+    """
+    filename = filename or (source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", ""))
+    is_excel = os.path.splitext(str(filename))[1].lower() in EXCEL_EXTENSIONS
+    chunks = list((_excel_chunks if is_excel else _csv_chunks)(source, date_column, amount_column, chunk_rows))
+    dates = np.concatenate([chunk_dates for chunk_dates, _ in chunks]) if chunks else np.empty(0, "datetime64[D]")
+    if not dates.size:
+        raise ScheduleImportError("The schedule has no payments")
+    amounts = np.concatenate([chunk_amounts for _, chunk_amounts in chunks])
+    order = np.argsort(dates, kind="stable")
+    return ImportedSchedule(dates[order], amounts[order])
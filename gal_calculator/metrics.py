@@ -0,0 +1,91 @@
+"""
+Fused deal metrics kernel.
+
+The year-fraction vector is built once per deal and one discount-factor
+vector per rate; PV, PV x t, duration, convexity, DV01 and XNPV all come
+from those vectors instead of separate per-payment loops.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from gal_calculator.xirr import DAYS_PER_YEAR
+
+BASIS_POINT = 0.0001
+
+
+class DurationMetrics(NamedTuple):
+    """Per-payment PV detail and sensitivities at a single rate."""
+    present_values: np.ndarray
+    time_weighted_pvs: np.ndarray
+    total_pv: float
+    total_time_weighted_pv: float
+    duration: float
+    modified_duration: float
+    convexity: float
+    dv01: float
+
+
+class DealMetrics(NamedTuple):
+    """Everything the Financial Analysis tab shows for a priced deal."""
+    years: np.ndarray
+    amounts: np.ndarray
+    at_irr: DurationMetrics
+    xnpv_payments: float
+    xnpv: float
+
+
+def year_fraction_vector(offsets) -> np.ndarray:
+    """
+    Day offsets from the purchase date as Excel-style year fractions (days / 365).
+    """
+    return np.asarray(offsets, dtype=np.float64) / DAYS_PER_YEAR
+
+
+def discount_factors(years, rate) -> np.ndarray:
+    """
+    (1 + rate) ** -years for every payment.
+    """
+    return np.exp(-years * np.log1p(rate))
+
+
+def duration_metrics(years, amounts, rate) -> DurationMetrics:
+    """
+    Macaulay duration (as in calculate_duration), modified duration, convexity and DV01 at rate.
+    Duration is 0 when the total PV is not positive, matching calculate_duration.
+    """
+    present_values = amounts * discount_factors(years, rate)
+    time_weighted_pvs = present_values * years
+    total_pv = float(present_values.sum())
+    total_time_weighted_pv = float(time_weighted_pvs.sum())
+
+    if total_pv > 0:
+        duration = total_time_weighted_pv / total_pv
+        convexity = float(time_weighted_pvs @ (years + 1.0)) / total_pv / (1.0 + rate) ** 2
+    else:
+        duration = 0.0
+        convexity = 0.0
+    modified_duration = duration / (1.0 + rate)
+    dv01 = modified_duration * total_pv * BASIS_POINT
+
+    return DurationMetrics(present_values, time_weighted_pvs, total_pv, total_time_weighted_pv,
+                           duration, modified_duration, convexity, dv01)
+
+
+def xnpv_of_payments(years, amounts, rate) -> float:
+    """
+    PV of the payments on or after the purchase date (the XNPV terms in calculate_wholesale_price).
+    """
+    future = years >= 0
+    return float(amounts[future] @ discount_factors(years[future], rate))
+
+
+def deal_metrics(years, amounts, purchase_price, irr_rate, discount_rate) -> DealMetrics:
+    """
+    Duration detail at the deal's IRR and XNPV at the Excel discount rate in one call.
+    """
+    years = np.asarray(years, dtype=np.float64)
+    amounts = np.asarray(amounts, dtype=np.float64)
+    xnpv_payments = xnpv_of_payments(years, amounts, discount_rate)
+    return DealMetrics(years, amounts, duration_metrics(years, amounts, irr_rate),
+                       xnpv_payments, -purchase_price + xnpv_payments)
@@ -0,0 +1,194 @@
+"""
+Life-contingent valuation: payments that stop when the Payee dies.
+
+A MortalityTable holds annual death probabilities q(x) by age, read from an
+SOA-style CSV (one row per age, one column per table). The table shipped in
+gal_calculator/data is ILLUSTRATIVE ONLY (a Gompertz-Makeham law, not a
+published table); pass a licensed table's CSV for real use. Deaths are
+spread uniformly within each year of age, so the survival curve is linear
+between birthdays.
+
+value_life_contingent() prices a deal two ways:
+
+    Monte Carlo   Each simulated path draws a death time by inverting the
+                  survival curve. Payments are received in date order, so a
+                  path's row of the paths x payments survival matrix is a
+                  run of ones and is fully described by how many payments it
+                  receives. Paths are drawn in chunks and only a histogram of
+                  those counts is kept. 100,000 paths over a 600-payment
+                  schedule take milliseconds and a few MB.
+                  PV, profit and IRR then come from prefix sums of the
+                  schedule, one IRR per distinct count.
+    Closed form   The expected cashflow of each payment is amount x
+                  survival probability. Its PV, IRR and profit are the
+                  expected-value cross-check for the simulation.
+"""
+import os
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from gal_calculator.batch import LEGAL_COSTS, MAX_BLOCK_CELLS, solve_rates
+from gal_calculator.xirr import solve_rate
+
+ILLUSTRATIVE_TABLE_PATH = os.path.join(os.path.dirname(__file__), "data", "illustrative_mortality.csv")
+DEFAULT_PATHS = 100_000
+DEFAULT_CHUNK_PATHS = 25_000
+IRR_PERCENTILES = (5, 25, 50, 75, 95)
+TOTAL_LOSS_RATE = -1.0
+
+
+class MortalityTable:
+    """
+    Annual death probabilities by whole age; q(x) for the last age is taken as 1.
+    """
+
+    def __init__(self, ages, death_probabilities, name=""):
+        ages = np.asarray(ages, dtype=np.int64)
+        if ages.size == 0 or np.any(np.diff(ages) != 1):
+            raise ValueError("A mortality table needs one row per age, with no gaps")
+        death_probabilities = np.asarray(death_probabilities, dtype=np.float64)
+        if np.any((death_probabilities < 0) | (death_probabilities > 1)):
+            raise ValueError("Death probabilities must be between 0 and 1")
+        self.first_age = int(ages[0])
+        self.death_probabilities = death_probabilities.copy()
+        self.death_probabilities[-1] = 1.0
+        self.name = name
+
+    @classmethod
+    def from_csv(cls, path=ILLUSTRATIVE_TABLE_PATH, column="male"):
+        """One q(x) column of a mortality table CSV."""
+        tables = read_mortality_tables(path)
+        if column not in tables:
+            raise ValueError(f"No mortality column named {column!r}; the columns are {list(tables)}")
+        return tables[column]
+
+    @property
+    def illustrative(self) -> bool:
+        return self.name.startswith("illustrative")
+
+    def survival_curve(self, age):
+        """Probability of being alive at each whole year after age; ends with 0."""
+        if not self.first_age <= age < self.first_age + len(self.death_probabilities):
+            raise ValueError(f"Age {age} is outside the mortality table")
+        alive = np.cumprod(1.0 - self.death_probabilities[int(age) - self.first_age:])
+        return np.concatenate(([1.0], alive))
+
+    def survival(self, age, years):
+        """Probability that someone aged age is alive years from now (uniform deaths within a year)."""
+        curve = self.survival_curve(age)
+        return np.interp(years, np.arange(curve.size), curve, right=0.0)
+
+    def death_times(self, age, uniforms):
+        """Years until death for each uniform draw, by inverting the survival curve."""
+        curve = self.survival_curve(age)
+        return np.interp(uniforms, curve[::-1], np.arange(curve.size, dtype=np.float64)[::-1])
+
+
+def read_mortality_tables(path=ILLUSTRATIVE_TABLE_PATH) -> dict:
+    """
+    {column: MortalityTable} for every q(x) column of a CSV with an age column;
+    lines starting with # are comments.
+    """
+    table = pd.read_csv(path, comment="#")
+    if "age" not in table.columns:
+        raise ValueError(f"A mortality table needs an age column; the columns are {list(table.columns)}")
+    name = os.path.splitext(os.path.basename(str(path)))[0]
+    return {column: MortalityTable(table["age"], table[column], name=f"{name} ({column})")
+            for column in table.columns if column != "age"}
+
+
+class LifeContingentValuation(NamedTuple):
+    """Life-contingent value of a deal; expected_* figures are Monte Carlo means."""
+    paths: int
+    num_payments: int
+    expected_payments: float
+    expected_pv: float
+    pv_standard_error: float
+    expected_profit: float
+    probability_of_loss: float
+    probability_payments_exceed_price: float
+    irr_percentiles: dict
+    closed_form_pv: float
+    closed_form_profit: float
+    closed_form_irr: Optional[float]
+    table_name: str
+    illustrative: bool
+
+
+def _prefix_irrs(years, amounts, purchase_price, counts, guess):
+    """IRR of the first `count` payments for each count, in blocks of at most MAX_BLOCK_CELLS cells."""
+    irrs = np.full(counts.size, TOTAL_LOSS_RATE)
+    # A path that receives nothing has lost the whole price, as has one whose IRR is below -99%
+    solvable = np.flatnonzero(counts > 0)
+    rows_per_block = max(1, MAX_BLOCK_CELLS // max(years.size, 1))
+    for start in range(0, solvable.size, rows_per_block):
+        rows = solvable[start:start + rows_per_block]
+        width = int(counts[rows].max())
+        row_years = np.broadcast_to(years[:width], (rows.size, width))
+        row_amounts = np.where(np.arange(width) < counts[rows, None], amounts[:width], 0.0)
+        rates, _ = solve_rates(row_years, row_amounts, np.full(rows.size, float(purchase_price)), guess)
+        irrs[rows] = np.where(np.isnan(rates), TOTAL_LOSS_RATE, rates)
+    return irrs
+
+
+def _weighted_percentiles(values, weights, percentiles):
+    """Percentiles of values (sorted ascending) repeated weights times."""
+    cumulative = np.cumsum(weights)
+    positions = np.searchsorted(cumulative, np.asarray(percentiles) / 100.0 * cumulative[-1], side="left")
+    return {int(p): float(values[min(i, values.size - 1)]) for p, i in zip(percentiles, positions)}
+
+
+def value_life_contingent(years, amounts, purchase_price, discount_rate, table, age, paths=DEFAULT_PATHS,
+                          chunk_paths=DEFAULT_CHUNK_PATHS, seed=None, irr_guess=0.1,
+                          fixed_cost=LEGAL_COSTS) -> LifeContingentValuation:
+    """
+    Monte Carlo and closed-form value of payments at year fractions years, made only while a
+    Payee aged age is alive. PV and profit use discount_rate (the deal's wholesale discount rate).
+    """
+    order = np.argsort(years, kind="stable")
+    years = np.asarray(years, dtype=np.float64)[order]
+    amounts = np.asarray(amounts, dtype=np.float64)[order]
+
+    # Histogram of how many payments each path receives, drawn chunk by chunk
+    rng = np.random.default_rng(seed)
+    received_counts = np.zeros(years.size + 1, dtype=np.int64)
+    for start in range(0, paths, chunk_paths):
+        death_times = table.death_times(age, rng.random(min(chunk_paths, paths - start)))
+        received_counts += np.bincount(np.searchsorted(years, death_times, side="left"), minlength=years.size + 1)
+
+    counts = np.arange(years.size + 1)
+    weights = received_counts / paths
+    path_pvs = np.cumsum(np.concatenate(([0.0], amounts * np.exp(-years * np.log1p(discount_rate)))))
+    expected_pv = float(weights @ path_pvs)
+    pv_variance = float(weights @ (path_pvs - expected_pv) ** 2)
+    profits = path_pvs - purchase_price - fixed_cost
+
+    observed = received_counts > 0
+    irrs = _prefix_irrs(years, amounts, purchase_price, counts[observed], irr_guess)
+
+    # Closed form: discount the expected cashflows
+    survival = table.survival(age, years)
+    expected_amounts = amounts * survival
+    closed_form_pv = float(expected_amounts @ np.exp(-years * np.log1p(discount_rate)))
+    closed_form_irr = solve_rate(np.concatenate(([-float(purchase_price)], expected_amounts)),
+                                 np.concatenate(([0.0], years)), guess=irr_guess).rate
+
+    return LifeContingentValuation(
+        paths=paths,
+        num_payments=int(years.size),
+        expected_payments=float(weights @ counts),
+        expected_pv=expected_pv,
+        pv_standard_error=(pv_variance / paths) ** 0.5,
+        expected_profit=expected_pv - purchase_price - fixed_cost,
+        probability_of_loss=float(weights[profits < 0].sum()),
+        # The Payee's side: keeping the payments would have been worth more than the lump sum
+        probability_payments_exceed_price=float(weights[path_pvs > purchase_price].sum()),
+        irr_percentiles=_weighted_percentiles(irrs, received_counts[observed], IRR_PERCENTILES),
+        closed_form_pv=closed_form_pv,
+        closed_form_profit=closed_form_pv - purchase_price - fixed_cost,
+        closed_form_irr=closed_form_irr,
+        table_name=table.name,
+        illustrative=table.illustrative,
+    )
@@ -0,0 +1,128 @@
+"""
+Lightweight timing spans and counters for the pricing and report hot paths.
+
+    profiler = Profiler(enabled=True)
+    with profiler.span("schedule"):
+        ...
+    profiler.count("xirr_iterations", result.iterations)
+
+A disabled profiler hands back one shared no-op context manager and ignores
+counts, so instrumented code costs a method call and an attribute check per
+span. Events are kept per rerun (the Streamlit script run they belong to) in
+a bounded buffer, per-rerun counters only for the reruns still in that
+buffer, plus running session totals, so a long session's memory stays flat.
+Both can be summarised or exported as JSON lines for aggregation across
+sessions.
+"""
+import json
+import time
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+
+MAX_EVENTS = 10_000
+
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "started")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Profiler:
+    """
+    Collects span timings and counters for one session.
+    """
+
+    def __init__(self, enabled=False, session_id=None, max_events=MAX_EVENTS):
+        self.enabled = enabled
+        self.session_id = session_id
+        self.rerun = 0
+        self.events = deque(maxlen=max_events)
+        # (rerun, name) -> value, oldest rerun first
+        self.counters = OrderedDict()
+        self.session_counters = {}
+
+    def start_rerun(self):
+        """Mark the start of a new script run; later events belong to it."""
+        self.rerun += 1
+        # Drop the counters of reruns whose events have left the buffer
+        oldest = self.events[0][0] if self.events else self.rerun
+        while self.counters and next(iter(self.counters))[0] < oldest:
+            self.counters.popitem(last=False)
+
+    def span(self, name):
+        """Context manager timing the enclosed block under name."""
+        return _Span(self, name) if self.enabled else _NULL_SPAN
+
+    def record(self, name, seconds):
+        if self.enabled:
+            self.events.append((self.rerun, time.time(), name, seconds))
+
+    def count(self, name, value=1):
+        """Add value to a per-rerun counter (e.g. solver iterations, cache hits)."""
+        if self.enabled:
+            key = (self.rerun, name)
+            self.counters[key] = self.counters.get(key, 0) + value
+            self.session_counters[name] = self.session_counters.get(name, 0) + value
+
+    def summary(self, rerun=None):
+        """
+        Per-stage latency rows ({stage, calls, total_ms, mean_ms, max_ms}), slowest first,
+        for one rerun or the whole session.
+        """
+        stages = {}
+        for event_rerun, _, name, seconds in self.events:
+            if rerun is None or event_rerun == rerun:
+                stages.setdefault(name, []).append(seconds * 1000)
+        rows = [{
+            "stage": name,
+            "calls": len(values),
+            "total_ms": sum(values),
+            "mean_ms": sum(values) / len(values),
+            "max_ms": max(values),
+        } for name, values in stages.items()]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def counter_totals(self, rerun=None):
+        """{counter: value} for one rerun or summed over the session."""
+        if rerun is None:
+            return dict(self.session_counters)
+        totals = {}
+        for (counter_rerun, name), value in self.counters.items():
+            if counter_rerun == rerun:
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def records(self, rerun=None):
+        """
+        One dict per span event and per counter, tagged with the session id and rerun.
+        """
+        for event_rerun, timestamp, name, seconds in self.events:
+            if rerun is None or event_rerun == rerun:
+                yield {"session": self.session_id, "rerun": event_rerun, "timestamp": timestamp,
+                       "type": "span", "name": name, "ms": round(seconds * 1000, 4)}
+        for (counter_rerun, name), value in self.counters.items():
+            if rerun is None or counter_rerun == rerun:
+                yield {"session": self.session_id, "rerun": counter_rerun,
+                       "type": "counter", "name": name, "value": value}
+
+    def to_jsonl(self, rerun=None):
+        """records() as JSON lines."""
+        return "".join(json.dumps(record) + "\n" for record in self.records(rerun))
+
+    def append_jsonl(self, path, rerun=None):
+        """Append one rerun's records (default: the current one) to a JSON lines file."""
+        with open(path, "a") as f:
+            f.write(self.to_jsonl(self.rerun if rerun is None else rerun))
@@ -0,0 +1,285 @@
+"""
+Report text generation for the Report Creation tab.
+Reads financial results from a session-state-like mapping, so it has no Streamlit dependency.
+
+Every report template is source text for gal_calculator.templates, compiled
+on first use. The slots are cause_number, payee_name, courthouse,
+factoring_company, application_title, exhibits, prior_sentence, facts,
+analysis and life_analysis. The FACTS section appears only when facts is
+non-blank, and the Life-Contingent template's valuation paragraph only when
+life_analysis is. analysis holds the Guardian Ad Litem's own findings for the
+case; the templates state no case facts themselves.
+"""
+from functools import lru_cache
+
+from gal_calculator.templates import compile_template
+
+# Template lines are indented as the original f-string produced them, so reports read exactly as before
+_CAPTION_AND_SOURCES = """CAUSE NO. {cause_number}
+    
+    **IN RE:**
+    
+    **{payee_name}**
+    
+    **{courthouse}**
+    
+    **REPORT OF GUARDIAN AD LITEM**
+    
+    This report, as requested by the Court, analyzes the circumstances of the proposed transfer of structured settlement payment rights by and between {payee_name} ("the Payee"), and {factoring_company} ("the Transferee") and the proposed Transferee's compliance with Chapter 141 of the Civil Practice and Remedies Code.
+    
+    **SOURCES CONSULTED:**
+    
+    I received an unredacted copy of the {application_title}, which included as Exhibits: {exhibits}. {prior_sentence}{#facts}
+    
+    **FACTS:**
+    
+    {facts}{/facts}"""
+
+_BEST_INTEREST_STANDARD = """Under Section 141.004 of the Civil Practice and Remedies Code, the Court may approve the transfer only if it finds that the transfer is in the best interest of the Payee, taking into account the welfare and support of the Payee's dependents."""
+
+REPORT_TEMPLATES = {
+    "Libertarian Approach - Recommend": _CAPTION_AND_SOURCES,
+    "Beginning Slippery Slope - Hesitantly Recommend": _CAPTION_AND_SOURCES + """
+    
+    **ANALYSIS:**
+    
+    """ + _BEST_INTEREST_STANDARD + """{#analysis} {analysis}{/analysis} I am concerned that selling future payments to meet present needs can become a pattern, and that each transfer leaves the Payee with less of the long-term security the structured settlement was designed to provide.
+    
+    **RECOMMENDATION:**
+    
+    With some hesitation, I recommend that the Court find that the transfer is in the best interest of the Payee and approve it. I would urge the Court to view any further application to transfer the Payee's remaining payments with caution.""",
+    "Negative - Do Not Recommend": _CAPTION_AND_SOURCES + """
+    
+    **ANALYSIS:**
+    
+    """ + _BEST_INTEREST_STANDARD + """ Based on my review, I am unable to conclude that this standard is met.{#analysis} {analysis}{/analysis}
+    
+    **RECOMMENDATION:**
+    
+    I recommend that the Court find that the transfer is not in the best interest of the Payee and deny the application.""",
+    "Life-Contingent Payments - Never Recommend": _CAPTION_AND_SOURCES + """
+    
+    **ANALYSIS:**
+    
+    """ + _BEST_INTEREST_STANDARD + """ The payments the Payee proposes to transfer are life-contingent: they are owed only for as long as the Payee is living. They exist to provide support for the rest of the Payee's life, and a single lump sum cannot replace that support if the Payee outlives it. Because the Transferee receives nothing for any payment that falls due after the Payee's death, the price offered is also discounted for that mortality risk, so the Payee bears its cost as well.{#life_analysis}
+    
+    {life_analysis}{/life_analysis}
+    
+    **RECOMMENDATION:**
+    
+    Because the payments are life-contingent, I recommend that the Court find that the transfer is not in the best interest of the Payee and deny the application.""",
+}
+
+
+def get_report_template_options():
+    """
+    Return the available report template options
+    """
+    return list(REPORT_TEMPLATES)
+
+
+@lru_cache(maxsize=None)
+def get_report_template(template_name):
+    """
+    The compiled template for a report template option; raises KeyError for an unknown one
+    """
+    return compile_template(REPORT_TEMPLATES[template_name])
+
+
+def generate_report(template_name, cause_number, factoring_company, courthouse, payee_name, application_title, formatted_exhibits, prior_sentence, facts_paragraph="", life_analysis="", analysis=""):
+    """
+    Generate a report from any of the report templates
+    analysis is the Guardian Ad Litem's findings, used by the templates that have an Analysis section
+    """
+    return get_report_template(template_name).render({
+        "cause_number": cause_number,
+        "factoring_company": factoring_company,
+        "courthouse": courthouse,
+        "payee_name": payee_name,
+        "application_title": application_title.title(),
+        "exhibits": formatted_exhibits,
+        "prior_sentence": prior_sentence,
+        "facts": facts_paragraph,
+        "analysis": analysis,
+        "life_analysis": life_analysis,
+    })
+
+
+def generate_libertarian_approach_report(cause_number, factoring_company, courthouse, payee_name, application_title, formatted_exhibits, prior_sentence, facts_paragraph=""):
+    """
+    Generate the 'Libertarian Approach - Recommend' template report
+    This is the original template that was already built
+    """
+    return generate_report("Libertarian Approach - Recommend", cause_number, factoring_company, courthouse, payee_name,
+                           application_title, formatted_exhibits, prior_sentence, facts_paragraph)
+
+
+def combine_facts(paragraph_1, paragraph_2):
+    """
+    The FACTS section text: the client call notes followed by the payment details, either of which may be blank
+    """
+    return "\n\n".join(paragraph.strip() for paragraph in (paragraph_1, paragraph_2) if paragraph.strip())
+
+
+def prior_appointment_sentence(prior_times):
+    """
+    Sentence noting earlier Guardian Ad Litem appointments for the Payee (empty when there were none)
+    """
+    if not prior_times:
+        return ""
+    if prior_times == 1:
+        return "A review of my files indicated that I had previously been appointed as Guardian Ad Litem for Payee in one prior case. "
+    return f"A review of my files indicated that I previously had been appointed as Guardian Ad Litem for Payee in {prior_times} prior cases. "
+
+
+def _expected_payments_phrase(expected_payments, num_payments):
+    """'about 4.3 of the 5 payments', 'about 212 of the 360 payments' or 'nearly all 360 payments'"""
+    rounded = f"{expected_payments:,.1f}" if expected_payments < 10 else f"{expected_payments:,.0f}"
+    if float(rounded.replace(",", "")) >= num_payments:
+        return f"nearly all {num_payments:,} payments"
+    return f"about {rounded} of the {num_payments:,} payments"
+
+
+def generate_life_contingent_analysis(state):
+    """
+    Paragraph for the Life-Contingent template summarizing the mortality-weighted valuation
+    stored under 'life_valuation' by the Financial Analysis tab (empty when there is none)
+    """
+    valuation = state.get('life_valuation')
+    if not valuation:
+        return ""
+    table = "an illustrative mortality table" if valuation['illustrative'] else f"the {valuation['table_name']} mortality table"
+    if valuation['num_payments'] == 1:
+        received = (f"a Payee aged {valuation['age']} has about a {valuation['expected_payments']:.0%} chance of living "
+                    f"to receive the payment")
+        payments = "the payment has"
+        kept = "the payment"
+    else:
+        received = (f"a Payee aged {valuation['age']} can be expected to live to receive "
+                    f"{_expected_payments_phrase(valuation['expected_payments'], valuation['num_payments'])}")
+        payments = "the payments have"
+        kept = "the payments"
+    return (f"Using {table}, {received}. Weighted by the probability that the Payee "
+            f"is living when each payment falls due, {payments} an expected present value of ${valuation['expected_pv']:,.2f} "
+            f"at a wholesale discount rate of {valuation['wholesale_discount_rate']:.2%} (the Treasury rate for the payments' duration plus a spread), "
+            f"compared to the ${valuation['purchase_price']:,.2f} "
+            f"offered. In {valuation['probability_payments_exceed_price']:.0%} of {valuation['paths']:,} simulated lifetimes, "
+            f"the Payee would have received more than the lump sum, in present value at that rate, by keeping {kept}.")
+
+
+def generate_paragraph_2_from_financial_data(state):
+    """
+    Generate paragraph 2 using financial data from session state
+    (any mapping with the keys the Financial Analysis tab stores)
+    Handles both single payment and multi-group scenarios
+    """
+    if not state.get('financial_complete', False):
+        return ""
+
+    num_groups = state.get('num_groups', 1)
+    total_aggregate = state.get('total_aggregate', 0)
+    purchase_price = state.get('purchase_price', 0)
+
+    # The deal's PaymentSchedule
+    schedule = state.get('payment_schedule')
+
+    # Schedule imported from the issuer's statement
+    if state.get('schedule_imported', False):
+        first_payment_date = schedule.first_date.strftime('%B %d, %Y')
+        last_payment_date = schedule.last_date.strftime('%B %d, %Y')
+        return f"The Payee is seeking to sell {len(schedule)} payments beginning on {first_payment_date} and continuing through {last_payment_date}, as set out in the payment schedule provided by the annuity issuer. These {len(schedule)} payments aggregate to an amount of ${total_aggregate:,.2f}. In exchange, it is proposed that the Payee receive a single lump-sum payment of ${purchase_price:,.2f}."
+
+    # Single payment scenario
+    if num_groups == 1:
+        # Get the single payment date
+        if schedule is not None and len(schedule):
+            first_payment_date = schedule.first_date.strftime('%B %d, %Y')
+            return f"The Payee is seeking to sell a lump sum payment in the amount of ${total_aggregate:,.2f} due on {first_payment_date} in exchange for a present lump sum payment of ${purchase_price:,.2f}."
+        else:
+            return f"The Payee is seeking to sell a lump sum payment in the amount of ${total_aggregate:,.2f} in exchange for a present lump sum payment of ${purchase_price:,.2f}."
+
+    # Multi-group scenario
+    else:
+        payment_descriptions = []
+        total_payments = 0
+
+        for group_num in range(num_groups):
+            # Get group data from session state
+            num_payments = state.get(f"financial_payments_{group_num}", 1)
+            payment_amount = state.get(f"financial_amount_{group_num}", 0)
+
+            # Get frequency
+            if num_payments > 1:
+                frequency = state.get(f"financial_frequency_{group_num}", "Monthly")
+                frequency_text = frequency.lower()
+            else:
+                frequency_text = "lump sum"
+
+            # Get dates
+            # A lump sum group has no last payment date input
+            first_date = state.get(f"financial_first_date_{group_num}")
+            last_date = state.get(f"financial_last_date_{group_num}") if num_payments > 1 else first_date
+
+            if first_date and last_date:
+                first_date_str = first_date.strftime('%B %d, %Y')
+                last_date_str = last_date.strftime('%B %d, %Y')
+
+                if num_payments == 1:
+                    description = f"a lump sum payment of ${payment_amount:,.2f} due on {first_date_str}"
+                elif first_date == last_date:
+                    description = f"{num_payments} {frequency_text} payments of ${payment_amount:,.2f} each due on {first_date_str}"
+                else:
+                    description = f"{num_payments} {frequency_text} payments of ${payment_amount:,.2f} each beginning on {first_date_str} and continuing through {last_date_str}"
+
+                payment_descriptions.append(description)
+                total_payments += num_payments
+
+        # Combine descriptions with proper grammar
+        if not payment_descriptions:
+            return ""
+        elif len(payment_descriptions) == 1:
+            combined_descriptions = payment_descriptions[0]
+        elif len(payment_descriptions) == 2:
+            combined_descriptions = f"{payment_descriptions[0]} and {payment_descriptions[1]}"
+        else:
+            combined_descriptions = "; ".join(payment_descriptions[:-1]) + f"; and {payment_descriptions[-1]}"
+
+        return f"The Payee is seeking to sell {combined_descriptions}. These {total_payments} payments aggregate to an amount of ${total_aggregate:,.2f}. In exchange, it is proposed that the Payee receive a single lump-sum payment of ${purchase_price:,.2f}."
+
+
+def format_exhibits_list(exhibits):
+    """
+    Format the exhibits list with proper articles (a/an) and conjunctions
+    Converts all exhibits to title case for proper formatting
+    """
+    if not exhibits:
+        return ""
+
+    if len(exhibits) == 1:
+        exhibit = exhibits[0].strip().title()
+        if exhibit.lower()[0] in 'aeiou':
+            return f"an {exhibit}"
+        else:
+            return f"a {exhibit}"
+
+    formatted_exhibits = []
+    for i, exhibit in enumerate(exhibits):
+        exhibit = exhibit.strip().title()
+        if not exhibit:
+            continue
+
+        if i == len(exhibits) - 1:  # Last exhibit
+            if exhibit.lower()[0] in 'aeiou':
+                formatted_exhibits.append(f"and an {exhibit}")
+            else:
+                formatted_exhibits.append(f"and a {exhibit}")
+        else:
+            if exhibit.lower()[0] in 'aeiou':
+                formatted_exhibits.append(f"an {exhibit}")
+            else:
+                formatted_exhibits.append(f"a {exhibit}")
+
+    if len(formatted_exhibits) == 1:
+        return formatted_exhibits[0]
+    else:
+        return "; ".join(formatted_exhibits[:-1]) + "; " + formatted_exhibits[-1]
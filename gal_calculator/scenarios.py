@@ -0,0 +1,116 @@
+"""
+Scenario and sensitivity grids over spread x Treasury shift x purchase price.
+
+XIRR and duration depend only on the purchase price, so they are solved once
+per price (vectorized across prices). The wholesale price depends only on
+the resulting discount rate, so it is evaluated once per distinct rate as a
+single matrix-vector product against the precomputed year-fraction vector.
+No cell of the grid runs its own solver.
+"""
+import numpy as np
+import pandas as pd
+
+from gal_calculator.batch import DEFAULT_TARGET_PROFIT, LEGAL_COSTS, QUOTE_INCREMENT, solve_rates
+from gal_calculator.curves import MATURITIES, interpolate_discount_rate, treasury_bound_indices
+
+MAX_BLOCK_CELLS = 2_000_000
+RATE_DEDUPE_DECIMALS = 12
+
+SCENARIO_COLUMNS = [
+    "purchase_price", "spread", "treasury_shift", "irr", "duration", "discount_rate",
+    "wholesale_price", "profit", "competitor_quote",
+]
+
+
+def complete_curve(treasury_rates):
+    """
+    Rates for every Treasury maturity from a possibly partial {maturity: rate} mapping.
+    Missing maturities are linearly interpolated between the known ones and held flat
+    beyond them, so a two-point curve from the rate inputs still covers every duration.
+    """
+    known = {float(m): r for m, r in treasury_rates.items() if r is not None and not np.isnan(r)}
+    if not known:
+        raise ValueError("At least one Treasury rate is required")
+    maturities = np.array(sorted(known))
+    return np.interp(MATURITIES, maturities, [known[m] for m in maturities])
+
+
+def wholesale_prices(years, amounts, discount_rates, max_block_cells=MAX_BLOCK_CELLS):
+    """
+    PV of the payments on or after the purchase date at each discount rate.
+    Rates that agree to 1e-12 share one evaluation.
+    """
+    future = years >= 0
+    years = years[future]
+    amounts = amounts[future]
+    rates = np.asarray(discount_rates, dtype=np.float64)
+    unique_rates, inverse = np.unique(np.round(rates, RATE_DEDUPE_DECIMALS), return_inverse=True)
+
+    values = np.empty(len(unique_rates))
+    block = max(1, max_block_cells // max(len(years), 1))
+    for start in range(0, len(unique_rates), block):
+        log_base = np.log1p(unique_rates[start:start + block])
+        values[start:start + block] = np.exp(-np.outer(log_base, years)) @ amounts
+    return values[inverse].reshape(rates.shape)
+
+
+def scenario_grid(years, amounts, treasury_rates, spreads, treasury_shifts, purchase_prices,
+                  target_profit=DEFAULT_TARGET_PROFIT, guess=0.1) -> pd.DataFrame:
+    """
+    Evaluate every (purchase price, spread, Treasury shift) combination for one deal.
+
+    years and amounts describe the payments (year fractions from the purchase date);
+    treasury_rates is a {maturity: rate} curve in decimals; treasury_shifts are parallel
+    moves of that curve in decimals (0.0025 = +25bp). guess seeds the XIRR solves,
+    typically with the deal's IRR at its current price. Returns one row per cell.
+    """
+    years = np.asarray(years, dtype=np.float64)
+    amounts = np.asarray(amounts, dtype=np.float64)
+    spreads = np.atleast_1d(np.asarray(spreads, dtype=np.float64))
+    shifts = np.atleast_1d(np.asarray(treasury_shifts, dtype=np.float64))
+    prices = np.atleast_1d(np.asarray(purchase_prices, dtype=np.float64))
+
+    # One XIRR and duration per purchase price, solved together
+    price_years = np.broadcast_to(years, (len(prices), len(years)))
+    price_amounts = np.broadcast_to(amounts, (len(prices), len(years)))
+    irr, _ = solve_rates(price_years, price_amounts, prices, guess=0.1 if guess is None else guess)
+    with np.errstate(invalid="ignore"):
+        pv = price_amounts * np.exp(-price_years * np.log1p(irr)[:, None])
+        total_pv = pv.sum(axis=1)
+        duration = np.where(total_pv > 0, (pv @ years) / total_pv, 0.0)
+
+    curve = complete_curve(treasury_rates)
+    lower_idx, upper_idx = treasury_bound_indices(duration)
+    base_rate = interpolate_discount_rate(duration, MATURITIES[lower_idx], MATURITIES[upper_idx],
+                                          curve[lower_idx], curve[upper_idx], 0.0)
+
+    shape = (len(prices), len(spreads), len(shifts))
+    discount_rate = base_rate[:, None, None] + spreads[None, :, None] + shifts[None, None, :]
+    wholesale = wholesale_prices(years, amounts, discount_rate)
+    price_cells = np.broadcast_to(prices[:, None, None], shape)
+    profit = wholesale - price_cells - LEGAL_COSTS
+    competitor_quote = np.ceil((price_cells + (profit - target_profit)) / QUOTE_INCREMENT) * QUOTE_INCREMENT
+
+    price_index, spread_index, shift_index = np.indices(shape).reshape(3, -1)
+    return pd.DataFrame({
+        "purchase_price": prices[price_index],
+        "spread": spreads[spread_index],
+        "treasury_shift": shifts[shift_index],
+        "irr": irr[price_index],
+        "duration": duration[price_index],
+        "discount_rate": discount_rate.ravel(),
+        "wholesale_price": wholesale.ravel(),
+        "profit": profit.ravel(),
+        "competitor_quote": competitor_quote.ravel(),
+    })[SCENARIO_COLUMNS]
+
+
+def scenario_heatmap(grid, value="profit", purchase_price=None):
+    """
+    Spread x Treasury shift table of one value at a single purchase price
+    (the first price in the grid by default).
+    """
+    if purchase_price is None:
+        purchase_price = grid["purchase_price"].iloc[0]
+    rows = grid[np.isclose(grid["purchase_price"], purchase_price)]
+    return rows.pivot(index="spread", columns="treasury_shift", values=value)
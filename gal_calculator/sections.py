@@ -0,0 +1,81 @@
+"""
+Incremental report sections with field-level dependency tracking.
+
+Each report section (the exhibits list, the payment details paragraph, the
+prior appointment sentence, the facts) is built by a function that reads
+its inputs from a session-state-like mapping. ReportSections runs that
+function against a TrackedState, which records every key it read and the
+value it saw, and caches the result with those reads. On the next rerun the
+section is rebuilt only if one of the keys it read has a different value;
+otherwise the cached fragment is returned as is. Typing in one field
+therefore re-renders only the sections that actually read it.
+"""
+
+_MISSING = object()
+
+
+class TrackedState:
+    """
+    Read-only view of a mapping that records each key read and the value seen.
+    """
+    __slots__ = ("_state", "reads")
+
+    def __init__(self, state):
+        self._state = state
+        self.reads = {}
+
+    def get(self, key, default=None):
+        value = self._state.get(key, _MISSING)
+        self.reads[key] = value
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+
+def _unchanged(reads, state):
+    for key, seen in reads.items():
+        value = state.get(key, _MISSING)
+        if value is not seen and value != seen:
+            return False
+    return True
+
+
+class ReportSections:
+    """
+    Cached report fragments, each rebuilt only when an input it read has changed.
+    """
+
+    def __init__(self):
+        self._fragments = {}  # section name -> (reads, fragment)
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, name, state, build):
+        """
+        The fragment for section `name`: build(tracked_state) when it has never been built or
+        one of the keys it read from state has changed since, the cached fragment otherwise.
+        """
+        cached = self._fragments.get(name)
+        if cached is not None and _unchanged(cached[0], state):
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        tracked = TrackedState(state)
+        fragment = build(tracked)
+        self._fragments[name] = (tracked.reads, fragment)
+        return fragment
+
+    def dependencies(self, name):
+        """The keys section `name` read when it was last built."""
+        cached = self._fragments.get(name)
+        return sorted(cached[0]) if cached is not None else []
+
+    def clear(self):
+        self._fragments.clear()
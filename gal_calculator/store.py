@@ -0,0 +1,227 @@
+"""
+SQLite deal repository.
+
+Every save appends a row, so the table doubles as the history of pricings
+for a cause number. Rows are indexed by cause number, payee, factoring
+company and purchase date (names compare case-insensitively, and prefix
+searches use the same indexes). The payment schedule is stored as two
+compact blobs, little-endian int32 day offsets from the purchase date and
+float64 amounts, instead of one row per payment; the form inputs and the
+computed results are stored as JSON so a deal can be put back into the
+Financial Analysis form exactly as it was.
+"""
+import json
+import sqlite3
+from datetime import date, datetime
+from typing import NamedTuple
+
+import numpy as np
+
+OFFSET_DTYPE = np.dtype("<i4")
+AMOUNT_DTYPE = np.dtype("<f8")
+DEFAULT_LIMIT = 200
+# search() first looks for matches among this many newest deals per result wanted
+SEARCH_SCAN_FACTOR = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deals (
+    id INTEGER PRIMARY KEY,
+    cause_number TEXT NOT NULL COLLATE NOCASE,
+    payee_name TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    factoring_company TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    purchase_date TEXT NOT NULL,
+    purchase_price REAL NOT NULL,
+    saved_at TEXT NOT NULL,
+    num_payments INTEGER NOT NULL,
+    total_payments REAL NOT NULL,
+    schedule_offsets BLOB NOT NULL,
+    schedule_amounts BLOB NOT NULL,
+    results TEXT NOT NULL,
+    form_state TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deals_cause_number ON deals (cause_number, saved_at);
+DROP INDEX IF EXISTS deals_payee_name;
+DROP INDEX IF EXISTS deals_factoring_company;
+CREATE INDEX IF NOT EXISTS deals_payee_saved_at ON deals (payee_name, saved_at);
+CREATE INDEX IF NOT EXISTS deals_factoring_company_saved_at ON deals (factoring_company, saved_at);
+CREATE INDEX IF NOT EXISTS deals_purchase_date ON deals (purchase_date);
+CREATE INDEX IF NOT EXISTS deals_saved_at ON deals (saved_at);
+"""
+
+_SUMMARY_COLUMNS = ("id", "cause_number", "payee_name", "factoring_company", "purchase_date",
+                    "purchase_price", "saved_at", "num_payments", "total_payments")
+
+
+class StoredDeal(NamedTuple):
+    """A saved deal with its schedule decoded back into arrays."""
+    id: int
+    cause_number: str
+    payee_name: str
+    factoring_company: str
+    purchase_date: date
+    purchase_price: float
+    saved_at: datetime
+    offsets: np.ndarray
+    amounts: np.ndarray
+    results: dict
+    form_state: dict
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode_value(item) for item in value]}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "__datetime__" in value:
+            return datetime.fromisoformat(value["__datetime__"])
+        if "__date__" in value:
+            return date.fromisoformat(value["__date__"])
+        if "__tuple__" in value:
+            return tuple(_decode_value(item) for item in value["__tuple__"])
+    return value
+
+
+def encode_state(state) -> str:
+    """JSON for a mapping of widget values, keeping dates, datetimes and tuples."""
+    return json.dumps({key: _encode_value(value) for key, value in state.items()})
+
+
+def decode_state(text) -> dict:
+    return {key: _decode_value(value) for key, value in json.loads(text).items()}
+
+
+def _prefix_pattern(text):
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+class DealStore:
+    """
+    Saved deals in one SQLite file; safe to share between Streamlit sessions.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM deals").fetchone()[0]
+
+    def save(self, cause_number, purchase_date, purchase_price, offsets, amounts, results=None, form_state=None,
+             payee_name="", factoring_company="", saved_at=None) -> int:
+        """
+        Append a pricing of a deal and return its id. offsets are day offsets from the purchase date.
+        """
+        offsets = np.ascontiguousarray(offsets, dtype=OFFSET_DTYPE)
+        amounts = np.ascontiguousarray(amounts, dtype=AMOUNT_DTYPE)
+        if isinstance(purchase_date, datetime):
+            purchase_date = purchase_date.date()
+        saved_at = saved_at or datetime.now()
+        cursor = self._connection.execute(
+            "INSERT INTO deals (cause_number, payee_name, factoring_company, purchase_date, purchase_price, saved_at,"
+            " num_payments, total_payments, schedule_offsets, schedule_amounts, results, form_state)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (cause_number.strip(), payee_name.strip(), factoring_company.strip(), purchase_date.isoformat(),
+             float(purchase_price), saved_at.isoformat(timespec="seconds"), len(offsets), float(amounts.sum()),
+             offsets.tobytes(), amounts.tobytes(), encode_state(results or {}), encode_state(form_state or {})),
+        )
+        return cursor.lastrowid
+
+    def load(self, deal_id) -> StoredDeal:
+        """One saved deal by id; raises KeyError if there is none."""
+        row = self._connection.execute(
+            "SELECT id, cause_number, payee_name, factoring_company, purchase_date, purchase_price, saved_at,"
+            " schedule_offsets, schedule_amounts, results, form_state FROM deals WHERE id = ?",
+            (deal_id,),
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"No saved deal with id {deal_id}")
+        return StoredDeal(
+            row[0], row[1], row[2], row[3], date.fromisoformat(row[4]), row[5], datetime.fromisoformat(row[6]),
+            np.frombuffer(row[7], dtype=OFFSET_DTYPE), np.frombuffer(row[8], dtype=AMOUNT_DTYPE),
+            decode_state(row[9]), decode_state(row[10]),
+        )
+
+    def find(self, cause_number=None, payee_name=None, factoring_company=None, purchased_from=None, purchased_to=None,
+             prefix=False, limit=DEFAULT_LIMIT) -> list:
+        """
+        Summaries (no schedules) of saved deals matching every given filter, newest first.
+        Names match case-insensitively, exactly or as a prefix when prefix is true.
+        """
+        clauses = []
+        parameters = []
+        for column, value in (("cause_number", cause_number), ("payee_name", payee_name),
+                              ("factoring_company", factoring_company)):
+            if value:
+                if prefix:
+                    clauses.append(f"{column} LIKE ? ESCAPE '\\'")
+                    parameters.append(_prefix_pattern(value.strip()))
+                else:
+                    clauses.append(f"{column} = ?")
+                    parameters.append(value.strip())
+        if purchased_from is not None:
+            clauses.append("purchase_date >= ?")
+            parameters.append(purchased_from.isoformat())
+        if purchased_to is not None:
+            clauses.append("purchase_date <= ?")
+            parameters.append(purchased_to.isoformat())
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connection.execute(
+            f"SELECT {', '.join(_SUMMARY_COLUMNS)} FROM deals{where} ORDER BY saved_at DESC, id DESC LIMIT ?",
+            (*parameters, limit),
+        ).fetchall()
+        return [dict(zip(_SUMMARY_COLUMNS, row)) for row in rows]
+
+    def search(self, text, limit=DEFAULT_LIMIT) -> list:
+        """
+        Deals whose cause number, payee or factoring company starts with text, newest first.
+
+        A short prefix can match most of the table, and collecting and sorting every match
+        is what makes it slow. So the newest limit * SEARCH_SCAN_FACTOR deals are checked
+        first; if they hold limit matches, those are the answer. Otherwise the (id, saved_at)
+        of every match is collected from the name indexes alone, and only the newest limit
+        of them are read from the table.
+        """
+        text = text.strip()
+        if not text:
+            return self.find(limit=limit)
+        pattern = _prefix_pattern(text)
+        if limit >= 0:
+            rows = self._connection.execute(
+                f"SELECT {', '.join(_SUMMARY_COLUMNS)} FROM ("
+                f" SELECT {', '.join(_SUMMARY_COLUMNS)} FROM deals ORDER BY saved_at DESC, id DESC LIMIT ?3)"
+                " WHERE cause_number LIKE ?1 ESCAPE '\\' OR payee_name LIKE ?1 ESCAPE '\\' OR factoring_company LIKE ?1 ESCAPE '\\'"
+                " ORDER BY saved_at DESC, id DESC LIMIT ?2",
+                (pattern, limit, limit * SEARCH_SCAN_FACTOR),
+            ).fetchall()
+            if len(rows) == limit:
+                return [dict(zip(_SUMMARY_COLUMNS, row)) for row in rows]
+        rows = self._connection.execute(
+            f"SELECT {', '.join(_SUMMARY_COLUMNS)} FROM deals WHERE id IN ("
+            " SELECT id FROM ("
+            "  SELECT id, saved_at FROM deals WHERE cause_number LIKE ?1 ESCAPE '\\'"
+            "  UNION SELECT id, saved_at FROM deals WHERE payee_name LIKE ?1 ESCAPE '\\'"
+            "  UNION SELECT id, saved_at FROM deals WHERE factoring_company LIKE ?1 ESCAPE '\\')"
+            " ORDER BY saved_at DESC, id DESC LIMIT ?2)"
+            " ORDER BY saved_at DESC, id DESC",
+            (pattern, limit),
+        ).fetchall()
+        return [dict(zip(_SUMMARY_COLUMNS, row)) for row in rows]
+
+    def history(self, cause_number) -> list:
+        """Every saved pricing for a cause number, newest first."""
+        return self.find(cause_number=cause_number, limit=-1)
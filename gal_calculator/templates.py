@@ -0,0 +1,80 @@
+"""
+Report template engine.
+
+A template is plain text with {slot} placeholders and {#slot}...{/slot}
+sections, which are kept only when that slot has a non-blank value:
+
+    CAUSE NO. {cause_number}{#facts}
+
+    **FACTS:**
+
+    {facts}{/facts}
+
+compile_template() parses a template once into its literal fragments, with
+the positions of the slots and sections recorded. Rendering copies the
+fragment list, drops the slot values into those positions and joins it, so
+the cost of a render does not depend on how much fixed text a template has.
+"""
+import re
+
+_TOKEN = re.compile(r"\{([#/]?)([a-z_][a-z0-9_]*)\}")
+
+
+class CompiledTemplate:
+    """
+    A parsed template: literal fragments, plus (position, slot) and (position, slot, section) holes.
+    """
+    __slots__ = ("fragments", "slots", "sections", "slot_names")
+
+    def __init__(self, fragments, slots, sections):
+        self.fragments = fragments
+        self.slots = slots
+        self.sections = sections
+        self.slot_names = frozenset(name for _, name in slots).union(
+            *({name} | section.slot_names for _, name, section in sections))
+
+    def render(self, values) -> str:
+        """Render with a mapping of slot name to text; every slot the template uses must be given."""
+        parts = self.fragments.copy()
+        for position, name in self.slots:
+            parts[position] = values[name]
+        for position, name, section in self.sections:
+            if values[name].strip():
+                parts[position] = section.render(values)
+        return "".join(parts)
+
+
+def compile_template(source) -> CompiledTemplate:
+    """Parse template source; raises ValueError on an unclosed or mismatched section."""
+    template, _ = _compile(source, 0, None)
+    return template
+
+
+def _compile(source, start, section_name):
+    fragments = []
+    slots = []
+    sections = []
+    position = start
+    while True:
+        token = _TOKEN.search(source, position)
+        if token is None:
+            if section_name is not None:
+                raise ValueError(f"Template section {{#{section_name}}} is never closed")
+            fragments.append(source[position:])
+            return CompiledTemplate(fragments, slots, sections), len(source)
+
+        fragments.append(source[position:token.start()])
+        kind, name = token.groups()
+        if kind == "/":
+            if section_name is None:
+                raise ValueError(f"Template closes {{/{name}}} without opening it")
+            if name != section_name:
+                raise ValueError(f"Template closes {{/{name}}} inside {{#{section_name}}}")
+            return CompiledTemplate(fragments, slots, sections), token.end()
+        if kind == "#":
+            section, position = _compile(source, token.end(), name)
+            sections.append((len(fragments), name, section))
+        else:
+            slots.append((len(fragments), name))
+            position = token.end()
+        fragments.append("")
@@ -0,0 +1,172 @@
+"""
+Vectorized XIRR solver.
+
+The day-fraction vector is built once; each iteration evaluates NPV and its
+analytic derivative in a single NumPy pass. Newton steps are tried first from
+the guess. If Newton wanders off, Brent's method takes over on a narrow
+bracket around the guess, widened step by step up to [-0.99, 10.0].
+
+Passing the previous solve's rate as the guess (see WarmStarts) lets a
+re-solve after a small edit settle in a handful of NPV evaluations.
+"""
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+DAYS_PER_YEAR = 365.0
+LOW_RATE = -0.99
+HIGH_RATE = 10.0
+NPV_TOLERANCE = 1e-10
+RATE_TOLERANCE = 1e-12
+MAX_NEWTON_ITERATIONS = 50
+BRACKET_WIDTHS = (0.01, 0.05, 0.25, 1.0)
+WARM_START_ENTRIES = 256
+_EPOCH_ORDINAL = 719163  # date(1970, 1, 1).toordinal()
+
+
+class XirrResult(NamedTuple):
+    """Outcome of an XIRR solve; rate is None when no root was found."""
+    rate: Optional[float]
+    converged: bool
+    iterations: int
+    method: str
+
+
+def day_numbers(dates) -> np.ndarray:
+    """
+    Proleptic ordinal day numbers for a sequence of date/datetime objects.
+    Going through toordinal() is far cheaper than NumPy's datetime64 boxing.
+    """
+    if isinstance(dates, np.ndarray) and np.issubdtype(dates.dtype, np.datetime64):
+        return dates.astype("datetime64[D]").astype(np.int64) + _EPOCH_ORDINAL
+    return np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=len(dates))
+
+
+def year_fractions(dates, base_date=None) -> np.ndarray:
+    """
+    Convert dates to Excel-style year fractions (actual days / 365) from base_date.
+    The earliest date is used as the base when none is given.
+    """
+    days = day_numbers(dates)
+    base = days.min() if base_date is None else base_date.toordinal()
+    return (days - base) / DAYS_PER_YEAR
+
+
+def npv_and_derivative(rate, cashflows, years):
+    """
+    NPV and dNPV/drate at rate in one pass over the discount-factor vector.
+    """
+    log_base = np.log1p(rate)
+    discount = np.exp(-years * log_base)
+    weighted = cashflows * discount
+    npv = weighted.sum()
+    derivative = -(weighted @ years) / (1.0 + rate)
+    return float(npv), float(derivative)
+
+
+def solve_rate(cashflows, years, guess=0.1) -> XirrResult:
+    """
+    Solve NPV(rate) = 0 for pre-built cashflow and year-fraction arrays.
+    """
+    cashflows = np.asarray(cashflows, dtype=np.float64)
+    years = np.asarray(years, dtype=np.float64)
+
+    with np.errstate(over="ignore", invalid="ignore"):
+        rate = float(guess)
+        iterations = 0
+        for iterations in range(1, MAX_NEWTON_ITERATIONS + 1):
+            npv, derivative = npv_and_derivative(rate, cashflows, years)
+            if abs(npv) < NPV_TOLERANCE:
+                return XirrResult(rate, True, iterations, "newton")
+            if derivative == 0 or not np.isfinite(derivative):
+                break
+            step = npv / derivative
+            rate -= step
+            if not (LOW_RATE < rate < HIGH_RATE) or not np.isfinite(rate):
+                break
+            if abs(step) < RATE_TOLERANCE * max(1.0, abs(rate)):
+                return XirrResult(rate, True, iterations, "newton")
+
+        return _bracketed_fallback(cashflows, years, iterations, guess)
+
+
+def _bracketed_fallback(cashflows, years, iterations_so_far, center=None) -> XirrResult:
+    """
+    Brent's method on the narrowest bracket around center that changes sign,
+    widening through BRACKET_WIDTHS and finally the legacy [-0.99, 10.0] bracket.
+    """
+    from scipy.optimize import brentq
+
+    def npv(rate):
+        return float(cashflows @ np.exp(-years * np.log1p(rate)))
+
+    iterations = iterations_so_far
+    if center is not None and LOW_RATE < center < HIGH_RATE:
+        for width in BRACKET_WIDTHS:
+            low, high = max(LOW_RATE, center - width), min(HIGH_RATE, center + width)
+            low_npv, high_npv = npv(low), npv(high)
+            iterations += 2
+            if np.isfinite(low_npv) and np.isfinite(high_npv) and np.sign(low_npv) != np.sign(high_npv):
+                rate, info = brentq(npv, low, high, xtol=RATE_TOLERANCE, full_output=True, disp=False)
+                return XirrResult(float(rate), bool(info.converged), iterations + info.function_calls, "brent")
+
+    low_npv = npv(LOW_RATE)
+    high_npv = npv(HIGH_RATE)
+    iterations += 2
+    if low_npv == 0:
+        return XirrResult(LOW_RATE, True, iterations, "bracket")
+    if high_npv == 0:
+        return XirrResult(HIGH_RATE, True, iterations, "bracket")
+    if not (np.isfinite(low_npv) and np.isfinite(high_npv)) or np.sign(low_npv) == np.sign(high_npv):
+        return XirrResult(None, False, iterations, "unbracketed")
+
+    rate, info = brentq(npv, LOW_RATE, HIGH_RATE, xtol=RATE_TOLERANCE, full_output=True, disp=False)
+    return XirrResult(float(rate), bool(info.converged), iterations + info.function_calls, "brent")
+
+
+def xirr_detailed(cashflows, dates, guess=0.1) -> XirrResult:
+    """
+    Excel-compatible XIRR over irregular dates, with convergence details.
+    """
+    return solve_rate(cashflows, year_fractions(dates), guess)
+
+
+def xirr(cashflows, dates, guess=0.1):
+    """
+    Excel-compatible XIRR over irregular dates.
+    Returns None when the solver cannot find a rate in [-0.99, 10.0].
+    """
+    return xirr_detailed(cashflows, dates, guess).rate
+
+
+class WarmStarts:
+    """
+    Last solved rate per deal key, used as the starting guess for the next solve
+    of the same deal. Holds at most max_entries deals, dropping the least recently used.
+    """
+
+    def __init__(self, max_entries=WARM_START_ENTRIES):
+        self.max_entries = max_entries
+        self._rates = OrderedDict()
+
+    def __len__(self):
+        return len(self._rates)
+
+    def __contains__(self, key):
+        return key in self._rates
+
+    def get(self, key, default=0.1):
+        if key not in self._rates:
+            return default
+        self._rates.move_to_end(key)
+        return self._rates[key]
+
+    def update(self, key, rate):
+        """Remember rate for key; None and NaN (no root found) are ignored."""
+        if rate is None or not np.isfinite(rate):
+            return
+        self._rates[key] = float(rate)
+        self._rates.move_to_end(key)
+        while len(self._rates) > self.max_entries:
+            self._rates.popitem(last=False)
@@ -0,0 +1,48 @@
+import json
+
+import pandas as pd
+
+from gal_calculator import cli
+from gal_calculator.audit import audit_deals
+
+TREASURY_RATES = {0.25: 0.043, 0.5: 0.042, 1: 0.04, 2: 0.038, 3: 0.037, 5: 0.038, 7: 0.039, 10: 0.041, 20: 0.045, 30: 0.046}
+
+
+def _deals():
+    deals = [
+        {
+            "deal_id": f"D{i}",
+            "purchase_date": "2025-10-01",
+            "purchase_price": 20_000.0 + 1_000 * i,
+            "groups": [{"num_payments": 60, "payment_amount": 500.0, "first_payment_date": "2026-01-15",
+                        "frequency": "Monthly"}],
+            "treasury_rates": TREASURY_RATES,
+        }
+        for i in range(4)
+    ]
+    deals[2]["groups"] = '[{"num_payments": 60, "payment_amount": '
+    return deals
+
+
+def test_corrupt_deal_is_reported_and_the_rest_are_audited():
+    result = audit_deals(_deals(), precision=28)
+
+    assert list(result["deal_id"]) == ["D0", "D1", "D2", "D3"]
+    assert list(result["status"]) == ["match", "match", "error", "match"]
+    assert result.loc[2, "error"].startswith("JSONDecodeError: ")
+    assert (result.loc[[0, 1, 3], "error"] == "").all()
+
+
+def test_audit_command_exits_non_zero_on_a_corrupt_deal(tmp_path):
+    deals = pd.DataFrame(_deals())
+    deals["groups"] = [group if isinstance(group, str) else json.dumps(group) for group in deals["groups"]]
+    deals["treasury_rates"] = json.dumps(TREASURY_RATES)
+    input_path = tmp_path / "filings.csv"
+    output_path = tmp_path / "audit.csv"
+    deals.to_csv(input_path, index=False)
+
+    exit_code = cli.main(["audit", str(input_path), str(output_path), "--workers", "1", "--precision", "28"])
+
+    assert exit_code == 1
+    written = pd.read_csv(output_path, keep_default_na=False)
+    assert list(written["status"]) == ["match", "match", "error", "match"]